@@ -52,6 +52,7 @@ from dashboard.views import (
     DashboardStatsView,
     LatestOrdersView, 
     LowStockAlertsView,
+    StockAlertViewSet,
     VendorPerformanceViewSet,
     FurnitureSalesComparisonView,
     CategorySalesView,
@@ -72,6 +73,9 @@ from orders.views import (
 from payments.views import (
     StripeWebhookView,
     CheckoutViewSet,
+    PaymentExportView,
+    BulkPaymentStatusUpdateView,
+    PaymentStatusJobView,
     
 )
 
@@ -132,6 +136,7 @@ router.register("checkout", CheckoutViewSet, basename="checkout")
 router.register("payouts", PayoutRequestViewSet, basename="payout")
 router.register('wishlist', WishlistViewSet, basename='wishlist')
 router.register("admin/vendor-performance", VendorPerformanceViewSet, basename="vendor-performance")
+router.register("alerts/stock", StockAlertViewSet, basename="stock-alert")
 router.register('shipping-addresses', ShippingAddressViewSet, basename='shipping-address')
 
 
@@ -169,6 +174,9 @@ urlpatterns = [
 
     # Stripe webhook
     path("stripe/webhook/", StripeWebhookView.as_view(), name="stripe-webhook"),
+    path("payments/export/", PaymentExportView.as_view(), name="payment-export"),
+    path("payments/bulk-status/", BulkPaymentStatusUpdateView.as_view(), name="payment-bulk-status"),
+    path("payments/bulk-status/jobs/<int:pk>/", PaymentStatusJobView.as_view(), name="payment-status-job"),
 
     path("admin/stats/", DashboardStatsView.as_view(), name="dashboard-stats"),
     path("admin/top/sell/products/", TopSellProductGraphView.as_view(), name="sell-product-graph"),
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatapp', '0004_remove_message_message_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender', 'receiver', 'timestamp'], name='chatapp_mes_sender__a6318f_idx'),
+        ),
+    ]
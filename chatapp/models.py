@@ -37,6 +37,12 @@ class Message(BaseModel):
     deleted_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Conversation lookups: each direction of (sender, receiver) in timestamp order.
+            models.Index(fields=["sender", "receiver", "timestamp"]),
+        ]
+
     def clean(self):
         if self.attachment and self.attachment.size > self.MAX_FILE_SIZE:
             raise ValidationError(f"The file size exceeds the {self.MAX_FILE_SIZE / (1024 * 1024)} MB limit.")
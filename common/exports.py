@@ -0,0 +1,157 @@
+# common/exports.py
+"""
+Streaming CSV / NDJSON exports.
+
+Rows come from a ``values_list()`` projection read with ``.iterator()``, are
+encoded into ~64 KB blocks and handed to a ``StreamingHttpResponse``, so
+memory stays flat no matter how many rows are exported. ``?compress=zstd``
+wraps the stream in a zstandard frame (``.zst`` download).
+
+Viewsets opt in with ``ExportMixin`` and an ``export_fields`` mapping of
+column name -> ORM lookup, which adds ``GET <list-url>/export/`` honouring
+the same queryset and filters as the list view.
+
+    ?file_format=csv|ndjson   default csv
+    ?compress=zstd            optional
+"""
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from users.enums import UserRole
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+CSV = "csv"
+NDJSON = "ndjson"
+FORMATS = (CSV, NDJSON)
+ZSTD = "zstd"
+
+FORMAT_PARAM = "file_format"
+COMPRESS_PARAM = "compress"
+
+CHUNK_SIZE = 2000
+BLOCK_SIZE = 64 * 1024
+ZSTD_LEVEL = 3
+
+_CONTENT_TYPES = {CSV: "text/csv; charset=utf-8", NDJSON: "application/x-ndjson"}
+
+
+def _blocks(lines):
+    """Join encoded lines into blocks so the response isn't one write per row."""
+    buffer = io.StringIO()
+    for line in lines:
+        buffer.write(line)
+        if buffer.tell() >= BLOCK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def csv_lines(columns, rows):
+    line = io.StringIO()
+    writer = csv.writer(line)
+
+    def render(values):
+        line.seek(0)
+        line.truncate()
+        writer.writerow(values)
+        return line.getvalue()
+
+    yield render(columns)
+    for row in rows:
+        yield render(row)
+
+
+def ndjson_lines(columns, rows):
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + "\n"
+
+
+def zstd_blocks(blocks):
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export(queryset, fields, filename, file_format=CSV, compress=None, chunk_size=CHUNK_SIZE):
+    """
+    Build a StreamingHttpResponse for ``queryset`` projected onto ``fields``
+    (an ordered mapping of column name -> lookup).
+    """
+    columns = list(fields)
+    rows = (
+        queryset.prefetch_related(None)
+        .values_list(*fields.values())
+        .iterator(chunk_size=chunk_size)
+    )
+    lines = csv_lines(columns, rows) if file_format == CSV else ndjson_lines(columns, rows)
+    body = _blocks(lines)
+
+    filename = f"{filename}-{timezone.now():%Y%m%d%H%M%S}.{file_format}"
+    content_type = _CONTENT_TYPES[file_format]
+    if compress == ZSTD:
+        body = zstd_blocks(body)
+        filename += ".zst"
+        content_type = "application/zstd"
+
+    response = StreamingHttpResponse(body, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def parse_export_params(request):
+    file_format = (request.query_params.get(FORMAT_PARAM) or CSV).lower()
+    if file_format not in FORMATS:
+        raise ValidationError({FORMAT_PARAM: f"Use one of: {', '.join(FORMATS)}."})
+
+    compress = (request.query_params.get(COMPRESS_PARAM) or "").lower() or None
+    if compress not in (None, ZSTD):
+        raise ValidationError({COMPRESS_PARAM: f"Only '{ZSTD}' is supported."})
+    if compress == ZSTD and zstandard is None:
+        raise ValidationError({COMPRESS_PARAM: "zstandard is not installed on this server."})
+    return file_format, compress
+
+
+def ensure_can_export(user):
+    if not (user.is_authenticated and (
+        user.is_staff or getattr(user, "role", None) in [UserRole.ADMIN.value, UserRole.VENDOR.value]
+    )):
+        raise PermissionDenied("Only vendors or admins can export.")
+
+
+class ExportMixin:
+    export_fields = None
+    export_filename = "export"
+    export_chunk_size = CHUNK_SIZE
+
+    def get_export_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        ensure_can_export(request.user)
+        file_format, compress = parse_export_params(request)
+        return stream_export(
+            self.get_export_queryset(),
+            self.export_fields,
+            self.export_filename,
+            file_format=file_format,
+            compress=compress,
+            chunk_size=self.export_chunk_size,
+        )
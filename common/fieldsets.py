@@ -0,0 +1,106 @@
+# common/fieldsets.py
+"""
+Sparse fieldsets for read endpoints.
+
+    ?fields=id,name,price1            only render these fields
+    ?fields=id,quantity,product.name  dotted names reach into nested serializers
+    ?fields=id,name&expand=reviews    add relations to a selection
+
+Without ``?fields=`` responses are unchanged and every field is rendered, so
+the lean shape is something a client asks for.
+
+Serializers opt in with ``SparseFieldsetMixin`` and describe their relations
+in Meta:
+
+    related_fields = {"reviews": ("prefetch", "reviews__user"),
+                      "vendor_details": ("select", "vendor")}
+
+Viewsets opt in with ``SparseFieldsetViewMixin``, which builds
+select_related/prefetch_related from the fields that will actually be
+rendered, so unrequested relations are never loaded.
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def _parse(value):
+    return {part.strip() for part in (value or "").split(",") if part.strip()}
+
+
+def _names_at(paths, path):
+    """Child field names selected at ``path``; None means "no restriction"."""
+    if path in paths:
+        return None
+    prefix = f"{path}." if path else ""
+    names = {p[len(prefix):].split(".", 1)[0] for p in paths if p.startswith(prefix)}
+    return names or None
+
+
+class SparseFieldsetMixin:
+
+    def _fieldset_path(self):
+        parts = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                parts.append(node.field_name)
+            node = node.parent
+        return ".".join(reversed(parts))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        # Writes need every field for validation; only trim what we render.
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+
+        params = request.query_params
+        path = self._fieldset_path()
+        requested = _names_at(_parse(params.get(FIELDS_PARAM)), path)
+        if requested is None:
+            return fields
+        requested |= _names_at(_parse(params.get(EXPAND_PARAM)), path) or set()
+        return {
+            name: field for name, field in fields.items()
+            if name in requested or field.write_only
+        }
+
+
+def build_query_plan(serializer, prefix="", prefetch_only=False):
+    """
+    Walk the fields ``serializer`` will render and collect the
+    select_related / prefetch_related lookups declared in Meta.related_fields.
+    Anything below a prefetched relation is prefetched as well.
+    """
+    select, prefetch = [], []
+    related = getattr(getattr(serializer, "Meta", None), "related_fields", {})
+
+    for name, field in serializer.fields.items():
+        if field.write_only or name not in related:
+            continue
+        kind, lookup = related[name]
+        full_lookup = f"{prefix}{lookup}"
+        as_prefetch = prefetch_only or kind == "prefetch"
+        (prefetch if as_prefetch else select).append(full_lookup)
+
+        child = getattr(field, "child", field)
+        if isinstance(child, SparseFieldsetMixin):
+            child_select, child_prefetch = build_query_plan(child, f"{full_lookup}__", as_prefetch)
+            select += child_select
+            prefetch += child_prefetch
+
+    return select, prefetch
+
+
+class SparseFieldsetViewMixin:
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        select, prefetch = build_query_plan(self.get_serializer())
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
@@ -0,0 +1,196 @@
+# common/images.py
+"""
+Image derivatives for models built on ``common.models.ImageVariantsModel``
+(ProductImage, ReviewImage, ImageUpload, Banner).
+
+After an upload commits, ``common.signals`` queues the
+``generate_image_derivatives`` Celery task, which decodes the original once
+with Pillow and stores:
+
+- ``image_width`` / ``image_height`` / ``image_bytes`` of the original;
+- WebP variants at VARIANT_WIDTHS (never upscaled) and one JPEG thumbnail
+  for clients without WebP, recorded in ``image_variants``:
+
+      {"source": "<image name>", "webp": {"320": "<path>", ...}, "jpeg": {"320": "<path>"}}
+
+Serializers read those paths through ``SrcsetField`` / ``ThumbnailField`` and
+never open the image on the request path. ``thumbnail`` is the WebP variant,
+``thumbnail_jpeg`` (``ThumbnailField(fmt="jpeg")``) the JPEG fallback. Originals uploaded before this
+existed are backfilled with ``manage.py generate_image_derivatives``.
+"""
+import io
+import logging
+import os
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# Sent with ``sender=<model class>, instance=...`` once an image's variants are stored.
+derivatives_generated = Signal()
+
+VARIANT_WIDTHS = (160, 320, 640, 1280)
+THUMBNAIL_WIDTH = 320
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+DERIVATIVES_DIR = "derivatives"
+
+# app labels passed to the task and walked by the backfill command
+IMAGE_MODELS = (
+    "products.ProductImage",
+    "review.ReviewImage",
+    "common.ImageUpload",
+    "common.Banner",
+)
+
+
+def _variant_path(image_name, width, ext):
+    stem, _ = os.path.splitext(image_name)
+    return f"{DERIVATIVES_DIR}/{stem}/{width}.{ext}"
+
+
+def _encode(image, fmt, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def _resize(image, width):
+    if image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def delete_variants(storage, variants):
+    for fmt in ("webp", "jpeg"):
+        for path in (variants.get(fmt) or {}).values():
+            try:
+                storage.delete(path)
+            except Exception:
+                logger.warning("Could not delete image variant %s", path, exc_info=True)
+
+
+def needs_derivatives(instance):
+    return bool(instance.image) and (instance.image_variants or {}).get("source") != instance.image.name
+
+
+def generate_derivatives(instance, force=False):
+    """Build variants for ``instance.image`` and store them; returns False when nothing was done."""
+    if not instance.image or (not force and not needs_derivatives(instance)):
+        return False
+
+    field = instance.image
+    storage = field.storage
+    with field.open("rb") as source:
+        original = Image.open(source)
+        original.load()
+    image = ImageOps.exif_transpose(original)
+    width, height = image.size
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    webp = {}
+    widths = [w for w in VARIANT_WIDTHS if w < width] or [width]
+    for target in widths:
+        path = storage.save(
+            _variant_path(field.name, target, "webp"),
+            _encode(_resize(image, target), "WEBP", quality=WEBP_QUALITY, method=4),
+        )
+        webp[str(target)] = path
+
+    thumb_width = min(THUMBNAIL_WIDTH, width)
+    thumbnail = _resize(image, thumb_width)
+    if thumbnail.mode != "RGB":
+        thumbnail = thumbnail.convert("RGB")
+    jpeg = {
+        str(thumb_width): storage.save(
+            _variant_path(field.name, thumb_width, "jpg"),
+            _encode(thumbnail, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True),
+        )
+    }
+
+    previous = instance.image_variants or {}
+    variants = {"source": field.name, "webp": webp, "jpeg": jpeg}
+    # Only write if the row still points at the same upload.
+    updated = type(instance).objects.filter(pk=instance.pk, image=field.name).update(
+        image_width=width,
+        image_height=height,
+        image_bytes=field.size,
+        image_variants=variants,
+    )
+    if not updated:
+        delete_variants(storage, variants)
+        return False
+    if previous.get("source") and previous != variants:
+        delete_variants(storage, previous)
+
+    instance.image_width, instance.image_height = width, height
+    instance.image_bytes, instance.image_variants = field.size, variants
+    derivatives_generated.send(sender=type(instance), instance=instance)
+    return True
+
+
+def generate_for(label, pk, force=False):
+    model = apps.get_model(label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return False
+    return generate_derivatives(instance, force=force)
+
+
+# ---------------------------
+# Read side
+# ---------------------------
+def _url(instance, path):
+    return instance.image.storage.url(path)
+
+
+def build_srcset(instance, fmt="webp"):
+    variants = (getattr(instance, "image_variants", None) or {}).get(fmt) or {}
+    return ", ".join(
+        f"{_url(instance, path)} {width}w"
+        for width, path in sorted(variants.items(), key=lambda item: int(item[0]))
+    )
+
+
+def thumbnail_url(instance, fmt="webp"):
+    """Smallest ``fmt`` variant at or above THUMBNAIL_WIDTH, else the largest, else the original."""
+    if not getattr(instance, "image", None):
+        return None
+    variants = (instance.image_variants or {}).get(fmt) or {}
+    for width in sorted(variants, key=int):
+        if int(width) >= THUMBNAIL_WIDTH:
+            return _url(instance, variants[width])
+    if variants:
+        return _url(instance, variants[max(variants, key=int)])
+    return instance.image.url
+
+
+class SrcsetField(serializers.Field):
+    """Read-only ``srcset`` string for an ImageVariantsModel instance (empty until processed)."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("source", "*")
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return build_srcset(instance)
+
+
+class ThumbnailField(serializers.Field):
+    """Read-only thumbnail URL; ``fmt="jpeg"`` for clients without WebP."""
+
+    def __init__(self, fmt="webp", **kwargs):
+        self.fmt = fmt
+        kwargs.setdefault("source", "*")
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return thumbnail_url(instance, self.fmt)
@@ -0,0 +1,30 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from common.images import IMAGE_MODELS, generate_derivatives
+
+
+class Command(BaseCommand):
+    help = "Generate WebP/JPEG variants and dimensions for uploaded images that don't have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", action="append", dest="models", choices=IMAGE_MODELS,
+                            help="Only process the given model (repeatable).")
+        parser.add_argument("--force", action="store_true",
+                            help="Regenerate variants even for images that are up to date.")
+        parser.add_argument("--chunk-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        force = options["force"]
+        for label in options["models"] or IMAGE_MODELS:
+            model = apps.get_model(label)
+            queryset = model.objects.exclude(image="").exclude(image__isnull=True).order_by("pk")
+            done = failed = 0
+            for instance in queryset.iterator(chunk_size=options["chunk_size"]):
+                try:
+                    if generate_derivatives(instance, force=force):
+                        done += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{label} #{instance.pk}: {exc}")
+            self.stdout.write(self.style.SUCCESS(f"{label}: processed {done}, failed {failed}."))
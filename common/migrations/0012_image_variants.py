@@ -0,0 +1,53 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0011_remove_reviewimage_review_delete_review_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banner',
+            name='image_bytes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='banner',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='banner',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='banner',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='imageupload',
+            name='image_bytes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='imageupload',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='imageupload',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='imageupload',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
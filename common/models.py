@@ -18,7 +18,21 @@ def upload_to(instance, filename):
     return os.path.join("uploads/common/", filename)
 
 
-class ImageUpload(BaseModel):
+class ImageVariantsModel(models.Model):
+    """
+    Size metadata and resized WebP/JPEG variants of ``image``, filled in the
+    background by common.images after upload.
+    """
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_bytes = models.PositiveIntegerField(null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        abstract = True
+
+
+class ImageUpload(ImageVariantsModel, BaseModel):
     image = models.ImageField(upload_to=upload_to)
     alt_text = models.CharField(max_length=255, blank=True, help_text="Optional alt text for SEO/accessibility")
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -126,7 +140,7 @@ class SavedProduct(BaseModel):
 
 
 
-class Banner(BaseModel):
+class Banner(ImageVariantsModel, BaseModel):
     title = models.CharField(max_length=255, blank=True)
     subtitle = models.CharField(max_length=255, blank=True)
     image = models.ImageField(upload_to=upload_to)
@@ -0,0 +1,252 @@
+# common/pagination.py
+"""
+Keyset (cursor) pagination, selectable per request.
+
+List endpoints keep page numbers by default. ``?pagination=cursor`` (or
+passing a ``cursor`` returned by a previous page) switches to keyset mode:
+the page is fetched with ``WHERE (key, id) < (last_key, last_id)`` on the
+queryset's own ordering (e.g. ``-order_date``, ``-created_at``,
+``-event_time``, ``timestamp``) with ``id`` as the tie-breaker, so deep pages
+cost the same as the first one and no ``COUNT(*)`` is issued.
+
+``?count=exact`` adds the exact total; ``?count=estimate`` adds the planner's
+row estimate on PostgreSQL (other databases fall back to an exact count).
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+PAGINATION_PARAM = "pagination"
+CURSOR_MODE = "cursor"
+CURSOR_PARAM = "cursor"
+COUNT_PARAM = "count"
+COUNT_EXACT = "exact"
+COUNT_ESTIMATE = "estimate"
+
+
+def wants_keyset(request):
+    params = request.query_params
+    return params.get(PAGINATION_PARAM) == CURSOR_MODE or bool(params.get(CURSOR_PARAM))
+
+
+def estimate_count(queryset):
+    """Planner row estimate on PostgreSQL; exact count elsewhere. Returns (count, is_estimate)."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count(), False
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"]), True
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    # Used when the queryset carries no ordering of its own.
+    ordering = "-created_at"
+
+    def __init__(self, page_size=None, page_size_query_param=None, max_page_size=None, ordering=None):
+        if page_size is not None:
+            self.page_size = page_size
+        if page_size_query_param is not None:
+            self.page_size_query_param = page_size_query_param
+        if max_page_size is not None:
+            self.max_page_size = max_page_size
+        if ordering is not None:
+            self.ordering = ordering
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size) if self.max_page_size else size
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    # ---------------------------
+    # Ordering / cursor helpers
+    # ---------------------------
+    def get_key(self, queryset):
+        """The (field name, descending) pair the keyset runs on."""
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering) or [self.ordering]
+        term = ordering[0]
+        if not isinstance(term, str) or term == "?":
+            raise ValidationError({PAGINATION_PARAM: "Cursor pagination is not available for this ordering."})
+        name = term.lstrip("-")
+        if name == "pk":
+            name = queryset.model._meta.pk.name
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+        if field is None or not field.concrete or field.null:
+            raise ValidationError(
+                {PAGINATION_PARAM: f"Cursor pagination is not available when ordering by '{name}'."}
+            )
+        return field.attname, term.startswith("-")
+
+    def encode_cursor(self, value, pk, backwards=False):
+        payload = json.dumps({"v": _encode_value(value), "id": pk, "b": int(backwards)}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request, model, field):
+        """(key value, pk, backwards) from ``?cursor=``, converted by the model's own fields."""
+        raw = request.query_params.get(CURSOR_PARAM)
+        if not raw:
+            return None
+        opts = model._meta
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4)))
+            value = opts.get_field(field).to_python(payload["v"])
+            pk = opts.pk.to_python(payload["id"])
+            if value is None or pk is None:
+                raise ValueError("Cursor keys cannot be null.")
+            return value, pk, bool(payload.get("b"))
+        except (binascii.Error, ValueError, TypeError, KeyError, DjangoValidationError):
+            raise NotFound("Invalid cursor.")
+
+    # ---------------------------
+    # BasePagination API
+    # ---------------------------
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        field, descending = self.get_key(queryset)
+        cursor = self.decode_cursor(request, queryset.model, field)
+        backwards = bool(cursor and cursor[2])
+
+        self.count = None
+        self.count_is_estimate = False
+        count_mode = request.query_params.get(COUNT_PARAM)
+        if count_mode == COUNT_EXACT:
+            self.count = queryset.count()
+        elif count_mode == COUNT_ESTIMATE:
+            self.count, self.count_is_estimate = estimate_count(queryset)
+
+        # Walking backwards is the same scan with the ordering flipped.
+        scan_descending = descending != backwards
+        sign = "-" if scan_descending else ""
+        queryset = queryset.order_by(f"{sign}{field}", f"{sign}pk")
+        if cursor:
+            value, pk, _ = cursor
+            op = "lt" if scan_descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"pk__{op}": pk})
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+
+        self.has_next = has_more if not backwards else True
+        self.has_previous = cursor is not None if not backwards else has_more
+        self.first, self.last = (rows[0], rows[-1]) if rows else (None, None)
+        self.field = field
+        if not rows and cursor:
+            # Stepped past either end; let the client go back to where it came from.
+            self.has_next, self.has_previous = backwards, not backwards
+            self.first = self.last = None
+            self._edge = (cursor[0], cursor[1])
+        else:
+            self._edge = None
+        return rows
+
+    def _link(self, row, backwards):
+        url = self.request.build_absolute_uri()
+        if row is None:
+            if self._edge is None:
+                return None
+            value, pk = self._edge
+        else:
+            value, pk = getattr(row, self.field), row.pk
+        url = remove_query_param(url, "page")
+        url = replace_query_param(url, PAGINATION_PARAM, CURSOR_MODE)
+        return replace_query_param(url, CURSOR_PARAM, self.encode_cursor(value, pk, backwards))
+
+    def get_next_link(self):
+        return self._link(self.last, False) if self.has_next else None
+
+    def get_previous_link(self):
+        return self._link(self.first, True) if self.has_previous else None
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+        ])
+        if self.count is not None:
+            payload["count"] = self.count
+            payload["count_is_estimate"] = self.count_is_estimate
+        payload["results"] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "count": {"type": "integer"},
+                "count_is_estimate": {"type": "boolean"},
+                "results": schema,
+            },
+        }
+
+
+class SelectablePaginationMixin:
+    """
+    Mix into a page-number paginator: ``?pagination=cursor`` hands the request
+    to ``KeysetPagination`` with the same page size settings.
+    """
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self._keyset = None
+        if wants_keyset(request):
+            self._keyset = self.keyset_class(
+                page_size=self.get_page_size(request) or self.page_size,
+                page_size_query_param=self.page_size_query_param,
+                max_page_size=self.max_page_size,
+                ordering=getattr(view, "cursor_ordering", None),
+            )
+            return self._keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if getattr(self, "_keyset", None) is not None:
+            return self._keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class SelectablePageNumberPagination(SelectablePaginationMixin, PageNumberPagination):
+    pass
@@ -7,11 +7,18 @@ from orders.models import Order, OrderItem, ShippingAddress
 from common.models import ImageUpload
 from common.models import Banner, Wishlist
 from products.serializers import ProductSerializer
+from common.images import SrcsetField, ThumbnailField
 
 class ImageUploadSerializer(serializers.ModelSerializer):
+    width = serializers.IntegerField(source="image_width", read_only=True)
+    height = serializers.IntegerField(source="image_height", read_only=True)
+    srcset = SrcsetField()
+    thumbnail = ThumbnailField()
+    thumbnail_jpeg = ThumbnailField(fmt="jpeg")
+
     class Meta:
         model = ImageUpload
-        fields = ["id", "image", "alt_text", "uploaded_at"]
+        fields = ["id", "image", "width", "height", "srcset", "thumbnail", "thumbnail_jpeg", "alt_text", "uploaded_at"]
 
 
 
@@ -137,10 +144,16 @@ class OrderListSerializer(serializers.ModelSerializer):
 
 
 class BannerSerializer(serializers.ModelSerializer):
+    width = serializers.IntegerField(source="image_width", read_only=True)
+    height = serializers.IntegerField(source="image_height", read_only=True)
+    srcset = SrcsetField()
+    thumbnail = ThumbnailField()
+    thumbnail_jpeg = ThumbnailField(fmt="jpeg")
+
     class Meta:
         model = Banner
         fields = [
-            'id', 'is_active', 'image', 'title', 'subtitle', 
+            'id', 'is_active', 'image', 'width', 'height', 'srcset', 'thumbnail', 'thumbnail_jpeg', 'title', 'subtitle', 
             'position', 'alt_text', 'link', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
@@ -0,0 +1,46 @@
+# common/signals.py
+import logging
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from common import images
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------
+# Image derivatives
+# ---------------------------
+def _enqueue_derivatives(label, pk):
+    from common.tasks import generate_image_derivatives
+
+    try:
+        # retry=False: an unreachable broker must not hold up the request that uploaded the image.
+        generate_image_derivatives.apply_async((label, pk), retry=False)
+    except Exception:
+        # Broker down: the upload itself is fine, the backfill command picks it up later.
+        logger.warning("Could not queue image derivatives for %s #%s", label, pk, exc_info=True)
+
+
+def queue_image_derivatives(sender, instance, raw=False, **kwargs):
+    if raw or not images.needs_derivatives(instance):
+        return
+    label = sender._meta.label
+    transaction.on_commit(lambda: _enqueue_derivatives(label, instance.pk))
+
+
+def delete_image_derivatives(sender, instance, **kwargs):
+    variants = instance.image_variants or {}
+    if not variants.get("source"):
+        return
+    storage = instance.image.storage
+    transaction.on_commit(lambda: images.delete_variants(storage, variants))
+
+
+def connect():
+    for label in images.IMAGE_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(queue_image_derivatives, sender=model, dispatch_uid=f"image_derivatives_{label}")
+        post_delete.connect(delete_image_derivatives, sender=model, dispatch_uid=f"image_derivatives_delete_{label}")
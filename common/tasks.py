@@ -0,0 +1,10 @@
+# common/tasks.py
+from celery import shared_task
+
+from common import images
+
+
+@shared_task(ignore_result=True)
+def generate_image_derivatives(label, pk, force=False):
+    """Decode an uploaded image once and store its WebP/JPEG variants (see common.images)."""
+    return images.generate_for(label, pk, force=force)
@@ -18,6 +18,7 @@ from users.enums import UserRole
 from rest_framework import viewsets, permissions, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.pagination import PageNumberPagination
+from common.pagination import SelectablePaginationMixin
 import logging
 from common.models import Banner, Wishlist
 from common.serializers import BannerSerializer, WishlistSerializer
@@ -181,7 +182,7 @@ class SavedProductViewSet(viewsets.ModelViewSet):
 
 
 
-class StandardResultsSetPagination(PageNumberPagination):
+class StandardResultsSetPagination(SelectablePaginationMixin, PageNumberPagination):
     page_size = 5
     page_size_query_param = 'page_size'
     max_page_size = 100
@@ -215,7 +216,7 @@ class OrderManagementViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = Order.objects.all()
         # Vendor sees only orders containing their products
         elif getattr(user, 'role', None) == UserRole.VENDOR.value:
-            queryset = Order.objects.filter(items__product__vendor=user).distinct()
+            queryset = Order.for_vendor(user)
         # Customer sees only their own orders
         elif getattr(user, 'role', None) == UserRole.CUSTOMER.value:
             queryset = Order.objects.filter(customer=user)
@@ -8,3 +8,12 @@ class PayoutStatusEnum(str, Enum):
     @classmethod
     def choices(cls):
         return [(key.value, key.name.capitalize()) for key in cls]
+
+
+class AlertStatus(str, Enum):
+    ACTIVE = "active"
+    RESOLVED = "resolved"
+
+    @classmethod
+    def choices(cls):
+        return [(key.value, key.name.capitalize()) for key in cls]
@@ -0,0 +1,17 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from dashboard.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute DailySalesRollup from payments and orders (all days, or a date range)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument("--until", type=date.fromisoformat, help="Last day to rebuild (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollups(start=options["since"], end=options["until"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily sales rollup rows."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.stock_alerts import sync_all_stock_alerts, sync_stock_alerts
+
+
+class Command(BaseCommand):
+    help = "Open / resolve low-stock alerts to match current stock (backfill and reconciliation)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--product", type=int, action="append", dest="product_ids",
+                            help="Only sync the given product id (repeatable).")
+
+    def handle(self, *args, **options):
+        if options["product_ids"]:
+            opened, resolved = sync_stock_alerts(options["product_ids"])
+        else:
+            opened, resolved = sync_all_stock_alerts()
+        self.stdout.write(self.style.SUCCESS(f"Opened {opened} and resolved {resolved} low-stock alerts."))
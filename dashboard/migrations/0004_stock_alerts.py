@@ -0,0 +1,79 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def retire_untracked_alerts(apps, schema_editor):
+    # Rows written before alerts were tracked carry no stock state; `manage.py sync_stock_alerts` reopens what is low.
+    Alert = apps.get_model('dashboard', 'Alert')
+    Alert.objects.update(status='resolved', resolved_at=django.utils.timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_alert'),
+        ('products', '0020_product_primary_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockAlertSetting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('low_stock_threshold', models.PositiveIntegerField()),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='alert',
+            name='resolved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='alert',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('resolved', 'Resolved')], default='active', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='alert',
+            name='stock_quantity',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='alert',
+            name='threshold',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='alert',
+            name='vendor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(retire_untracked_alerts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='alert_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['vendor', 'status', '-created_at', '-id'], name='alert_vendor_feed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='alert',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'active')), fields=('product',), name='alert_one_active_per_product'),
+        ),
+        migrations.AddField(
+            model_name='stockalertsetting',
+            name='vendor',
+            field=models.OneToOneField(limit_choices_to={'role': 'vendor'}, on_delete=django.db.models.deletion.CASCADE, related_name='stock_alert_setting', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def seed_rollups(apps, schema_editor):
+    # Same figures as dashboard.rollups._collect; `manage.py rebuild_sales_rollups` recomputes them any time.
+    DailySalesRollup = apps.get_model('dashboard', 'DailySalesRollup')
+    Payment = apps.get_model('payments', 'Payment')
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+
+    def grouped(queryset, prefix=''):
+        return queryset.annotate(day=TruncDate(f'{prefix}created_at')).values(f'{prefix}vendor_id', 'day').order_by()
+
+    sources = (
+        (grouped(Payment.objects.filter(status__in=['completed', 'refunded'])).annotate(
+            revenue=Sum('amount', filter=Q(status='completed')),
+            payments=Count('pk', filter=Q(status='completed')),
+            refunds=Sum('amount', filter=Q(status='refunded')),
+            refund_count=Count('pk', filter=Q(status='refunded')),
+        ), 'vendor_id'),
+        (grouped(Order.objects.all()).annotate(
+            orders=Count('pk'),
+            delivered_orders=Count('pk', filter=Q(order_status='delivered')),
+            delivered_revenue=Sum('total_amount', filter=Q(order_status='delivered')),
+        ), 'vendor_id'),
+        (grouped(OrderItem.objects.filter(order__order_status='delivered'), 'order__').annotate(
+            units_sold=Sum('quantity'),
+        ), 'order__vendor_id'),
+    )
+    cells = {}
+    for rows, vendor_key in sources:
+        for row in rows:
+            key = (row.pop(vendor_key), row.pop('day'))
+            cells.setdefault(key, {}).update({metric: value or 0 for metric, value in row.items()})
+    DailySalesRollup.objects.bulk_create(
+        [DailySalesRollup(vendor_id=vendor_id, day=day, **values) for (vendor_id, day), values in cells.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_stock_alerts'),
+        ('orders', '0014_orderitem_snapshot'),
+        ('payments', '0006_payment_status_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('day', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payments', models.PositiveIntegerField(default=0)),
+                ('refunds', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refund_count', models.PositiveIntegerField(default=0)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('delivered_orders', models.PositiveIntegerField(default=0)),
+                ('delivered_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('vendor', models.ForeignKey(limit_choices_to={'role': 'vendor'}, on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='rollup_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('vendor', 'day'), name='rollup_one_row_per_vendor_day')],
+            },
+        ),
+        migrations.RunPython(seed_rollups, migrations.RunPython.noop),
+    ]
@@ -2,7 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.utils.timezone import now
 from payments.enums import PaymentMethodEnum
-from dashboard.enums import PayoutStatusEnum
+from dashboard.enums import AlertStatus, PayoutStatusEnum
 from products.models import Product
 from users.models import User, BaseModel
 
@@ -33,14 +33,99 @@ class PayoutRequest(BaseModel):
 
 
 class Alert(BaseModel):
+    """
+    Low-stock alert, opened when a tracked product's stock falls to its
+    vendor's threshold and resolved once it's back above it
+    (see dashboard.stock_alerts). At most one active alert per product.
+    """
     product = models.ForeignKey(
         Product,
         on_delete=models.CASCADE,
         related_name="alerts",
         null=True, blank=True 
     )
+    vendor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="stock_alerts",
+        null=True, blank=True,
+    )
     message = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=20,
+        choices=AlertStatus.choices(),
+        default=AlertStatus.ACTIVE.value,
+    )
+    threshold = models.PositiveIntegerField(default=0)
+    # Stock when the alert was opened, kept current while it is active.
+    stock_quantity = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(default=now)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "-created_at", "-id"], name="alert_status_created_idx"),
+            models.Index(fields=["vendor", "status", "-created_at", "-id"], name="alert_vendor_feed_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product"],
+                condition=models.Q(status=AlertStatus.ACTIVE.value),
+                name="alert_one_active_per_product",
+            ),
+        ]
 
     def __str__(self):
         return self.message
+
+
+class StockAlertSetting(BaseModel):
+    """Per-vendor low-stock threshold; vendors without a row use settings.LOW_STOCK_THRESHOLD."""
+    vendor = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="stock_alert_setting",
+        limit_choices_to={"role": "vendor"}
+    )
+    low_stock_threshold = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.vendor} - low stock at {self.low_stock_threshold}"
+
+
+class DailySalesRollup(BaseModel):
+    """
+    One vendor's sales for one day, the source of the dashboard time series
+    (see dashboard.rollups). Payments count on the day they were created,
+    orders on the day they were placed.
+    """
+    vendor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_sales",
+        limit_choices_to={"role": "vendor"}
+    )
+    day = models.DateField()
+    # Completed payments.
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payments = models.PositiveIntegerField(default=0)
+    # Refunded payments.
+    refunds = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refund_count = models.PositiveIntegerField(default=0)
+    # Orders placed, whatever their status.
+    orders = models.PositiveIntegerField(default=0)
+    # Orders placed that day which have since been delivered.
+    delivered_orders = models.PositiveIntegerField(default=0)
+    delivered_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["vendor", "day"], name="rollup_one_row_per_vendor_day"),
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="rollup_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.vendor} - {self.day}: {self.revenue}"
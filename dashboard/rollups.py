@@ -0,0 +1,233 @@
+# dashboard/rollups.py
+"""
+Daily sales rollup behind the dashboard time series.
+
+DailySalesRollup keeps one row per vendor and day: completed and refunded
+payments created that day, orders placed that day, and how many of those
+orders were delivered (with their revenue and units). The charts and
+counters in dashboard.views sum these rows, so a request costs one indexed
+scan over the days it shows instead of over every order and payment.
+
+A row is always recomputed from the raw rows of its vendor and day, never
+adjusted in place, so refreshing it twice is harmless:
+
+- dashboard.signals refreshes the day of a Payment, Order or OrderItem that
+  is saved or deleted, once the transaction commits;
+- the paths that skip post_save (checkout's ``bulk_create``,
+  ``orders.views._update_order_status``, ``payments.bulk_status``) call
+  ``orders_changed`` / ``payments_changed`` themselves.
+
+``manage.py rebuild_sales_rollups`` recomputes every row, or a date range.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from dashboard.models import DailySalesRollup
+from orders.enums import OrderStatus
+from orders.models import Order, OrderItem
+from payments.enums import PaymentStatusEnum
+from payments.models import Payment
+
+COMPLETED = PaymentStatusEnum.COMPLETED.value
+REFUNDED = PaymentStatusEnum.REFUNDED.value
+DELIVERED = OrderStatus.DELIVERED.value
+
+METRICS = (
+    "revenue", "payments", "refunds", "refund_count",
+    "orders", "delivered_orders", "delivered_revenue", "units_sold",
+)
+WRITE_BATCH_SIZE = 500
+# Days recomputed per pass of rebuild_rollups.
+REBUILD_WINDOW_DAYS = 31
+
+
+def day_of(moment):
+    return timezone.localdate(moment)
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def cells_for(rows):
+    """{(vendor_id, day)} for (vendor_id, created_at) pairs."""
+    return {(vendor_id, day_of(created_at)) for vendor_id, created_at in rows if vendor_id and created_at}
+
+
+# ---------------------------
+# Recompute
+# ---------------------------
+def _collect(start=None, end=None, vendor_id=None):
+    """{(vendor_id, day): {metric: value}} from the raw rows, ``start`` to ``end`` inclusive."""
+    def grouped(queryset, prefix=""):
+        if start is not None:
+            queryset = queryset.filter(**{f"{prefix}created_at__gte": _start_of(start)})
+        if end is not None:
+            queryset = queryset.filter(**{f"{prefix}created_at__lt": _start_of(end + timedelta(days=1))})
+        if vendor_id is not None:
+            queryset = queryset.filter(**{f"{prefix}vendor_id": vendor_id})
+        return queryset.annotate(day=TruncDate(f"{prefix}created_at")).values(f"{prefix}vendor_id", "day").order_by()
+
+    payments = grouped(Payment.objects.filter(status__in=[COMPLETED, REFUNDED])).annotate(
+        revenue=Sum("amount", filter=Q(status=COMPLETED)),
+        payments=Count("pk", filter=Q(status=COMPLETED)),
+        refunds=Sum("amount", filter=Q(status=REFUNDED)),
+        refund_count=Count("pk", filter=Q(status=REFUNDED)),
+    )
+    orders = grouped(Order.objects.all()).annotate(
+        orders=Count("pk"),
+        delivered_orders=Count("pk", filter=Q(order_status=DELIVERED)),
+        delivered_revenue=Sum("total_amount", filter=Q(order_status=DELIVERED)),
+    )
+    units = grouped(OrderItem.objects.filter(order__order_status=DELIVERED), "order__").annotate(
+        units_sold=Sum("quantity"),
+    )
+
+    cells = defaultdict(dict)
+    for rows, vendor_key in ((payments, "vendor_id"), (orders, "vendor_id"), (units, "order__vendor_id")):
+        for row in rows:
+            vendor, day = row.pop(vendor_key), row.pop("day")
+            if vendor is not None:
+                cells[(vendor, day)].update({metric: value or 0 for metric, value in row.items()})
+    return {cell: values for cell, values in cells.items() if any(values.values())}
+
+
+def _write(cells):
+    DailySalesRollup.objects.bulk_create(
+        [
+            DailySalesRollup(vendor_id=vendor_id, day=day, **{metric: values.get(metric, 0) for metric in METRICS})
+            for (vendor_id, day), values in cells.items()
+        ],
+        batch_size=WRITE_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["vendor", "day"],
+        update_fields=[*METRICS, "updated_at"],
+    )
+
+
+def refresh_cells(cells):
+    """Recompute the rows for ``cells`` ({(vendor_id, day)}): four queries per vendor."""
+    by_vendor = defaultdict(set)
+    for vendor_id, day in cells:
+        if vendor_id is not None:
+            by_vendor[vendor_id].add(day)
+    for vendor_id, days in by_vendor.items():
+        fresh = {
+            cell: values for cell, values in _collect(min(days), max(days), vendor_id).items() if cell[1] in days
+        }
+        with transaction.atomic():
+            _write(fresh)
+            DailySalesRollup.objects.filter(
+                vendor_id=vendor_id, day__in=days - {day for _, day in fresh}
+            ).delete()
+
+
+def schedule_refresh(cells):
+    """Refresh ``cells`` once the current transaction commits."""
+    cells = {cell for cell in cells if cell[0] is not None}
+    if cells:
+        transaction.on_commit(lambda: refresh_cells(cells))
+
+
+def orders_changed(order_ids, delivered_only=False):
+    """Refresh the days of orders written without post_save (bulk_create, QuerySet.update)."""
+    orders = Order.objects.filter(pk__in=list(order_ids))
+    if delivered_only:
+        orders = orders.filter(order_status=DELIVERED)
+    schedule_refresh(cells_for(orders.values_list("vendor_id", "created_at")))
+
+
+def payments_changed(rows):
+    """Same for payments; ``rows`` are their (vendor_id, created_at) pairs."""
+    schedule_refresh(cells_for(rows))
+
+
+def rebuild_rollups(start=None, end=None):
+    """
+    Recompute every row from ``start`` to ``end`` (dates, both optional),
+    REBUILD_WINDOW_DAYS at a time. Returns the number of rows written.
+    """
+    if start is None:
+        firsts = [
+            model.objects.aggregate(first=Min("created_at"))["first"] for model in (Payment, Order)
+        ]
+        firsts = [day_of(first) for first in firsts if first]
+        if not firsts:
+            DailySalesRollup.objects.all().delete()
+            return 0
+        start = min(firsts)
+    end = end or timezone.localdate()
+
+    written = 0
+    while start <= end:
+        window_end = min(start + timedelta(days=REBUILD_WINDOW_DAYS - 1), end)
+        cells = _collect(start, window_end)
+        with transaction.atomic():
+            DailySalesRollup.objects.filter(day__range=(start, window_end)).delete()
+            _write(cells)
+        written += len(cells)
+        start = window_end + timedelta(days=1)
+    return written
+
+
+# ---------------------------
+# Reads
+# ---------------------------
+def rollup_rows(vendor=None, start=None, end=None):
+    rows = DailySalesRollup.objects.all()
+    if vendor is not None:
+        rows = rows.filter(vendor=vendor)
+    if start is not None:
+        rows = rows.filter(day__gte=start)
+    if end is not None:
+        rows = rows.filter(day__lte=end)
+    return rows
+
+
+def totals(*metrics, vendor=None, start=None, end=None):
+    """{metric: sum} over the days from ``start`` to ``end``."""
+    sums = rollup_rows(vendor, start, end).aggregate(**{metric: Sum(metric) for metric in metrics})
+    return {metric: value or 0 for metric, value in sums.items()}
+
+
+def window_totals(windows, vendor=None):
+    """
+    Several sums in one query. ``windows`` maps a name to (metric, start, end),
+    either bound may be None; returns {name: sum}.
+    """
+    def window(start, end):
+        bounds = {}
+        if start is not None:
+            bounds["day__gte"] = start
+        if end is not None:
+            bounds["day__lte"] = end
+        return Q(**bounds) if bounds else None
+
+    starts = [start for _, start, _ in windows.values()]
+    rows = rollup_rows(vendor, start=min(starts) if None not in starts else None)
+    sums = rows.aggregate(**{
+        name: Sum(metric, filter=window(start, end)) for name, (metric, start, end) in windows.items()
+    })
+    return {name: value or 0 for name, value in sums.items()}
+
+
+def daily(metric, start, end, vendor=None):
+    """{day: sum of ``metric``} for the days with sales between ``start`` and ``end``."""
+    return dict(
+        rollup_rows(vendor, start, end).values("day").annotate(total=Sum(metric)).values_list("day", "total")
+    )
+
+
+def monthly(metric, year, vendor=None):
+    """{month number: sum of ``metric``} for ``year``."""
+    rows = (
+        rollup_rows(vendor).filter(day__year=year)
+        .annotate(month=TruncMonth("day")).values("month").annotate(total=Sum(metric))
+        .values_list("month", "total")
+    )
+    return {month.month: total for month, total in rows}
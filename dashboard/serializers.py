@@ -4,7 +4,7 @@ from payments.models import Payment
 from payments.enums import PaymentStatusEnum
 from django.db import models
 from orders.models import Order
-from dashboard.models import Alert
+from dashboard.models import Alert, StockAlertSetting
 from users.models import User
 from orders.models import OrderItem
 from django.db.models import Sum
@@ -58,12 +58,21 @@ class LatestOrderSerializer(serializers.ModelSerializer):
 
 
 class AlertSerializer(serializers.ModelSerializer):
-    product_name = serializers.CharField(source="product.name", read_only=True)
-    stock_quantity = serializers.IntegerField(source="product.stock_quantity", read_only=True)
+    product_name = serializers.CharField(source="product.name", read_only=True, default=None)
 
     class Meta:
         model = Alert
-        fields = ["id", "product", "product_name", "stock_quantity", "message", "created_at"]
+        fields = [
+            "id", "product", "product_name", "vendor", "status", "stock_quantity", "threshold",
+            "message", "created_at", "resolved_at",
+        ]
+        read_only_fields = fields
+
+
+class StockAlertSettingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockAlertSetting
+        fields = ["low_stock_threshold"]
 
 
 
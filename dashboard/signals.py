@@ -0,0 +1,64 @@
+# dashboard/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from dashboard import rollups, stock_alerts
+from dashboard.models import StockAlertSetting
+from orders.models import Order, OrderItem
+from payments.models import Payment
+from products.models import Product
+
+STOCK_FIELDS = {"is_stock", "stock_quantity", "vendor"}
+PAYMENT_ROLLUP_FIELDS = {"status", "amount", "vendor"}
+ORDER_ROLLUP_FIELDS = {"order_status", "total_amount", "vendor"}
+ITEM_ROLLUP_FIELDS = {"quantity", "order"}
+
+
+# ---------------------------
+# Low-stock alerts
+# ---------------------------
+@receiver(post_save, sender=Product)
+def sync_alerts_on_product_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not STOCK_FIELDS & set(update_fields)):
+        return
+    transaction.on_commit(lambda: stock_alerts.sync_stock_alerts([instance.pk]))
+
+
+@receiver(post_save, sender=StockAlertSetting)
+@receiver(post_delete, sender=StockAlertSetting)
+def sync_alerts_on_threshold_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    vendor_id = instance.vendor_id
+    transaction.on_commit(lambda: stock_alerts.sync_stock_alerts(
+        Product.objects.filter(vendor_id=vendor_id, is_stock=True).values_list("pk", flat=True)
+    ))
+
+
+# ---------------------------
+# Daily sales rollup
+# ---------------------------
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def refresh_rollup_on_payment(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not PAYMENT_ROLLUP_FIELDS & set(update_fields)):
+        return
+    rollups.schedule_refresh(rollups.cells_for([(instance.vendor_id, instance.created_at)]))
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def refresh_rollup_on_order(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not ORDER_ROLLUP_FIELDS & set(update_fields)):
+        return
+    rollups.schedule_refresh(rollups.cells_for([(instance.vendor_id, instance.created_at)]))
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def refresh_rollup_on_order_item(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Items only count towards units_sold once their order is delivered.
+    if raw or (update_fields is not None and not ITEM_ROLLUP_FIELDS & set(update_fields)):
+        return
+    rollups.orders_changed([instance.order_id], delivered_only=True)
@@ -0,0 +1,139 @@
+# dashboard/stock_alerts.py
+"""
+Persisted low-stock alerts.
+
+A product whose stock is tracked (``is_stock``) is low once
+``stock_quantity`` drops to its vendor's threshold (StockAlertSetting, or
+settings.LOW_STOCK_THRESHOLD). ``sync_stock_alerts`` compares a set of
+products against their active alerts and
+
+- opens an Alert for products that just became low,
+- resolves the active alert of products that are back above the threshold,
+- keeps the stock figure of still-active alerts current.
+
+It is called wherever stock moves: order reservations and their release
+(orders.reservations), product saves and threshold changes
+(dashboard.signals) and the bulk importer. Opened and resolved alerts are
+pushed to the vendor's and the admins' notification sockets. The feed and
+the dashboard counters read the Alert table; nothing scans products on a
+request. ``manage.py sync_stock_alerts`` reconciles the whole catalogue.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from dashboard.enums import AlertStatus
+from dashboard.models import Alert, StockAlertSetting
+from products.models import Product
+
+ACTIVE = AlertStatus.ACTIVE.value
+RESOLVED = AlertStatus.RESOLVED.value
+
+DEFAULT_THRESHOLD = 5
+BATCH_SIZE = 500
+
+# Groups joined by notification.consumers.NotificationConsumer.
+ADMIN_GROUP = "notifications_admins"
+VENDOR_GROUP = "notifications_vendor_{}"
+
+
+def default_threshold():
+    return getattr(settings, "LOW_STOCK_THRESHOLD", DEFAULT_THRESHOLD)
+
+
+def thresholds_for(vendor_ids):
+    """{vendor_id: threshold} for vendors with their own setting."""
+    return dict(
+        StockAlertSetting.objects.filter(vendor_id__in=vendor_ids).values_list("vendor_id", "low_stock_threshold")
+    )
+
+
+def alert_message(name, quantity):
+    return f"Low stock: {name} (Only {quantity} left)"
+
+
+def sync_stock_alerts(product_ids, now=None):
+    """
+    Bring the alerts of ``product_ids`` in line with their current stock.
+    Returns (opened, resolved).
+    """
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return 0, 0
+    now = now or timezone.now()
+    default = default_threshold()
+    opened, resolved = [], []
+
+    for start in range(0, len(product_ids), BATCH_SIZE):
+        batch = product_ids[start:start + BATCH_SIZE]
+        products = {
+            pk: (vendor_id, name, is_stock, quantity)
+            for pk, vendor_id, name, is_stock, quantity in Product.objects.filter(pk__in=batch).values_list(
+                "pk", "vendor_id", "name", "is_stock", "stock_quantity"
+            )
+        }
+        thresholds = thresholds_for({vendor_id for vendor_id, *_ in products.values()})
+        active = {alert.product_id: alert for alert in Alert.objects.filter(product_id__in=batch, status=ACTIVE)}
+
+        to_create, to_refresh = [], []
+        for pk, (vendor_id, name, is_stock, quantity) in products.items():
+            threshold = thresholds.get(vendor_id, default)
+            if not is_stock or quantity > threshold:
+                continue
+            alert = active.pop(pk, None)
+            if alert is None:
+                to_create.append(Alert(
+                    product_id=pk, vendor_id=vendor_id, threshold=threshold, stock_quantity=quantity,
+                    message=alert_message(name, quantity), created_at=now,
+                ))
+            elif (alert.stock_quantity, alert.threshold) != (quantity, threshold):
+                alert.stock_quantity, alert.threshold = quantity, threshold
+                alert.message, alert.updated_at = alert_message(name, quantity), now
+                to_refresh.append(alert)
+        # Whatever is left is no longer low (or the product is gone).
+        to_resolve = [alert.pk for alert in active.values()]
+
+        if not (to_create or to_refresh or to_resolve):
+            continue
+        with transaction.atomic():
+            # A concurrent sync may have opened the same alert; the partial unique index keeps one.
+            Alert.objects.bulk_create(to_create, ignore_conflicts=True)
+            Alert.objects.bulk_update(to_refresh, ["stock_quantity", "threshold", "message", "updated_at"])
+            if to_resolve:
+                Alert.objects.filter(pk__in=to_resolve, status=ACTIVE).update(
+                    status=RESOLVED, resolved_at=now, updated_at=now
+                )
+        if to_create:
+            opened += Alert.objects.filter(
+                product_id__in=[alert.product_id for alert in to_create], status=ACTIVE, created_at=now
+            ).values_list("pk", flat=True)
+        resolved += to_resolve
+
+    if opened or resolved:
+        changed = opened + resolved
+        transaction.on_commit(lambda: push_alerts(changed))
+    return len(opened), len(resolved)
+
+
+def sync_all_stock_alerts():
+    """Reconcile every product that is, or was, low. Returns (opened, resolved)."""
+    ceiling = max(default_threshold(), StockAlertSetting.objects.aggregate(m=Max("low_stock_threshold"))["m"] or 0)
+    candidates = set(
+        Product.objects.filter(is_stock=True, stock_quantity__lte=ceiling).values_list("pk", flat=True)
+    )
+    candidates.update(Alert.objects.filter(status=ACTIVE).values_list("product_id", flat=True))
+    candidates.discard(None)
+    return sync_stock_alerts(candidates)
+
+
+def push_alerts(alert_ids):
+    """Send opened/resolved alerts to the vendor's and the admins' sockets."""
+    from dashboard.serializers import AlertSerializer
+    from notification.utils import _safe_group_send
+
+    for alert in Alert.objects.filter(pk__in=alert_ids).select_related("product"):
+        event = {"type": "stock_alert", "alert": dict(AlertSerializer(alert).data)}
+        if alert.vendor_id:
+            _safe_group_send(VENDOR_GROUP.format(alert.vendor_id), event)
+        _safe_group_send(ADMIN_GROUP, event)
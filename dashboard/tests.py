@@ -1,3 +1,193 @@
-from django.test import TestCase
+"""
+Daily sales rollup: kept in step with payments and orders on commit, equal
+to a rebuild, and what the dashboard charts read.
+Vendor cards: one aggregate per table, cached per vendor, computed once.
+Stock alerts: opened at the threshold, kept current, resolved above it, and
+the vendor's own threshold wins over the default.
+"""
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from dashboard import rollups, vendor_stats
+from dashboard.enums import AlertStatus
+from dashboard.models import Alert, DailySalesRollup, StockAlertSetting
+from orders.enums import OrderStatus
+from orders.models import Order
+from payments.enums import PaymentStatusEnum
+from payments.models import Payment
+from products.models import Product
+from users.models import User
+
+
+class DailySalesRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create(email="vendor@example.com", role="vendor")
+        cls.customer = User.objects.create(email="customer@example.com", role="customer")
+        cls.admin = User.objects.create(email="admin@example.com", role="admin", is_staff=True)
+
+    def place_order(self, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(
+                order_id=f"ORD-ROLLUP-{Order.objects.count()}", customer=self.customer, vendor=self.vendor,
+                total_amount=Decimal(amount),
+            )
+            payment = Payment.objects.create(
+                order=order, customer=self.customer, vendor=self.vendor, amount=Decimal(amount),
+            )
+        return order, payment
+
+    def row(self):
+        return DailySalesRollup.objects.get(vendor=self.vendor, day=timezone.localdate())
+
+    def test_status_changes_refresh_the_day(self):
+        order, payment = self.place_order("40.00")
+        other_order, other_payment = self.place_order("10.00")
+        self.assertEqual((self.row().orders, self.row().revenue), (2, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.status = PaymentStatusEnum.COMPLETED.value
+            payment.save(update_fields=["status"])
+            other_payment.status = PaymentStatusEnum.REFUNDED.value
+            other_payment.save(update_fields=["status"])
+            order.order_status = OrderStatus.DELIVERED.value
+            order.save(update_fields=["order_status"])
+
+        row = self.row()
+        self.assertEqual((row.revenue, row.payments), (Decimal("40.00"), 1))
+        self.assertEqual((row.refunds, row.refund_count), (Decimal("10.00"), 1))
+        self.assertEqual((row.delivered_orders, row.delivered_revenue), (1, Decimal("40.00")))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other_order.delete()
+        self.assertEqual((self.row().orders, self.row().refunds), (1, 0))
+
+    def test_rebuild_matches_incremental_rows(self):
+        _, payment = self.place_order("25.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.status = PaymentStatusEnum.COMPLETED.value
+            payment.save()
+        incremental = list(DailySalesRollup.objects.values("vendor", "day", *rollups.METRICS))
+
+        self.assertEqual(rollups.rebuild_rollups(), 1)
+        self.assertEqual(list(DailySalesRollup.objects.values("vendor", "day", *rollups.METRICS)), incremental)
+
+    def test_monthly_chart_reads_the_rollup(self):
+        _, payment = self.place_order("15.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.status = PaymentStatusEnum.COMPLETED.value
+            payment.save()
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        today = timezone.localdate()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/admin/furniture-sales-comparison/", {"year": today.year})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[today.month - 1]["sales"], 15.0)
+        self.assertEqual(len(queries), 1)
+
+
+class VendorCardsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create(email="vendor@example.com", role="vendor")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_use_one_query_per_table_then_the_cache(self):
+        client = APIClient()
+        client.force_authenticate(self.vendor)
+        for url, expected in (("/api/vendor/dashboard/", 3), ("/api/vendor/payments-stats/", 2)):
+            with CaptureQueriesContext(connection) as cold:
+                first = client.get(url)
+            with CaptureQueriesContext(connection) as warm:
+                second = client.get(url)
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(len(cold), expected, url)
+            self.assertEqual(len(warm), 0, url)
+            self.assertEqual(first.json(), second.json())
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"value": len(calls)}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(vendor_stats.cached("test", self.vendor.pk, compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"value": 1}] * 8)
+
+
+@override_settings(LOW_STOCK_THRESHOLD=5)
+class StockAlertTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create(email="vendor@example.com", role="vendor")
+        cls.product = Product.objects.create(
+            vendor=cls.vendor, name="Chair", slug="chair", price1=Decimal("10.00"), stock_quantity=8,
+        )
+
+    def set_stock(self, quantity):
+        self.product.stock_quantity = quantity
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save(update_fields=["stock_quantity"])
+
+    def alerts(self):
+        return list(Alert.objects.filter(product=self.product).values_list("status", "threshold", "stock_quantity"))
+
+    def test_alert_opens_follows_the_stock_and_resolves(self):
+        with mock.patch("notification.utils._safe_group_send") as send:
+            self.set_stock(3)
+            self.assertEqual(self.alerts(), [(AlertStatus.ACTIVE.value, 5, 3)])
+            self.assertEqual(
+                [call.args[0] for call in send.call_args_list],
+                [f"notifications_vendor_{self.vendor.pk}", "notifications_admins"],
+            )
+
+            self.set_stock(2)
+            self.assertEqual(self.alerts(), [(AlertStatus.ACTIVE.value, 5, 2)])
+
+            self.set_stock(9)
+        self.assertEqual(self.alerts(), [(AlertStatus.RESOLVED.value, 5, 2)])
+        self.assertIsNotNone(Alert.objects.get(product=self.product).resolved_at)
+        # Only opening and resolving are pushed.
+        self.assertEqual(send.call_count, 4)
+
+    def test_vendor_threshold_overrides_the_default(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            setting = StockAlertSetting.objects.create(vendor=self.vendor, low_stock_threshold=10)
+        self.assertEqual(self.alerts(), [(AlertStatus.ACTIVE.value, 10, 8)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            setting.delete()
+        self.assertEqual(self.alerts(), [(AlertStatus.RESOLVED.value, 10, 8)])
+
+    def test_untracked_stock_never_alerts(self):
+        self.product.is_stock, self.product.stock_quantity = False, 0
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save(update_fields=["is_stock", "stock_quantity"])
+        self.assertEqual(self.alerts(), [])
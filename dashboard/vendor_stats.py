@@ -0,0 +1,181 @@
+# dashboard/vendor_stats.py
+"""
+Vendor dashboard cards (``VendorDashboardView``, ``VendorPaymentsStatsView``).
+
+Every card compares a vendor's figure with an earlier window. All the
+windows for one table are computed in one conditional aggregate
+(``Sum/Count(..., filter=Q(...))``): three queries for the dashboard
+(Product, DailySalesRollup, Order) and two for the payments cards
+(DailySalesRollup, PayoutRequest). Sales figures come from dashboard.rollups.
+
+Each result is cached per vendor for VENDOR_STATS_CACHE_TIMEOUT seconds.
+On a miss only one caller recomputes: it takes a lock with ``cache.add``,
+and the others poll for its result for up to LOCK_WAIT_SECONDS before
+computing it themselves. Deployed, settings.CACHES points at Redis
+(CACHE_URL), so the cached cards and the lock are shared by every worker: a
+cold key costs the database one computation per vendor, not one per request
+or per process. Without CACHE_URL (the per-process memory cache) it is one
+per process.
+"""
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from dashboard import rollups
+from dashboard.enums import PayoutStatusEnum
+from dashboard.models import PayoutRequest
+from orders.enums import OrderStatus
+from orders.models import Order
+from products.models import Product
+
+VENDOR_STATS_CACHE_TIMEOUT = 60
+CACHE_KEY = "dashboard:vendor:{}:{}"
+# The lock outlives a stuck computation by this long at most.
+LOCK_TIMEOUT = 30
+LOCK_WAIT_SECONDS = 5
+POLL_SECONDS = 0.05
+
+
+def percentage_change(current, previous):
+    if previous == 0:
+        return 0
+    return round(((current - previous) / previous) * 100, 1)
+
+
+# ---------------------------
+# Cache
+# ---------------------------
+def cached(name, vendor_id, compute):
+    """``compute()``, cached under (name, vendor_id); one caller computes a missing value."""
+    key = CACHE_KEY.format(name, vendor_id)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    lock = f"{key}:lock"
+    if not cache.add(lock, 1, LOCK_TIMEOUT):
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(POLL_SECONDS)
+            result = cache.get(key)
+            if result is not None:
+                return result
+        # The holder is slow or gone; answer this request anyway.
+        return compute()
+
+    try:
+        result = compute()
+        cache.set(key, result, VENDOR_STATS_CACHE_TIMEOUT)
+    finally:
+        cache.delete(lock)
+    return result
+
+
+# ---------------------------
+# Cards
+# ---------------------------
+def dashboard_cards(vendor):
+    now = timezone.now()
+    today = timezone.localdate()
+
+    # Products: datetime windows, as before the rollup existed.
+    start_last_month = (now.replace(day=1) - timedelta(days=1)).replace(day=1)
+    end_last_month = now.replace(day=1) - timedelta(days=1)
+    start_prev_week = now - timedelta(days=14)
+    end_prev_week = now - timedelta(days=7)
+
+    products = Product.objects.filter(vendor=vendor).aggregate(
+        total=Count("pk"),
+        last_month=Count("pk", filter=Q(created_at__gte=start_last_month, created_at__lte=end_last_month)),
+    )
+
+    month_start = today.replace(day=1)
+    last_month_end = month_start - timedelta(days=1)
+    week_start = today - timedelta(days=6)
+    sales = rollups.window_totals({
+        "units_this_month": ("units_sold", month_start, today),
+        "units_this_week": ("units_sold", week_start, today),
+        "units_prev_week": ("units_sold", week_start - timedelta(days=7), week_start - timedelta(days=1)),
+        "earnings_this_month": ("delivered_revenue", month_start, today),
+        "earnings_last_month": ("delivered_revenue", last_month_end.replace(day=1), last_month_end),
+    }, vendor=vendor)
+
+    pending = Order.objects.filter(vendor=vendor, order_status=OrderStatus.PENDING.value).aggregate(
+        total=Count("pk"),
+        last_week=Count("pk", filter=Q(created_at__gte=start_prev_week, created_at__lte=end_prev_week)),
+    )
+
+    return {
+        "total_products": {
+            "count": products["total"],
+            "change": percentage_change(products["total"], products["last_month"])
+        },
+        "sales_this_month": {
+            "count": sales["units_this_month"],
+            "week_change": percentage_change(sales["units_this_week"], sales["units_prev_week"])
+        },
+        "pending_orders": {
+            "count": pending["total"],
+            "change": percentage_change(pending["total"], pending["last_week"])
+        },
+        "earnings_this_month": {
+            "amount": sales["earnings_this_month"],
+            "change": percentage_change(sales["earnings_this_month"], sales["earnings_last_month"])
+        }
+    }
+
+
+def payments_cards(vendor):
+    now = timezone.now()
+    today = timezone.localdate()
+    last_month_end = today.replace(day=1) - timedelta(days=1)
+    week_start = today - timedelta(days=6)
+    prev_week = (week_start - timedelta(days=7), week_start - timedelta(days=1))
+
+    sales = rollups.window_totals({
+        "total_sales": ("revenue", None, None),
+        "last_month_sales": ("revenue", last_month_end.replace(day=1), last_month_end),
+        "paid_out": ("payments", None, None),
+        "paid_out_this_week": ("payments", week_start, today),
+        "paid_out_last_week": ("payments", *prev_week),
+        "total_orders": ("orders", None, None),
+        "this_week_orders": ("orders", week_start, today),
+        "last_week_orders": ("orders", *prev_week),
+    }, vendor=vendor)
+
+    payouts = PayoutRequest.objects.filter(vendor=vendor, status=PayoutStatusEnum.PENDING.value).aggregate(
+        total=Count("pk"),
+        last_week=Count("pk", filter=Q(
+            created_at__gte=now - timedelta(days=14), created_at__lte=now - timedelta(days=7)
+        )),
+    )
+
+    return {
+        "total_sales": {
+            "amount": sales["total_sales"],
+            "change": percentage_change(sales["total_sales"], sales["last_month_sales"])
+        },
+        "paid_out": {
+            "count": sales["paid_out"],
+            "week_change": percentage_change(sales["paid_out_this_week"], sales["paid_out_last_week"])
+        },
+        "pending_payout": {
+            "count": payouts["total"],
+            "change": percentage_change(payouts["total"], payouts["last_week"])
+        },
+        "total_orders": {
+            "count": sales["total_orders"],
+            "change": percentage_change(sales["this_week_orders"], sales["last_week_orders"])
+        }
+    }
+
+
+def vendor_dashboard(vendor):
+    return cached("dashboard", vendor.pk, lambda: dashboard_cards(vendor))
+
+
+def vendor_payments_stats(vendor):
+    return cached("payments", vendor.pk, lambda: payments_cards(vendor))
@@ -4,10 +4,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from datetime import timedelta
-from products.models import Product
 from orders.models import Order
 from orders.enums import OrderStatus
-from django.db.models.functions import TruncDate, TruncMonth
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from django.db.models import Sum
@@ -28,11 +26,15 @@ from django.utils.timezone import now
 from datetime import date
 from orders.models import Order, OrderItem
 from users.models import User
-from products.models import Product, ReturnProduct
+from products.models import ReturnProduct
 from payments.models import Payment
 from payments.enums import PaymentStatusEnum
-from dashboard.models import Alert
-from dashboard.serializers import LatestOrderSerializer, AlertSerializer
+from dashboard.models import Alert, StockAlertSetting
+from dashboard.enums import AlertStatus
+from dashboard.serializers import LatestOrderSerializer, AlertSerializer, StockAlertSettingSerializer
+from dashboard import rollups, stock_alerts, vendor_stats
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
 from django.utils.timezone import now
 from dashboard.serializers import VendorPerformanceSerializer
 from django.db.models.functions import Coalesce
@@ -52,109 +54,9 @@ from products.views import IsVendorOrAdmin
 class VendorDashboardView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get_percentage_change(self, current, previous):
-        if previous == 0:
-            return 0
-        return round(((current - previous) / previous) * 100, 1)
-
     def get(self, request):
-        user = request.user
-        now = timezone.now()
-
-        # === PRODUCTS ===
-        products_qs = Product.objects.filter(vendor=user)
-        total_products = products_qs.count()
-
-        # Last month product count
-        start_last_month = (now.replace(day=1) - timedelta(days=1)).replace(day=1)
-        end_last_month = now.replace(day=1) - timedelta(days=1)
-        last_month_products = Product.objects.filter(
-            vendor=user,
-            created_at__gte=start_last_month,
-            created_at__lte=end_last_month
-        ).count()
-
-        products_change = self.get_percentage_change(total_products, last_month_products)
-
-        # === SALES THIS MONTH ===
-        start_month = now.replace(day=1)
-        start_last_week = now - timedelta(days=7)
-        start_prev_week = start_last_week - timedelta(days=7)
-        end_prev_week = start_last_week
-
-        sales_this_month = Order.objects.filter(
-            vendor=user,
-            created_at__gte=start_month,
-            created_at__lte=now,
-            order_status=OrderStatus.DELIVERED.value
-        ).aggregate(total_sales=Sum('items__quantity'))['total_sales'] or 0
-
-        sales_this_week = Order.objects.filter(
-            vendor=user,
-            created_at__gte=start_last_week,
-            created_at__lte=now,
-            order_status=OrderStatus.DELIVERED.value
-        ).aggregate(total_sales=Sum('items__quantity'))['total_sales'] or 0
-
-        sales_prev_week = Order.objects.filter(
-            vendor=user,
-            created_at__gte=start_prev_week,
-            created_at__lte=end_prev_week,
-            order_status=OrderStatus.DELIVERED.value
-        ).aggregate(total_sales=Sum('items__quantity'))['total_sales'] or 0
-
-        sales_week_change = self.get_percentage_change(sales_this_week, sales_prev_week)
-
-        # === PENDING ORDERS ===
-        pending_orders = Order.objects.filter(
-            vendor=user,
-            order_status=OrderStatus.PENDING.value
-        ).count()
-
-        pending_last_week = Order.objects.filter(
-            vendor=user,
-            order_status=OrderStatus.PENDING.value,
-            created_at__gte=start_prev_week,
-            created_at__lte=end_prev_week
-        ).count()
-
-        pending_change = self.get_percentage_change(pending_orders, pending_last_week)
-
-        # === EARNINGS THIS MONTH ===
-        earnings_this_month = Order.objects.filter(
-            vendor=user,
-            created_at__gte=start_month,
-            created_at__lte=now,
-            order_status=OrderStatus.DELIVERED.value
-        ).aggregate(total_earnings=Sum('total_amount'))['total_earnings'] or 0
-
-        earnings_last_month = Order.objects.filter(
-            vendor=user,
-            created_at__gte=start_last_month,
-            created_at__lte=end_last_month,
-            order_status=OrderStatus.DELIVERED.value
-        ).aggregate(total_earnings=Sum('total_amount'))['total_earnings'] or 0
-
-        earnings_change = self.get_percentage_change(earnings_this_month, earnings_last_month)
-
-        return Response({
-            "total_products": {
-                "count": total_products,
-                "change": products_change
-            },
-            "sales_this_month": {
-                "count": sales_this_month,
-                "week_change": sales_week_change
-            },
-            "pending_orders": {
-                "count": pending_orders,
-                "change": pending_change
-            },
-            "earnings_this_month": {
-                "amount": earnings_this_month,
-                "change": earnings_change
-            }
-        })
+        # Three queries behind a short per-vendor cache; see dashboard.vendor_stats.
+        return Response(vendor_stats.vendor_dashboard(request.user))
 
 
 
@@ -176,75 +78,38 @@ class VendorSalesOverviewView(APIView):
 
     def get(self, request):
         user = request.user
-        now = timezone.now()
+        today = timezone.localdate()
         period = request.query_params.get("period", "7days") 
 
         data = []
 
+        # Delivered order revenue from dashboard.rollups
         if period == "7days":
-            start_date = now - timedelta(days=6)
+            start_date = today - timedelta(days=6)
             date_range = [start_date + timedelta(days=i) for i in range(7)]
-
-            sales = (
-                Order.objects.filter(
-                    vendor=user,
-                    created_at__date__gte=start_date.date(),
-                    created_at__date__lte=now.date(),
-                    order_status=OrderStatus.DELIVERED.value
-                )
-                .annotate(date=TruncDate("created_at"))
-                .values("date")
-                .annotate(total=Sum("total_amount"))
-            )
-            sales_dict = {s["date"]: float(s["total"] or 0) for s in sales}
+            sales_dict = rollups.daily("delivered_revenue", start_date, today, vendor=user)
 
             data = [
-                {"date": d.strftime("%a"), "value": sales_dict.get(d.date(), 0.0)}
+                {"date": d.strftime("%a"), "value": float(sales_dict.get(d, 0))}
                 for d in date_range
             ]
 
         elif period == "30days":
-            start_date = now - timedelta(days=29)
+            start_date = today - timedelta(days=29)
             date_range = [start_date + timedelta(days=i) for i in range(30)]
-
-            sales = (
-                Order.objects.filter(
-                    vendor=user,
-                    created_at__date__gte=start_date.date(),
-                    created_at__date__lte=now.date(),
-                    order_status=OrderStatus.DELIVERED.value
-                )
-                .annotate(date=TruncDate("created_at"))
-                .values("date")
-                .annotate(total=Sum("total_amount"))
-            )
-            sales_dict = {s["date"]: float(s["total"] or 0) for s in sales}
+            sales_dict = rollups.daily("delivered_revenue", start_date, today, vendor=user)
 
             data = [
-                {"date": d.strftime("%d %b"), "value": sales_dict.get(d.date(), 0.0)}
+                {"date": d.strftime("%d %b"), "value": float(sales_dict.get(d, 0))}
                 for d in date_range
             ]
 
         elif period == "year":
-            start_date = now.replace(month=1, day=1)
-            months = [start_date.replace(month=m) for m in range(1, now.month + 1)]
-
-            sales = (
-                Order.objects.filter(
-                    vendor=user,
-                    created_at__date__gte=start_date.date(),
-                    created_at__date__lte=now.date(),
-                    order_status=OrderStatus.DELIVERED.value
-                )
-                .annotate(month=TruncMonth("created_at"))
-                .values("month")
-                .annotate(total=Sum("total_amount"))
-            )
-            sales_dict = {s["month"].date(): float(s["total"] or 0) for s in sales}
+            sales_dict = rollups.monthly("delivered_revenue", today.year, vendor=user)
 
             data = [
-                {"date": m.strftime("%b"), "value": sales_dict.get(m.date(), 0.0)}
-                for m in months
+                {"date": date(today.year, m, 1).strftime("%b"), "value": float(sales_dict.get(m, 0))}
+                for m in range(1, today.month + 1)
             ]
 
         else:
@@ -376,113 +241,9 @@ class PayoutRequestViewSet(viewsets.ModelViewSet):
 class VendorPaymentsStatsView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get_percentage_change(self, current, previous):
-        if previous == 0:
-            return 0
-        return round(((current - previous) / previous) * 100, 1)
-
     def get(self, request):
-        user = request.user
-        now = timezone.now()
-
-        # --- DATES ---
-        start_month = now.replace(day=1)
-        start_last_month = (start_month - timedelta(days=1)).replace(day=1)
-        end_last_month = start_month - timedelta(days=1)
-
-        start_week = now - timedelta(days=7)
-        prev_week_start = start_week - timedelta(days=7)
-        prev_week_end = start_week
-
-        # --- TOTAL SALES ---
-        total_sales = Payment.objects.filter(
-            vendor=user,
-            status=PaymentStatusEnum.COMPLETED.value
-        ).aggregate(total=Sum("amount"))["total"] or 0
-
-        last_month_sales = Payment.objects.filter(
-            vendor=user,
-            status=PaymentStatusEnum.COMPLETED.value,
-            created_at__gte=start_last_month,
-            created_at__lte=end_last_month
-        ).aggregate(total=Sum("amount"))["total"] or 0
-
-        sales_change = self.get_percentage_change(total_sales, last_month_sales)
-
-        # --- PAID OUT ---
-        paid_out = Payment.objects.filter(
-            vendor=user,
-            status=PaymentStatusEnum.COMPLETED.value
-        ).count()
-
-        paid_out_last_week = Payment.objects.filter(
-            vendor=user,
-            status=PaymentStatusEnum.COMPLETED.value,
-            created_at__gte=prev_week_start,
-            created_at__lte=prev_week_end
-        ).count()
-
-        paid_out_this_week = Payment.objects.filter(
-            vendor=user,
-            status=PaymentStatusEnum.COMPLETED.value,
-            created_at__gte=start_week,
-            created_at__lte=now
-        ).count()
-
-        paid_out_week_change = self.get_percentage_change(paid_out_this_week, paid_out_last_week)
-
-        # --- PENDING PAYOUT ---
-        pending_payout = PayoutRequest.objects.filter(
-            vendor=user,
-            status=PayoutStatusEnum.PENDING.value
-        ).count()
-
-        pending_last_week = PayoutRequest.objects.filter(
-            vendor=user,
-            status=PayoutStatusEnum.PENDING.value,
-            created_at__gte=prev_week_start,
-            created_at__lte=prev_week_end
-        ).count()
-
-        pending_change = self.get_percentage_change(pending_payout, pending_last_week)
-
-        # --- TOTAL ORDERS ---
-        total_orders = Order.objects.filter(
-            vendor=user
-        ).count()
-
-        last_week_orders = Order.objects.filter(
-            vendor=user,
-            created_at__gte=prev_week_start,
-            created_at__lte=prev_week_end
-        ).count()
-
-        this_week_orders = Order.objects.filter(
-            vendor=user,
-            created_at__gte=start_week,
-            created_at__lte=now
-        ).count()
-
-        orders_change = self.get_percentage_change(this_week_orders, last_week_orders)
-
-        return Response({
-            "total_sales": {
-                "amount": total_sales,
-                "change": sales_change
-            },
-            "paid_out": {
-                "count": paid_out,
-                "week_change": paid_out_week_change
-            },
-            "pending_payout": {
-                "count": pending_payout,
-                "change": pending_change
-            },
-            "total_orders": {
-                "count": total_orders,
-                "change": orders_change
-            }
-        })
+        # Two queries behind a short per-vendor cache; see dashboard.vendor_stats.
+        return Response(vendor_stats.vendor_payments_stats(request.user))
 
 
 
@@ -510,22 +271,9 @@ class VendorSalesPerformanceView(APIView):
 
     def get(self, request):
         user = request.user
-        now = timezone.now()
-        start_of_year = now.replace(month=1, day=1)
-
-        # Get total sales per month
-        monthly_sales = (
-            Payment.objects.filter(
-                vendor=user,
-                status=PaymentStatusEnum.COMPLETED.value,
-                created_at__gte=start_of_year,
-                created_at__lte=now
-            )
-            .annotate(month=TruncMonth("created_at"))
-            .values("month")
-            .annotate(total=Sum("amount"))
-            .order_by("month")
-        )
+
+        # Get total sales per month (dashboard.rollups)
+        monthly_sales = rollups.monthly("revenue", timezone.localdate().year, vendor=user)
 
         # Prepare all months Jan–Dec with 0 as default
         sales_data = [
@@ -533,9 +281,8 @@ class VendorSalesPerformanceView(APIView):
         ]
 
         # Fill in sales values
-        for entry in monthly_sales:
-            month_num = entry["month"].month
-            sales_data[month_num - 1]["value"] = float(entry["total"] or 0)
+        for month_num, total in monthly_sales.items():
+            sales_data[month_num - 1]["value"] = float(total or 0)
 
         return Response({"sales_performance": sales_data})
 
@@ -570,24 +317,18 @@ class DashboardStatsView(APIView):
         prev_month_end = start_of_month - timedelta(days=1)
         prev_month_start = prev_month_end.replace(day=1)
 
+        # Revenue and orders from dashboard.rollups
+        all_time = rollups.totals("revenue", "orders")
+        prev_month = rollups.totals("revenue", "orders", start=prev_month_start, end=prev_month_end)
+
         # ------- Total Revenue (completed payments only) -------
-        total_revenue = (
-            Payment.objects.filter(status=PaymentStatusEnum.COMPLETED.value)
-            .aggregate(total=Sum("amount"))["total"] or 0
-        )
-        prev_revenue = (
-            Payment.objects.filter(
-                status=PaymentStatusEnum.COMPLETED.value,
-                created_at__date__range=[prev_month_start, prev_month_end],
-            ).aggregate(total=Sum("amount"))["total"] or 0
-        )
+        total_revenue = all_time["revenue"]
+        prev_revenue = prev_month["revenue"]
         revenue_change = self._calculate_change(total_revenue, prev_revenue)
 
         # ------- Total Orders -------
-        total_orders = Order.objects.count()
-        prev_orders = Order.objects.filter(
-            order_date__date__range=[prev_month_start, prev_month_end]
-        ).count()
+        total_orders = all_time["orders"]
+        prev_orders = prev_month["orders"]
         orders_change = self._calculate_change(total_orders, prev_orders)
 
         # ------- New Customers (this month vs last month) -------
@@ -607,11 +348,14 @@ class DashboardStatsView(APIView):
         ).count()
         sellers_change = self._calculate_change(active_sellers, prev_active_sellers)
 
-        # ------- Low Stock (threshold <=10) -------
-        low_stock = Product.objects.filter(is_stock=True, stock_quantity__lte=10).count()
-        prev_low_stock = Product.objects.filter(
-            is_stock=True, stock_quantity__lte=10, updated_at__range=[prev_month_start, prev_month_end]
-        ).count()
+        # ------- Low Stock (active alerts now vs. at the end of last month) -------
+        low_stock_counts = Alert.objects.aggregate(
+            current=Count("pk", filter=Q(status=AlertStatus.ACTIVE.value)),
+            previous=Count("pk", filter=Q(created_at__date__lte=prev_month_end) & (
+                Q(resolved_at__isnull=True) | Q(resolved_at__date__gt=prev_month_end)
+            )),
+        )
+        low_stock, prev_low_stock = low_stock_counts["current"], low_stock_counts["previous"]
         low_stock_change = self._calculate_change(low_stock, prev_low_stock)
 
         # ------- Pending Returns -------
@@ -686,59 +430,33 @@ class SalesOverviewView(APIView):
         range_param = request.query_params.get("range", "7d")  
         today = now().date()
 
+        # Completed payment revenue from dashboard.rollups
         if range_param == "7d":
             start_date = today - timedelta(days=6)
-            qs = (
-                Payment.objects.filter(
-                    status=PaymentStatusEnum.COMPLETED.value,
-                    created_at__date__gte=start_date,
-                )
-                .values("created_at__date")
-                .annotate(total=Sum("amount"))
-                .order_by("created_at__date")
-            )
             labels = [(start_date + timedelta(days=i)) for i in range(7)]
-            data = {str(item["created_at__date"]): float(item["total"] or 0) for item in qs}
+            data = rollups.daily("revenue", start_date, today)
             result = [
-                {"label": d.strftime("%a"), "sales": data.get(str(d), 0.0)}
+                {"label": d.strftime("%a"), "sales": float(data.get(d, 0))}
                 for d in labels
             ]
 
         elif range_param == "30d":
             start_date = today - timedelta(days=29)
-            qs = (
-                Payment.objects.filter(
-                    status=PaymentStatusEnum.COMPLETED.value,
-                    created_at__date__gte=start_date,
-                )
-                .values("created_at__date")
-                .annotate(total=Sum("amount"))
-                .order_by("created_at__date")
-            )
             labels = [(start_date + timedelta(days=i)) for i in range(30)]
-            data = {str(item["created_at__date"]): float(item["total"] or 0) for item in qs}
+            data = rollups.daily("revenue", start_date, today)
             result = [
-                {"label": d.strftime("%d %b"), "sales": data.get(str(d), 0.0)}
+                {"label": d.strftime("%d %b"), "sales": float(data.get(d, 0))}
                 for d in labels
             ]
 
         elif range_param == "1y":
-            qs = (
-                Payment.objects.filter(
-                    status=PaymentStatusEnum.COMPLETED.value,
-                    created_at__year=today.year,
-                )
-                .values("created_at__month")
-                .annotate(total=Sum("amount"))
-                .order_by("created_at__month")
-            )
             month_map = {
-                i: now().replace(month=i, day=1).strftime("%b")
+                i: date(today.year, i, 1).strftime("%b")
                 for i in range(1, 13)
             }
-            data = {item["created_at__month"]: float(item["total"] or 0) for item in qs}
+            data = rollups.monthly("revenue", today.year)
             result = [
-                {"label": month_map[m], "sales": data.get(m, 0.0)}
+                {"label": month_map[m], "sales": float(data.get(m, 0))}
                 for m in range(1, 13)
             ]
 
@@ -784,27 +502,58 @@ class LatestOrdersView(APIView):
 
 
 
-class LowStockAlertsView(APIView):
+class LowStockAlertsView(generics.ListAPIView):
+    """Active low-stock alerts, lowest stock first; ``?threshold=`` narrows them further."""
     permission_classes = [IsAdminUser]
+    serializer_class = AlertSerializer
+    filter_backends = []
 
-    def get(self, request, *args, **kwargs):
-        threshold = int(request.query_params.get("threshold", 5))
-
-        low_stock_products = Product.objects.filter(
-            is_stock=True, stock_quantity__lte=threshold
-        ).order_by("stock_quantity")
-
-        alerts = [
-            Alert(
-                product=p,
-                message=f"Low stock: {p.name} (Only {p.stock_quantity} left)",
-                created_at=now()
-            )
-            for p in low_stock_products
-        ]
+    def get_queryset(self):
+        qs = Alert.objects.filter(status=AlertStatus.ACTIVE.value).select_related("product")
+        threshold = self.request.query_params.get("threshold")
+        if threshold:
+            try:
+                qs = qs.filter(stock_quantity__lte=int(threshold))
+            except ValueError:
+                raise ValidationError({"threshold": "Must be an integer."})
+        return qs.order_by("stock_quantity", "-id")
+
+
+class StockAlertViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Low-stock alert feed, newest first: a vendor's own alerts, every alert
+    for admins. ``?status=active`` (default), ``resolved`` or ``all``;
+    ``?pagination=cursor`` for keyset pages.
+    """
+    serializer_class = AlertSerializer
+    permission_classes = [IsAuthenticated, IsVendor | IsAdmin | IsAdminUser]
+    filter_backends = []
+    cursor_ordering = "-created_at"
 
-        serializer = AlertSerializer(alerts, many=True)
-        return Response(serializer.data)
+    def get_queryset(self):
+        qs = Alert.objects.select_related("product")
+        if getattr(self.request.user, "role", None) == UserRole.VENDOR.value:
+            qs = qs.filter(vendor=self.request.user)
+        status_param = self.request.query_params.get("status", AlertStatus.ACTIVE.value)
+        if status_param != "all":
+            if status_param not in {s.value for s in AlertStatus}:
+                raise ValidationError({"status": "Use active, resolved or all."})
+            qs = qs.filter(status=status_param)
+        return qs.order_by("-created_at", "-id")
+
+    @action(detail=False, methods=["get", "put", "patch"], url_path="threshold",
+            permission_classes=[IsAuthenticated, IsVendor])
+    def threshold(self, request):
+        """The vendor's low-stock threshold; PUT/PATCH ``{"low_stock_threshold": n}`` changes it."""
+        setting = StockAlertSetting.objects.filter(vendor=request.user).first()
+        if request.method == "GET":
+            value = setting.low_stock_threshold if setting else stock_alerts.default_threshold()
+            return Response({"low_stock_threshold": value, "is_default": setting is None})
+
+        serializer = StockAlertSettingSerializer(setting, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(vendor=request.user)
+        return Response({"low_stock_threshold": serializer.instance.low_stock_threshold, "is_default": False})
 
 
 
@@ -842,20 +591,13 @@ class FurnitureSalesComparisonView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        year = request.query_params.get("year", now().year)
-
-        sales_data = (
-            Payment.objects.filter(
-                status=PaymentStatusEnum.COMPLETED.value,
-                created_at__year=year
-            )
-            .annotate(month=TruncMonth("created_at"))
-            .values("month")
-            .annotate(total_sales=Sum("amount"))
-            .order_by("month")
-        )
+        try:
+            year = int(request.query_params.get("year", now().year))
+        except (TypeError, ValueError):
+            return Response({"detail": "Invalid year."}, status=400)
 
-        monthly_dict = {entry["month"].month: float(entry["total_sales"] or 0) for entry in sales_data}
+        # Completed payment revenue from dashboard.rollups
+        monthly_dict = {m: float(total or 0) for m, total in rollups.monthly("revenue", year).items()}
 
         result = [
             {
@@ -918,7 +660,7 @@ class TopSellProductGraphView(APIView):
         )
 
         if hasattr(user, "role") and user.role == UserRole.VENDOR.value:
-            delivered_items = delivered_items.filter(product__vendor=user)
+            delivered_items = delivered_items.filter(vendor=user)
 
         debug_rows = delivered_items.values(
             "id", "status", "order__order_status", "product__name", "quantity"
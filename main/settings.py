@@ -16,6 +16,7 @@ from datetime import timedelta
 from decimal import Decimal
 from corsheaders.defaults import default_headers
 from celery import Celery
+from celery.schedules import crontab
 from . import env
 import firebase_admin
 from firebase_admin import credentials
@@ -65,6 +66,70 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 
 CELERY_BROKER_URL = config("CELERY_BROKER_URL", default="redis://redis:6379/0")
 CELERY_RESULT_BACKEND = config("CELERY_RESULT_BACKEND", default="redis://redis:6379/0")
+# Run tasks inline (tests, local benchmarks).
+CELERY_TASK_ALWAYS_EAGER = config("CELERY_TASK_ALWAYS_EAGER", default=False, cast=bool)
+
+CELERY_BEAT_SCHEDULE = {
+    # Promotion windows open/close on the minute; see products.pricing.
+    "products-promotion-boundaries": {
+        "task": "products.tasks.refresh_promotion_boundaries",
+        "schedule": 60.0,
+    },
+    "products-effective-prices-nightly": {
+        "task": "products.tasks.refresh_all_effective_prices",
+        "schedule": crontab(hour=3, minute=15),
+    },
+    "products-co-purchase-index-daily": {
+        "task": "products.tasks.update_co_purchase_index",
+        "schedule": crontab(hour=2, minute=30),
+    },
+    "products-flush-views": {
+        "task": "products.tasks.flush_product_views",
+        "schedule": 30.0,
+    },
+    "products-rebase-trending-scores": {
+        "task": "products.tasks.rebase_trending_scores",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    "orders-release-expired-reservations": {
+        "task": "orders.tasks.release_expired_reservations",
+        "schedule": 300.0,
+    },
+}
+
+# Shared by every web and worker process: dashboard.vendor_stats (cached cards and their
+# single-flight locks) and products.facets rely on all processes seeing the same keys.
+# docker-compose sets CACHE_URL to its Redis; unset, a per-process memory cache is used
+# (tests and local runs only).
+CACHE_URL = config("CACHE_URL", default="")
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Product detail views are buffered here and flushed in batches (products.popularity).
+# Empty: an in-process buffer, fine for development only.
+PRODUCT_VIEW_BUFFER_URL = config("PRODUCT_VIEW_BUFFER_URL", default="")
+PRODUCT_VIEW_FLUSH_SECONDS = 30
+TRENDING_HALF_LIFE_HOURS = 24
+
+# Neighbours kept per product by products.copurchase.
+CO_PURCHASE_TOP_K = 20
+
+# Unpaid online orders hold their stock this long; see orders.reservations.
+STOCK_RESERVATION_TTL_MINUTES = config("STOCK_RESERVATION_TTL_MINUTES", default=60, cast=int)
+
+# Default low-stock alert threshold for vendors without their own (dashboard.stock_alerts).
+LOW_STOCK_THRESHOLD = 5
 
 
 ALLOWED_HOSTS = [
@@ -106,6 +171,14 @@ print("jsutcheck", STRIPE_WEBHOOK_SECRET)
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY')
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY')
 
+# Stripe HTTP client (payments.stripe_utils): one pooled session per process, bounded timeouts.
+# STRIPE_API_BASE points it elsewhere, e.g. http://127.0.0.1:12111 for manage.py fake_stripe_server.
+STRIPE_API_BASE = config('STRIPE_API_BASE', default='')
+STRIPE_CONNECT_TIMEOUT = 3
+STRIPE_READ_TIMEOUT = 10
+STRIPE_POOL_SIZE = 32
+STRIPE_MAX_NETWORK_RETRIES = 1
+
 
 
 
@@ -179,7 +252,7 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'common.pagination.SelectablePageNumberPagination',
     'PAGE_SIZE': 20,
 }
 
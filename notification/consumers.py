@@ -74,7 +74,11 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
         """
         Send serialized notification data to WebSocket client.
         """
-        notification_data = event.get("notification", {})
+        notification_data = dict(event.get("notification", {}))
+        # Group-wide fan-out (utils.send_notification_to_users): pick this user's own row.
+        ids = event.get("ids")
+        if ids and str(self.user.id) in ids:
+            notification_data["id"] = ids[str(self.user.id)]
 
         # Build display name with role label
         name = f"{self.user.first_name} {self.user.last_name}".strip() or self.user.email
@@ -94,6 +98,15 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
             "data": notification_data,
         })
 
+    async def stock_alert(self, event):
+        """
+        Low-stock alert opened or resolved (dashboard.stock_alerts).
+        """
+        await self.send_json({
+            "type": "stock_alert",
+            "data": event.get("alert", {}),
+        })
+
     def get_group_name(self, user: User) -> str:
         """
         Return WebSocket group name based on user role:
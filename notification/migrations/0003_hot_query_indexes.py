@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0002_notification_created_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-event_time'], name='notificatio_user_id_69d1c8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'seen', '-event_time'], name='notificatio_user_id_db9b95_idx'),
+        ),
+    ]
@@ -14,6 +14,12 @@ class Notification(models.Model):
     meta_data = JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-event_time"]),
+            models.Index(fields=["user", "seen", "-event_time"]),
+        ]
+
 
 
 
@@ -0,0 +1,12 @@
+# notification/tasks.py
+from celery import shared_task
+
+from notification import utils
+from users.models import User
+
+
+@shared_task(ignore_result=True)
+def notify_admins_task(message, ntype, sender_id=None, meta_data=None):
+    """Background half of ``utils.notify_admins``."""
+    sender = User.objects.filter(pk=sender_id).first() if sender_id else None
+    utils.send_notification_to_users(utils.admin_users(), message, ntype=ntype, sender=sender, meta_data=meta_data)
@@ -1,3 +1,58 @@
+"""
+Fan-out notifications: one INSERT for every recipient and one group_send per
+WebSocket group, with each recipient's own row id in the event; admin
+notifications go to active admins only.
+"""
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from notification.models import Notification
+from notification.tasks import notify_admins_task
+from notification.utils import NotificationType, send_notification_to_users
+from users.models import User
+
+
+class SendNotificationToUsersTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admins = [User.objects.create(email=f"admin{i}@example.com", role="admin") for i in range(2)]
+        cls.vendor = User.objects.create(email="vendor@example.com", role="vendor")
+        cls.customer = User.objects.create(email="customer@example.com", role="customer")
+
+    def test_one_insert_and_one_send_per_group(self):
+        recipients = [*self.admins, self.vendor, self.customer, self.admins[0]]
+        with mock.patch("notification.utils._safe_group_send") as send, \
+                CaptureQueriesContext(connection) as queries:
+            notifications = send_notification_to_users(
+                recipients, "Hello", ntype=NotificationType.PRODUCT, sender=self.vendor,
+            )
+
+        self.assertEqual(len(notifications), 4)
+        self.assertEqual(sum(query["sql"].startswith("INSERT") for query in queries), 1)
+        events = {call.args[0]: call.args[1] for call in send.call_args_list}
+        self.assertEqual(set(events), {
+            "notifications_admins",
+            f"notifications_vendor_{self.vendor.pk}",
+            f"notifications_user_{self.customer.pk}",
+        })
+        rows = dict(Notification.objects.values_list("user_id", "pk"))
+        self.assertEqual(
+            events["notifications_admins"]["ids"],
+            {str(admin.pk): rows[admin.pk] for admin in self.admins},
+        )
+
+    def test_admin_notifications_reach_active_admins_only(self):
+        User.objects.create(email="former@example.com", role="admin", is_active=False)
+        User.objects.create(email="staff@example.com", role="customer", is_staff=True)
+
+        with mock.patch("notification.utils._safe_group_send"):
+            notify_admins_task("Imported", NotificationType.PRODUCT, self.vendor.pk)
 
-# Create your tests here.
+        self.assertEqual(
+            set(Notification.objects.values_list("user_id", flat=True)),
+            {admin.pk for admin in self.admins},
+        )
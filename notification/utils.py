@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Optional, Dict, Any
+import logging
+from typing import Iterable, List, Optional, Dict, Any
 from dataclasses import dataclass
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
@@ -13,6 +14,7 @@ from notification.models import Notification
 from orders.models import Order
 from django.db import models
 
+logger = logging.getLogger(__name__)
 
 # Try to align with your Enum (used by NotificationConsumer). Fallback to strings if not available.
 try:
@@ -180,13 +182,86 @@ def send_notification_to_user(
     return notification
 
 
+# ---------------------------------------------
+# Fan-out to many recipients
+# ---------------------------------------------
+def admin_users():
+    return User.objects.filter(role=_ROLE_ADMIN, is_active=True)
+
+
+def send_notification_to_users(
+    users: Iterable[User],
+    message: str,
+    *,
+    ntype: str,
+    sender: Optional[User] = None,
+    meta_data: Optional[Dict[str, Any]] = None,
+) -> List[Notification]:
+    """
+    ``send_notification_to_user`` for many recipients: one INSERT for all the
+    rows and one group_send per WebSocket group rather than per recipient
+    (every admin shares ``notifications_admins``). The event carries
+    ``ids`` ({user id: notification id}) so each socket can tell which row
+    is its own.
+    """
+    recipients = list({user.pk: user for user in users}.values())
+    if not recipients:
+        return []
 
+    notification_meta = prepare_notification_meta_data(
+        ntype=ntype, sender=sender, extras=meta_data or {}
+    )
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            user=user,
+            sender=sender,
+            message=message,
+            meta_data=notification_meta,
+            event_time=timezone.now(),
+        )
+        for user in recipients
+    ])
+
+    groups: Dict[str, Dict[str, Any]] = {}
+    for notification, user in zip(notifications, recipients):
+        group = groups.setdefault(_group_name_for_user(user), {"notification": notification, "user": user, "ids": {}})
+        group["ids"][str(user.pk)] = notification.pk
+
+    for group_name, group in groups.items():
+        payload = _base_payload(group["notification"], target_user=group["user"], full_name_from=sender or group["user"])
+        _safe_group_send(
+            group_name,
+            {"type": "send_notification", "notification": payload, "ids": group["ids"]},
+        )
 
+    return notifications
 
 
+def notify_admins(
+    message: str,
+    *,
+    ntype: str,
+    sender: Optional[User] = None,
+    meta_data: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Notify every active admin from a background task, once the current
+    transaction commits, so the caller doesn't pay per admin.
+    ``meta_data`` must be JSON-serializable.
+    """
+    args = (message, ntype, sender.pk if sender else None, meta_data or {})
+    transaction.on_commit(lambda: _enqueue_admin_notification(args))
 
 
+def _enqueue_admin_notification(args) -> None:
+    from notification.tasks import notify_admins_task
 
+    try:
+        # retry=False: an unreachable broker must not hold up the request.
+        notify_admins_task.apply_async(args, retry=False)
+    except Exception:
+        logger.warning("Could not queue admin notification; sending inline", exc_info=True)
+        notify_admins_task(*args)
 
 
 # ---------------------------------------------
@@ -219,15 +294,12 @@ def notify_order_payment_completed(order: Order, sender: Optional[User] = None)
         meta_data=meta,
     )
 
-    admins = User.objects.filter(role=_ROLE_ADMIN, is_active=True)
-    for admin in admins:
-        send_notification_to_user(
-            admin,
-            f"Order #{order.order_id} has been paid by {order.customer.email} for vendor {order.vendor.email}.",
-            ntype=NotificationType.ORDER,
-            sender=sender or order.customer,
-            meta_data=meta,
-        )
+    notify_admins(
+        f"Order #{order.order_id} has been paid by {order.customer.email} for vendor {order.vendor.email}.",
+        ntype=NotificationType.ORDER,
+        sender=sender or order.customer,
+        meta_data=meta,
+    )
 
 
 
@@ -267,15 +339,12 @@ def notify_order_payment_cancelled(order: Order, sender: Optional[User] = None)
         meta_data=meta,
     )
 
-    admins = User.objects.filter(role=_ROLE_ADMIN, is_active=True)
-    for admin in admins:
-        send_notification_to_user(
-            admin,
-            f"Order #{order.order_id} payment failed/cancelled by {order.customer.email} (vendor: {order.vendor.email}).",
-            ntype=NotificationType.ORDER,
-            sender=sender or order.customer,
-            meta_data=meta,
-        )
+    notify_admins(
+        f"Order #{order.order_id} payment failed/cancelled by {order.customer.email} (vendor: {order.vendor.email}).",
+        ntype=NotificationType.ORDER,
+        sender=sender or order.customer,
+        meta_data=meta,
+    )
 
 
 
@@ -12,6 +12,17 @@ from .models import Notification
 from .serializers import NotificationSerializer
 from .utils import send_notification_to_user
 from rest_framework import viewsets
+from common.pagination import KeysetPagination, wants_keyset
+
+
+def _list_response(request, qs):
+    # Plain list unless the client opts into cursor pages (?pagination=cursor).
+    if wants_keyset(request):
+        paginator = KeysetPagination(ordering="-event_time")
+        page = paginator.paginate_queryset(qs, request)
+        return paginator.get_paginated_response(NotificationSerializer(page, many=True).data)
+    serializer = NotificationSerializer(qs, many=True)
+    return Response(serializer.data)
 
 
 # ----------------------------
@@ -32,8 +43,7 @@ def notification_list(request):
         # Customer sees all own notifications
         qs = user.notifications.all().order_by("-event_time")
 
-    serializer = NotificationSerializer(qs, many=True)
-    return Response(serializer.data)
+    return _list_response(request, qs)
 
 
 # ----------------------------
@@ -54,8 +64,7 @@ def unseen_notification_list(request):
         # Customer sees own unseen notifications
         qs = user.notifications.filter(seen=False).order_by("-event_time")
 
-    serializer = NotificationSerializer(qs, many=True)
-    return Response(serializer.data)
+    return _list_response(request, qs)
 
 
 # ----------------------------
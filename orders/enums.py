@@ -29,3 +29,13 @@ class PaymentMethod(Enum):
     @classmethod
     def choices(cls):
         return [(pm.value, pm.name.capitalize()) for pm in cls]
+
+
+class ReservationStatus(Enum):
+    ACTIVE = "active"
+    COMMITTED = "committed"
+    RELEASED = "released"
+
+    @classmethod
+    def choices(cls):
+        return [(status.value, status.name.capitalize()) for status in cls]
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from orders.models import Order, OrderItem
+from products.models import Product
+
+BATCH_SIZE = 5000
+
+
+def backfill_item_vendors(batch_size=BATCH_SIZE):
+    """
+    Copy the vendor onto order items that have none, in pk windows: the
+    product's vendor, or the order's when the product has been deleted.
+    Returns the number of items updated.
+    """
+    vendor = Coalesce(
+        Subquery(Product.objects.filter(pk=OuterRef("product_id")).values("vendor_id")[:1]),
+        Subquery(Order.objects.filter(pk=OuterRef("order_id")).values("vendor_id")[:1]),
+    )
+    pending = OrderItem.objects.filter(vendor__isnull=True)
+    updated, last_pk = 0, 0
+    while True:
+        window = list(pending.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not window:
+            return updated
+        updated += OrderItem.objects.filter(pk__in=window).update(vendor_id=vendor)
+        last_pk = window[-1]
+
+
+class Command(BaseCommand):
+    help = "Fill OrderItem.vendor for items created before the column existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        updated = backfill_item_vendors(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Set the vendor on {updated} order items."))
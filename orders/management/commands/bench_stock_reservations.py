@@ -0,0 +1,105 @@
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connections
+from django.db.models import Sum
+
+from orders.models import OrderItem, StockReservation
+from orders.reservations import InsufficientStock
+from orders.utils import create_order_for_single_product
+from products.models import Product
+from users.models import User
+
+# SQLite answers a contended write with "database is locked"; the checkout is retried like a client would.
+BUSY_RETRIES = 50
+BUSY_BACKOFF_SECONDS = 0.02
+
+
+def _checkout(product_id, customer, quantity):
+    """One checkout on its own connection: ("ok" | "sold_out" | "busy", seconds)."""
+    started = time.perf_counter()
+    try:
+        for attempt in range(BUSY_RETRIES):
+            try:
+                product = Product.objects.get(pk=product_id)
+                create_order_for_single_product(product, customer, quantity=quantity)
+                return "ok", time.perf_counter() - started
+            except InsufficientStock:
+                return "sold_out", time.perf_counter() - started
+            except OperationalError:
+                time.sleep(BUSY_BACKOFF_SECONDS * (attempt + 1))
+        return "busy", time.perf_counter() - started
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run many checkouts of one SKU in parallel and check that the stock "
+        "reservations never oversell it. Works on a throwaway vendor, customer "
+        "and product, deleted afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--checkouts", type=int, default=300, help="Checkouts to attempt.")
+        parser.add_argument("--stock", type=int, default=100, help="Units of the SKU in stock.")
+        parser.add_argument("--workers", type=int, default=50, help="Checkouts running at the same time.")
+        parser.add_argument("--quantity", type=int, default=1, help="Units per checkout.")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark rows.")
+
+    def handle(self, *args, **options):
+        checkouts, stock, quantity = options["checkouts"], options["stock"], options["quantity"]
+        tag = uuid.uuid4().hex[:8]
+        vendor = User.objects.create(email=f"bench-vendor-{tag}@example.com", role="vendor")
+        customer = User.objects.create(email=f"bench-customer-{tag}@example.com", role="customer")
+        product = Product.objects.create(
+            vendor=vendor, name=f"Bench SKU {tag}", slug=f"bench-sku-{tag}", sku=f"BENCH-{tag}",
+            price1=Decimal("10.00"), is_stock=True, stock_quantity=stock,
+        )
+
+        try:
+            started = time.perf_counter()
+            try:
+                with ThreadPoolExecutor(max_workers=options["workers"], initializer=close_old_connections) as pool:
+                    results = list(pool.map(
+                        lambda _: _checkout(product.pk, customer, quantity), range(checkouts)
+                    ))
+            finally:
+                connections.close_all()
+            elapsed = time.perf_counter() - started
+
+            outcomes = [outcome for outcome, _ in results]
+            latencies = sorted(seconds * 1000 for _, seconds in results)
+            quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+            product.refresh_from_db()
+            # From the rows, not the outcomes: a checkout whose on_commit work hit a busy
+            # database reports an error after its order committed.
+            sold = OrderItem.objects.filter(product=product).aggregate(total=Sum("quantity"))["total"] or 0
+            reserved = StockReservation.objects.filter(product=product).aggregate(total=Sum("quantity"))["total"] or 0
+
+            self.stdout.write(
+                f"{checkouts} checkouts of {quantity} on {options['workers']} workers in {elapsed:.2f}s: "
+                f"{outcomes.count('ok')} ok, {outcomes.count('sold_out')} sold out, {outcomes.count('busy')} gave up"
+            )
+            self.stdout.write(
+                f"p50 {quantiles[49]:.1f} ms, p95 {quantiles[94]:.1f} ms, p99 {quantiles[98]:.1f} ms"
+            )
+            self.stdout.write(f"stock {stock} -> {product.stock_quantity}, reserved {reserved}, ordered {sold}")
+
+            if sold > stock or reserved != sold or product.stock_quantity != stock - sold:
+                raise CommandError("Oversold or lost stock: the counts above don't add up.")
+            if outcomes.count("busy"):
+                raise CommandError("Some checkouts never got a write slot; lower --workers.")
+            if outcomes.count("sold_out") and product.stock_quantity >= quantity:
+                raise CommandError("Checkouts were refused while stock was left.")
+        finally:
+            if not options["keep"]:
+                # The product first: deleting its vendor would hand it to the sentinel vendor.
+                product.delete()
+                User.objects.filter(pk__in=[vendor.pk, customer.pk]).delete()
+
+        self.stdout.write(self.style.SUCCESS("No oversell."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from orders.reservations import SWEEP_BATCH_SIZE, sweep_expired_reservations
+
+
+class Command(BaseCommand):
+    help = "Release stock reserved by unpaid orders whose reservation expired, and cancel those orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=SWEEP_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        cancelled = sweep_expired_reservations(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Cancelled {cancelled} expired orders and released their stock."))
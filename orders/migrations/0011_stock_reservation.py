@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:26
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_alter_orderitem_product'),
+        ('products', '0017_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('quantity', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('status', models.CharField(choices=[('active', 'Active'), ('committed', 'Committed'), ('released', 'Released')], default='active', max_length=20)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('released_at', models.DateTimeField(blank=True, null=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='orders.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='orders_stoc_status_e8aa04_idx')],
+            },
+        ),
+    ]
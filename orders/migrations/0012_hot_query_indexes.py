@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_stock_reservation'),
+        ('products', '0020_product_primary_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['vendor', 'order_status', 'created_at'], name='orders_orde_vendor__128dd1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', '-order_date'], name='orders_orde_custome_5a6219_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['product', 'order'], name='orders_orde_product_d9c1ab_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_item_vendors(apps, schema_editor):
+    """Same as ``manage.py backfill_order_item_vendors``, for the rows present at migration time."""
+    Order = apps.get_model("orders", "Order")
+    OrderItem = apps.get_model("orders", "OrderItem")
+    Product = apps.get_model("products", "Product")
+    OrderItem.objects.filter(vendor__isnull=True).update(vendor_id=Coalesce(
+        Subquery(Product.objects.filter(pk=OuterRef("product_id")).values("vendor_id")[:1]),
+        Subquery(Order.objects.filter(pk=OuterRef("order_id")).values("vendor_id")[:1]),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_hot_query_indexes'),
+        ('products', '0021_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='orderitem',
+            name='orders_orde_product_d9c1ab_idx',
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='vendor',
+            field=models.ForeignKey(blank=True, limit_choices_to={'role': 'vendor'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='vendor_order_items', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['vendor', 'order'], name='orders_orde_vendor__f3be1d_idx'),
+        ),
+        migrations.RunPython(backfill_item_vendors, migrations.RunPython.noop),
+    ]
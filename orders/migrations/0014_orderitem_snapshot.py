@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:48
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def snapshot_existing_items(apps, schema_editor):
+    """Existing items get the product's current name, SKU and thumbnail; deleted products stay blank."""
+    OrderItem = apps.get_model("orders", "OrderItem")
+    Product = apps.get_model("products", "Product")
+    product = Product.objects.filter(pk=OuterRef("product_id"))
+    OrderItem.objects.filter(product__isnull=False).update(
+        product_name=Subquery(product.values("name")[:1]),
+        product_sku=Coalesce(Subquery(product.values("sku")[:1]), Value("")),
+        product_thumbnail=Subquery(product.values("thumbnail_url")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0013_orderitem_vendor'),
+        ('products', '0021_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_sku',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_thumbnail',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.RunPython(snapshot_existing_items, migrations.RunPython.noop),
+    ]
@@ -9,7 +9,7 @@ from django.core.exceptions import ValidationError
 
 from users.models import BaseModel
 from products.models import Product
-from orders.enums import OrderStatus, DeliveryType, PaymentMethod
+from orders.enums import OrderStatus, DeliveryType, PaymentMethod, ReservationStatus
 
 User = settings.AUTH_USER_MODEL
 
@@ -81,6 +81,10 @@ class Order(BaseModel):
             models.Index(fields=["order_date"]),
             models.Index(fields=["order_status"]),
             models.Index(fields=["payment_status"]),
+            # Vendor dashboards: one vendor's orders in a status over a date range.
+            models.Index(fields=["vendor", "order_status", "created_at"]),
+            # A customer's order history, newest first.
+            models.Index(fields=["customer", "-order_date"]),
         ]
 
     def __str__(self):
@@ -88,14 +92,40 @@ class Order(BaseModel):
         customer_name = name_method() if callable(name_method) else getattr(self.customer, "email", str(self.customer))
         return f"Order {self.order_id} - {customer_name}"
 
+    @classmethod
+    def for_vendor(cls, vendor):
+        """
+        Orders holding any of ``vendor``'s items: a semi-join on the indexed
+        OrderItem.vendor, so no join through products and no DISTINCT.
+        """
+        return cls.objects.filter(pk__in=OrderItem.objects.filter(vendor=vendor).values("order_id"))
+
+    @staticmethod
+    def new_order_id():
+        return f"ORD{timezone.now().strftime('%Y%m%d')}{str(uuid.uuid4()).split('-')[0].upper()}"
+
     def save(self, *args, **kwargs):
         if not self.order_id:
-            self.order_id = f"ORD{timezone.now().strftime('%Y%m%d')}{str(uuid.uuid4()).split('-')[0].upper()}"
+            self.order_id = self.new_order_id()
         super().save(*args, **kwargs)
 
     def update_totals(self, tax_rate: Decimal | float | None = None, delivery_fee_override: Decimal | None = None):
-        subtotal = sum((item.price or Decimal("0.00")) * item.quantity for item in self.items.all())
-        item_count = sum(item.quantity for item in self.items.all())
+        self.compute_totals(
+            self.items.values_list("price", "quantity"),
+            tax_rate=tax_rate,
+            delivery_fee_override=delivery_fee_override,
+        )
+        self.save(update_fields=["subtotal", "tax_amount", "delivery_fee", "total_amount", "item_count"])
+        return self
+
+    def compute_totals(self, lines, tax_rate: Decimal | float | None = None, delivery_fee_override: Decimal | None = None):
+        """
+        Set subtotal, tax, delivery fee, total and item count from ``lines``,
+        ``(price, quantity)`` pairs, without saving.
+        """
+        lines = list(lines)
+        subtotal = sum(((price or Decimal("0.00")) * quantity for price, quantity in lines), Decimal("0.00"))
+        item_count = sum(quantity for _, quantity in lines)
 
         discount = self.discount_amount or Decimal("0.00")
 
@@ -121,7 +151,6 @@ class Order(BaseModel):
         self.delivery_fee = delivery_fee
         self.total_amount = total
         self.item_count = item_count
-        self.save(update_fields=["subtotal", "tax_amount", "delivery_fee", "total_amount", "item_count"])
         return self
 
 
@@ -131,6 +160,15 @@ class Order(BaseModel):
 class OrderItem(BaseModel):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
     product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True)
+    # Copy of product.vendor taken when the order is placed; survives the product being deleted.
+    vendor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="vendor_order_items",
+        limit_choices_to={"role": "vendor"},
+    )
     quantity = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
     price = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(Decimal("0.00"))])
     status = models.CharField(
@@ -138,9 +176,32 @@ class OrderItem(BaseModel):
         choices=OrderStatus.choices(),
         default=OrderStatus.PENDING.value
     )
-    
+    # The product as it was sold; order pages read these instead of the product.
+    product_name = models.CharField(max_length=255, blank=True, default="")
+    product_sku = models.CharField(max_length=64, blank=True, default="")
+    product_thumbnail = models.CharField(max_length=500, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            # Order.for_vendor: a vendor's order ids straight from the index.
+            models.Index(fields=["vendor", "order"]),
+        ]
+
+    def copy_product(self, product):
+        """Take the vendor and the display snapshot from ``product``."""
+        self.vendor_id = product.vendor_id
+        self.product_name = product.name
+        self.product_sku = product.sku or ""
+        self.product_thumbnail = product.thumbnail_url
+        return self
+
+    def save(self, *args, **kwargs):
+        if self.product_id is not None and (self.vendor_id is None or not self.product_name):
+            self.copy_product(self.product)
+        super().save(*args, **kwargs)
+
     def __str__(self):
-        product_name = self.product.name if self.product else "Deleted Product"
+        product_name = self.product_name or (self.product.name if self.product else "Deleted Product")
         return f"{self.quantity} x {product_name} for {self.order.order_id}"
 
 
@@ -191,3 +252,33 @@ class ShippingAddress(BaseModel):
 
     def __str__(self):
         return f"{self.full_name} - {self.city}"
+
+
+
+# -----------------------------
+# Stock Reservation
+# -----------------------------
+class StockReservation(BaseModel):
+    """
+    Stock taken off ``Product.stock_quantity`` for an order that isn't paid
+    yet. See orders.reservations.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="stock_reservations")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_reservations")
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    status = models.CharField(
+        max_length=20,
+        choices=ReservationStatus.choices(),
+        default=ReservationStatus.ACTIVE.value,
+    )
+    # None for orders that aren't waiting on an online payment (e.g. cash on delivery).
+    expires_at = models.DateTimeField(blank=True, null=True)
+    released_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x product {self.product_id} for order {self.order_id} ({self.status})"
@@ -0,0 +1,196 @@
+# orders/reservations.py
+"""
+Stock reservations for new orders.
+
+``reserve_stock`` takes stock with one conditional statement per product,
+
+    UPDATE products_product SET stock_quantity = stock_quantity - n
+    WHERE id = %s AND stock_quantity >= n
+
+so concurrent checkouts for the same SKU never oversell and never hold a row
+lock beyond that single statement. Each reservation is recorded as a
+``StockReservation`` row that ends up either
+
+- committed: the order was paid or moved on (processing, shipped, ...);
+- released: the checkout expired, the payment failed or the order was
+  cancelled, and the quantity goes back to ``stock_quantity``.
+
+Reservations of unpaid online orders expire after
+``settings.STOCK_RESERVATION_TTL_MINUTES``; ``sweep_expired_reservations``
+(Celery beat, ``manage.py release_expired_reservations``) releases them in
+batches and cancels the abandoned orders.
+
+``manage.py bench_stock_reservations`` runs hundreds of parallel checkouts
+of one SKU and checks that the stock, reservations and order items agree.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from dashboard import stock_alerts
+from orders.enums import OrderStatus, PaymentMethod, ReservationStatus
+from orders.models import Order, StockReservation
+from products.models import Product
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = ReservationStatus.ACTIVE.value
+COMMITTED = ReservationStatus.COMMITTED.value
+RELEASED = ReservationStatus.RELEASED.value
+
+DEFAULT_TTL_MINUTES = 60
+SWEEP_BATCH_SIZE = 500
+
+
+class InsufficientStock(ValueError):
+    def __init__(self, product, requested):
+        self.product = product
+        self.requested = requested
+        super().__init__(f"Insufficient stock for '{product.name}' (requested {requested}).")
+
+
+def reservation_ttl():
+    return timedelta(minutes=getattr(settings, "STOCK_RESERVATION_TTL_MINUTES", DEFAULT_TTL_MINUTES))
+
+
+def reserve_stock(order, lines, now=None):
+    """
+    Reserve ``lines`` — an iterable of ``(product, quantity)`` — for ``order``.
+    Must run inside the transaction that creates the order, so a shortage on
+    any line rolls back every earlier decrement along with the order.
+    Raises ``InsufficientStock``.
+    """
+    return reserve_orders_stock([(order, lines)], now=now)
+
+
+def reserve_orders_stock(order_lines, now=None):
+    """
+    ``reserve_stock`` for several orders created together (a cart split per
+    vendor): ``order_lines`` is ``[(order, lines), ...]``. One decrement per
+    product across all the orders and one INSERT for every reservation.
+    """
+    now = now or timezone.now()
+    per_order, totals, products = [], defaultdict(int), {}
+    for order, lines in order_lines:
+        # Cash orders are settled on delivery; nothing will come back to release them.
+        expires_at = None if order.payment_method == PaymentMethod.CASH.value else now + reservation_ttl()
+        quantities = defaultdict(int)
+        for product, quantity in lines:
+            quantities[product.pk] += quantity
+            totals[product.pk] += quantity
+            products[product.pk] = product
+        per_order.append((order, expires_at, quantities))
+
+    # Same product order in every transaction, so two multi-item carts can't deadlock.
+    for product_id in sorted(totals):
+        product, quantity = products[product_id], totals[product_id]
+        if not product.is_stock:
+            continue
+        taken = Product.objects.filter(pk=product_id, stock_quantity__gte=quantity).update(
+            stock_quantity=F("stock_quantity") - quantity
+        )
+        if not taken:
+            raise InsufficientStock(product, quantity)
+
+    reservations = [
+        StockReservation(order=order, product_id=product_id, quantity=quantity, expires_at=expires_at)
+        for order, expires_at, quantities in per_order
+        for product_id, quantity in sorted(quantities.items())
+        if products[product_id].is_stock
+    ]
+    StockReservation.objects.bulk_create(reservations)
+    if reservations:
+        reserved_ids = {reservation.product_id for reservation in reservations}
+        transaction.on_commit(lambda: stock_alerts.sync_stock_alerts(reserved_ids))
+    return reservations
+
+
+def _release(reservations, now, skip_locked=False):
+    """
+    Release the active reservations in ``reservations`` and restock their
+    products. Returns the order ids they belonged to.
+    """
+    features = connection.features
+    lock = {}
+    if skip_locked and features.has_select_for_update_skip_locked:
+        lock["skip_locked"] = True
+    if features.has_select_for_update_of:
+        # Lock the reservation rows only, not the orders joined in for filtering.
+        lock["of"] = ("self",)
+    with transaction.atomic():
+        rows = list(reservations.select_for_update(**lock).values_list("pk", "order_id", "product_id", "quantity"))
+        if not rows:
+            return set()
+        StockReservation.objects.filter(pk__in=[row[0] for row in rows], status=ACTIVE).update(
+            status=RELEASED, released_at=now
+        )
+        restock = defaultdict(int)
+        for _, _, product_id, quantity in rows:
+            restock[product_id] += quantity
+        for product_id in sorted(restock):
+            Product.objects.filter(pk=product_id).update(stock_quantity=F("stock_quantity") + restock[product_id])
+        transaction.on_commit(lambda: stock_alerts.sync_stock_alerts(restock))
+    return {row[1] for row in rows}
+
+
+def release_order_stock(order_ids, now=None):
+    """Put back whatever is still reserved for ``order_ids`` (cancelled / failed checkouts)."""
+    order_ids = list(order_ids)
+    if not order_ids:
+        return set()
+    active = StockReservation.objects.filter(order_id__in=order_ids, status=ACTIVE)
+    return _release(active, now or timezone.now())
+
+
+def commit_order_stock(order_ids):
+    """The orders went through: their reservations become permanent."""
+    order_ids = list(order_ids)
+    if not order_ids:
+        return 0
+    return StockReservation.objects.filter(order_id__in=order_ids, status=ACTIVE).update(status=COMMITTED)
+
+
+def order_status_changed(order_ids, new_status):
+    if new_status == OrderStatus.CANCELLED.value:
+        release_order_stock(order_ids)
+    elif new_status != OrderStatus.PENDING.value:
+        commit_order_stock(order_ids)
+
+
+def sweep_expired_reservations(batch_size=SWEEP_BATCH_SIZE, now=None):
+    """
+    Release reservations of still-unpaid orders whose TTL ran out and cancel
+    those orders. Works through ``batch_size`` reservations per transaction;
+    concurrent sweepers skip each other's locked rows where the database
+    supports it. Returns the number of orders cancelled.
+    """
+    now = now or timezone.now()
+    unpaid = Q(order__order_status=OrderStatus.PENDING.value, order__payment_status=OrderStatus.PENDING.value)
+    # Also picks up orders cancelled by a bulk UPDATE that skipped the status hooks.
+    releasable = unpaid | Q(order__order_status=OrderStatus.CANCELLED.value)
+    cancelled = 0
+    while True:
+        batch = StockReservation.objects.filter(
+            releasable, status=ACTIVE, expires_at__lte=now,
+        ).order_by("expires_at", "pk")[:batch_size]
+        order_ids = _release(batch, now, skip_locked=True)
+        if not order_ids:
+            break
+        # Straight UPDATE: pending -> cancelled doesn't concern the sales counters.
+        cancelled += Order.objects.filter(
+            pk__in=order_ids,
+            order_status=OrderStatus.PENDING.value,
+            payment_status=OrderStatus.PENDING.value,
+        ).update(order_status=OrderStatus.CANCELLED.value, payment_status=OrderStatus.CANCELLED.value)
+
+    # Orders that moved on without passing through a status hook.
+    StockReservation.objects.filter(status=ACTIVE, expires_at__lte=now).exclude(releasable).update(status=COMMITTED)
+
+    if cancelled:
+        logger.info("Released stock for %s expired checkouts", cancelled)
+    return cancelled
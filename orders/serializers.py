@@ -6,6 +6,7 @@ from products.serializers import ProductSerializer
 from .models import Order, OrderItem, ShippingAddress, CartItem
 from orders.enums import DeliveryType
 from products.enums import ProductStatus
+from common.fieldsets import SparseFieldsetMixin
 
 # -------- Shipping Address Serializers --------
 class ShippingAddressInlineSerializer(serializers.ModelSerializer):
@@ -66,12 +67,26 @@ class ShippingAddressAttachSerializer(ShippingAddressInlineSerializer):
 
 
 # -------- Order Items --------
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     
     class Meta:
         model = OrderItem
         fields = ["id", "product", "quantity", "price"]
+        related_fields = {"product": ("select", "product")}
+
+
+class OrderItemSnapshotSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """The item as sold, from its own columns; ``product`` is just the id."""
+    sku = serializers.CharField(source="product_sku", read_only=True)
+    thumbnail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = OrderItem
+        fields = ["id", "product", "product_name", "sku", "thumbnail", "quantity", "price", "status"]
+
+    def get_thumbnail(self, obj):
+        return obj.product_thumbnail or None
 
 
 
@@ -214,13 +229,57 @@ class OrderSerializer(serializers.ModelSerializer):
             )
 
 
+class OrderReadSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Order list/detail: item snapshots instead of full products, with customer,
+    vendor and address joined and the items prefetched (Meta.related_fields).
+    """
+    items = OrderItemSnapshotSerializer(many=True, read_only=True)
+    selected_shipping_address = ShippingAddressInlineSerializer(read_only=True)
+    order_status_display = serializers.CharField(source="get_order_status_display", read_only=True)
+    payment_status_display = serializers.CharField(source="get_payment_status_display", read_only=True)
+    delivery_type_display = serializers.CharField(source="get_delivery_type_display", read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            "id", "order_id",
+            "customer", "vendor",
+            "subtotal", "discount_amount", "promo_code",
+            "tax_amount", "delivery_fee", "total_amount",
+            "delivery_type", "delivery_type_display",
+            "delivery_instructions", "estimated_delivery", "delivery_date",
+            "selected_shipping_address",
+            "payment_method", "payment_status", "payment_status_display",
+            "order_status", "order_status_display",
+            "order_date", "item_count", "notes",
+            "items",
+            "created_at", "updated_at",
+        ]
+        read_only_fields = fields
+        related_fields = {
+            "customer": ("select", "customer"),
+            "vendor": ("select", "vendor"),
+            "selected_shipping_address": ("select", "selected_shipping_address"),
+            "items": ("prefetch", "items"),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        from users.serializers import UserSerializer
+        # Only where ?fields= kept them.
+        for name in ("customer", "vendor"):
+            if name in self.fields:
+                self.fields[name] = UserSerializer(read_only=True)
+
+
 
 
 
 
 
 # -------- Cart --------
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     product_id = serializers.PrimaryKeyRelatedField(
         queryset=Product.objects.filter(status=ProductStatus.APPROVED.value, is_active=True),
@@ -232,12 +291,13 @@ class CartItemSerializer(serializers.ModelSerializer):
         model = CartItem
         fields = ["id", "product", "product_id", "quantity", "price_snapshot"]
         read_only_fields = ["id", "price_snapshot"]
+        related_fields = {"product": ("select", "product")}
 
     def create(self, validated_data):
         user = self.context["request"].user
         product = validated_data["product"]
         quantity = validated_data.get("quantity", 1)
-        price_snapshot = product.price1
+        price_snapshot = product.effective_price
         cart_item, created = CartItem.objects.update_or_create(
             user=user, product=product,
             defaults={"quantity": quantity, "price_snapshot": price_snapshot}
@@ -251,13 +311,17 @@ class CartItemSerializer(serializers.ModelSerializer):
 
 
 # -------- Receipt Serializers --------
-class ReceiptOrderItemSerializer(serializers.ModelSerializer):
+class ReceiptOrderItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     product_name = serializers.CharField(source="product.name", read_only=True)
     price = serializers.DecimalField(source="product.price1", max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
         model = OrderItem
         fields = ["product_name", "quantity", "price"]
+        related_fields = {
+            "product_name": ("select", "product"),
+            "price": ("select", "product"),
+        }
 
 
 class OrderReceiptSerializer(serializers.ModelSerializer):
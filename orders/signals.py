@@ -0,0 +1,57 @@
+# orders/signals.py
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import receiver
+
+from orders import reservations
+from orders.models import Order, OrderItem
+from products import sales
+
+
+# ---------------------------
+# Product sales counters
+# ---------------------------
+@receiver(pre_save, sender=Order)
+def remember_previous_order_status(sender, instance, raw=False, **kwargs):
+    instance._previous_order_status = None
+    if not raw and instance.pk:
+        instance._previous_order_status = (
+            Order.objects.filter(pk=instance.pk).values_list("order_status", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Order)
+def update_sales_on_order_status(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sales.order_status_changed(
+        instance.pk, getattr(instance, "_previous_order_status", None), instance.order_status
+    )
+
+
+# ---------------------------
+# Stock reservations
+# ---------------------------
+@receiver(post_save, sender=Order)
+def settle_reservations_on_order_status(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    if getattr(instance, "_previous_order_status", None) != instance.order_status:
+        reservations.order_status_changed([instance.pk], instance.order_status)
+
+
+@receiver(pre_save, sender=OrderItem)
+def remember_previous_item_status(sender, instance, raw=False, **kwargs):
+    instance._previous_status = None
+    if not raw and instance.pk:
+        instance._previous_status = (
+            OrderItem.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=OrderItem)
+def update_sales_on_item_status(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sales.order_item_status_changed(
+        instance, getattr(instance, "_previous_status", None), instance.status
+    )
@@ -0,0 +1,10 @@
+# orders/tasks.py
+from celery import shared_task
+
+from orders import reservations
+
+
+@shared_task
+def release_expired_reservations():
+    """Beat: give back stock held by checkouts that were never paid."""
+    return reservations.sweep_expired_reservations()
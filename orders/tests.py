@@ -1,3 +1,321 @@
+"""
+Query-plan regression tests for the hot order / payment / notification /
+chat / product filters: each query is run through EXPLAIN and must reach
+its table through an index, never a full table scan.
+
+On PostgreSQL sequential scans are disabled for the EXPLAIN (small test
+tables would otherwise always be scanned), so a ``Seq Scan`` in the plan
+means no usable index exists.
+
+Order view tests: manual creation saves the order, and order list / detail
+stay under a fixed number of queries whatever the items and vendors.
+
+Stock reservations: checkout takes stock or fails whole, and cancellation,
+a failed payment or an expired checkout put it back.
+
+Exports: CSV, NDJSON and zstd streams of orders and order items, limited to
+what the caller may list.
+"""
+import csv
+import io
+import json
+import re
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection, transaction
+from django.db.models import Q
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.test import APIClient
+from django.utils import timezone
+import zstandard
+
+from chatapp.models import Message
+from notification.models import Notification
+from orders.enums import OrderStatus, ReservationStatus
+from orders.models import Order, OrderItem, StockReservation
+from orders.reservations import InsufficientStock, sweep_expired_reservations
+from orders.utils import create_order_for_single_product
+from orders.views import OrderViewSet
+from payments.enums import PaymentStatusEnum
+from payments.webhooks import handle_payment_failed
+from payments.models import Payment
+from products.models import Product
+from users.models import User
+
+
+def explain(queryset):
+    if connection.vendor == "postgresql":
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
+    return queryset.explain()
+
+
+class HotQueryPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create(email="vendor@example.com", role="vendor")
+        cls.customer = User.objects.create(email="customer@example.com", role="customer")
+        cls.since = timezone.now() - timedelta(days=30)
+
+    def assertNoFullScan(self, queryset, *tables):
+        plan = explain(queryset)
+        for table in tables:
+            if connection.vendor == "postgresql":
+                full_scan = re.search(rf"Seq Scan on {table}\b", plan)
+            else:
+                # "SCAN t" is a table scan; "SCAN t USING [COVERING] INDEX i" walks an index.
+                full_scan = re.search(rf"\bSCAN {table}\b(?! USING)", plan)
+            self.assertIsNone(full_scan, f"Full scan of {table}:\n{plan}")
+
+    # ---------------------------
+    # Orders
+    # ---------------------------
+    def test_vendor_orders_by_status_and_date(self):
+        qs = Order.objects.filter(
+            vendor=self.vendor, order_status=OrderStatus.DELIVERED.value, created_at__gte=self.since
+        )
+        self.assertNoFullScan(qs, "orders_order")
+
+    def test_customer_order_history(self):
+        qs = Order.objects.filter(customer=self.customer).order_by("-order_date")[:20]
+        self.assertNoFullScan(qs, "orders_order")
+
+    def test_vendor_orders_through_items(self):
+        qs = Order.for_vendor(self.vendor)
+        self.assertNoFullScan(qs, "orders_order", "orders_orderitem")
+
+    # ---------------------------
+    # Payments
+    # ---------------------------
+    def test_vendor_payments_by_status_and_date(self):
+        qs = Payment.objects.filter(
+            vendor=self.vendor, status=PaymentStatusEnum.COMPLETED.value, created_at__gte=self.since
+        )
+        self.assertNoFullScan(qs, "payments_payment")
+
+    def test_payments_by_status_and_date(self):
+        qs = Payment.objects.filter(status=PaymentStatusEnum.COMPLETED.value, created_at__gte=self.since)
+        self.assertNoFullScan(qs, "payments_payment")
+
+    def test_customer_last_payment(self):
+        qs = Payment.objects.filter(customer=self.customer).order_by("-created_at")[:1]
+        self.assertNoFullScan(qs, "payments_payment")
+
+    # ---------------------------
+    # Notifications / chat
+    # ---------------------------
+    def test_unseen_notifications(self):
+        qs = Notification.objects.filter(user=self.customer, seen=False).order_by("-event_time")
+        self.assertNoFullScan(qs, "notification_notification")
+
+    def test_conversation_messages(self):
+        qs = Message.objects.filter(
+            Q(sender=self.customer, receiver=self.vendor) | Q(sender=self.vendor, receiver=self.customer),
+            is_deleted=False,
+        ).order_by("timestamp")
+        self.assertNoFullScan(qs, "chatapp_message")
+
+    # ---------------------------
+    # Products
+    # ---------------------------
+    def test_product_by_sku(self):
+        self.assertNoFullScan(Product.objects.filter(sku="SKU-1"), "products_product")
+
+    def test_vendor_products_newest_first(self):
+        qs = Product.objects.filter(vendor=self.vendor).order_by("-created_at")[:20]
+        self.assertNoFullScan(qs, "products_product")
+
+
+
+class OrderCreateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create(email="vendor@example.com", role="vendor")
+        cls.customer = User.objects.create(email="customer@example.com", role="customer")
+
+    def perform_create(self, user):
+        view = OrderViewSet(request=mock.Mock(user=user))
+        serializer = mock.Mock()
+        view.perform_create(serializer)
+        return serializer
+
+    def test_vendor_create_saves_a_pending_order(self):
+        serializer = self.perform_create(self.vendor)
+        serializer.save.assert_called_once_with(vendor=self.vendor, order_status=OrderStatus.PENDING.value)
+
+    def test_customer_cannot_create(self):
+        with self.assertRaises(PermissionDenied):
+            self.perform_create(self.customer)
+
+
+
+class OrderReadQueryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create(email="customer@example.com", role="customer")
+        vendors = [User.objects.create(email=f"vendor{v}@example.com", role="vendor") for v in range(3)]
+        products = [
+            Product.objects.create(
+                vendor=vendor, name=f"Product {v}-{p}", slug=f"product-{v}-{p}", price1=Decimal("10.00"),
+            )
+            for v, vendor in enumerate(vendors) for p in range(2)
+        ]
+        for i in range(20):
+            order = Order.objects.create(customer=cls.customer, vendor=products[i % 6].vendor)
+            for product in (products[i % 6], products[(i + 1) % 6], products[(i + 3) % 6]):
+                OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price1)
+        cls.order = order
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_list_query_count(self):
+        response, queries = self.get("/api/orders/?page_size=20")
+
+        data = response.data.get("results", response.data)
+        self.assertEqual(len(data), 20)
+        self.assertEqual({len(order["items"]) for order in data}, {3})
+        self.assertLess(queries, 10)
+
+    def test_retrieve_query_count(self):
+        response, queries = self.get(f"/api/orders/{self.order.pk}/")
+
+        self.assertEqual(len(response.data["items"]), 3)
+        self.assertLess(queries, 10)
+
+
+class StockReservationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create(email="vendor@example.com", role="vendor")
+        cls.customer = User.objects.create(email="customer@example.com", role="customer")
+        cls.product = Product.objects.create(
+            vendor=cls.vendor, name="Chair", slug="chair", price1=Decimal("10.00"), is_stock=True, stock_quantity=5,
+        )
+
+    def checkout(self, quantity):
+        return create_order_for_single_product(self.product, self.customer, quantity=quantity)
+
+    def assertStock(self, quantity):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, quantity)
+
+    def test_checkout_reserves_stock(self):
+        order = self.checkout(3)
+
+        self.assertStock(2)
+        reservation = StockReservation.objects.get(order=order)
+        self.assertEqual(reservation.quantity, 3)
+        self.assertEqual(reservation.status, ReservationStatus.ACTIVE.value)
+        self.assertIsNotNone(reservation.expires_at)
+
+    def test_insufficient_stock_rolls_back_the_order(self):
+        with self.assertRaises(InsufficientStock):
+            self.checkout(6)
+
+        self.assertStock(5)
+        self.assertFalse(Order.objects.exists())
+
+    def test_cancelling_releases_stock(self):
+        order = self.checkout(2)
+        order.order_status = OrderStatus.CANCELLED.value
+        order.save()
+
+        self.assertStock(5)
+        self.assertEqual(StockReservation.objects.get(order=order).status, ReservationStatus.RELEASED.value)
+
+    def test_failed_payment_webhook_releases_stock(self):
+        order = self.checkout(2)
+        with transaction.atomic():
+            handle_payment_failed({"metadata": {"order_id": order.order_id}})
+
+        self.assertStock(5)
+        order.refresh_from_db()
+        self.assertEqual(order.order_status, OrderStatus.CANCELLED.value)
+
+    def test_sweep_releases_expired_checkouts_only(self):
+        abandoned = self.checkout(2)
+        paid = self.checkout(1)
+        paid.payment_status = OrderStatus.PAID.value
+        paid.order_status = OrderStatus.PROCESSING.value
+        paid.save()
+
+        self.assertEqual(sweep_expired_reservations(now=timezone.now() + timedelta(minutes=30)), 0)
+        self.assertStock(2)
+
+        cancelled = sweep_expired_reservations(now=timezone.now() + timedelta(days=1))
+
+        self.assertEqual(cancelled, 1)
+        self.assertStock(4)
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.order_status, OrderStatus.CANCELLED.value)
+        self.assertEqual(StockReservation.objects.get(order=paid).status, ReservationStatus.COMMITTED.value)
+
+
+class OrderExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(email="admin@example.com", role="admin")
+        cls.customer = User.objects.create(email="customer@example.com", role="customer")
+        cls.vendors = [User.objects.create(email=f"vendor{v}@example.com", role="vendor") for v in range(2)]
+        for v, vendor in enumerate(cls.vendors):
+            product = Product.objects.create(
+                vendor=vendor, name=f"Product {v}", slug=f"product-{v}", price1=Decimal("10.00"),
+            )
+            order = Order.objects.create(customer=cls.customer, vendor=vendor)
+            OrderItem.objects.create(order=order, product=product, quantity=v + 1, price=product.price1)
+
+    def export(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(url)
+        body = b"".join(response.streaming_content) if response.streaming else None
+        return response, body
+
+    def test_csv_has_a_header_and_a_row_per_order(self):
+        response, body = self.export(self.admin, "/api/orders/export/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Content-Disposition"], r'filename="orders-\d+\.csv"')
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[0][:2], ["order_id", "order_date"])
+        self.assertEqual(len(rows), 3)
+
+    def test_ndjson_is_scoped_to_the_vendor(self):
+        vendor = self.vendors[0]
+        for url in ("/api/orders/export/?file_format=ndjson", "/api/orders/export-items/?file_format=ndjson"):
+            response, body = self.export(vendor, url)
+
+            self.assertEqual(response["Content-Type"], "application/x-ndjson")
+            rows = [json.loads(line) for line in body.decode().splitlines()]
+            self.assertEqual([row["vendor_id"] for row in rows], [vendor.pk])
+
+    def test_zstd_wraps_the_same_stream(self):
+        _, plain = self.export(self.admin, "/api/orders/export-items/")
+        response, compressed = self.export(self.admin, "/api/orders/export-items/?compress=zstd")
+
+        self.assertEqual(response["Content-Type"], "application/zstd")
+        self.assertTrue(response["Content-Disposition"].endswith('.csv.zst"'))
+        self.assertEqual(zstandard.ZstdDecompressor().decompressobj().decompress(compressed), plain)
 
-# Create your tests here.
+    def test_customers_and_bad_parameters_are_refused(self):
+        self.assertEqual(self.export(self.customer, "/api/orders/export/")[0].status_code, 403)
+        for url in ("/api/orders/export/?file_format=xlsx", "/api/orders/export/?compress=gzip"):
+            self.assertEqual(self.export(self.admin, url)[0].status_code, 400)
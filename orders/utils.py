@@ -1,9 +1,12 @@
 # orders/utils.py
 import logging
-from decimal import Decimal
+from collections import defaultdict
+from decimal import Decimal, ROUND_DOWN
 from django.db import transaction
 from orders.models import Order, OrderItem, CartItem
 from orders.enums import OrderStatus, DeliveryType
+from orders.reservations import reserve_orders_stock, reserve_stock
+from dashboard import rollups
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +18,21 @@ def _to_decimal(val, default="0.00"):
     except Exception:
         return Decimal(default)
 
+def _split_discount(discount, subtotals):
+    """
+    Share a cart-level discount between the vendor orders in proportion to
+    their subtotals; the rounding remainder goes to the last order.
+    """
+    total = sum(subtotals, Decimal("0.00"))
+    if not discount or not total:
+        return [Decimal("0.00")] * len(subtotals)
+    shares = [
+        (discount * subtotal / total).quantize(Decimal("0.01"), rounding=ROUND_DOWN)
+        for subtotal in subtotals[:-1]
+    ]
+    return shares + [discount - sum(shares, Decimal("0.00"))]
+
+
 def create_order_from_cart(
     user,
     delivery_type=DeliveryType.STANDARD.value,
@@ -25,57 +43,82 @@ def create_order_from_cart(
     delivery_date=None,
     payment_method=None,
     notes=None,
+    shipping_address=None,
 ):
     """
-    Create an order from user's cart.
+    Create one order per vendor from the user's cart and return them.
+    Orders, items and stock reservations are written with ``bulk_create`` in
+    one transaction; totals are computed from the cart rows already loaded.
+    ``bulk_create`` sends no post_save, which is fine for new pending orders
+    (see orders.signals); only the daily sales rollup is told about them. ``discount`` is shared out by subtotal.
     NOTE: No ShippingAddress is created here. It can be added later via API.
+    Stock is reserved in the same transaction; raises InsufficientStock (a ValueError).
     """
-    cart_qs = (
+    cart_items = list(
         CartItem.objects
         .filter(user=user, saved_for_later=False)
-        .select_related("product", "product__vendor")
+        .select_related("product")
+        .order_by("pk")
     )
-    if not cart_qs.exists():
+    if not cart_items:
         raise ValueError("Cart is empty")
 
-    # Assuming single-vendor cart; otherwise you should split per-vendor
-    vendor = {ci.product.vendor for ci in cart_qs}.pop()
+    by_vendor = defaultdict(list)
+    for ci in cart_items:
+        by_vendor[ci.product.vendor_id].append(ci)
+    vendor_ids = sorted(by_vendor)
 
-    with transaction.atomic():
-        order = Order.objects.create(
+    # promotion already applied, see products.pricing
+    subtotals = [
+        sum((ci.product.effective_price * ci.quantity for ci in by_vendor[vendor_id]), Decimal("0.00"))
+        for vendor_id in vendor_ids
+    ]
+    discounts = _split_discount(_to_decimal(discount), subtotals)
+
+    orders = []
+    for vendor_id, discount_share in zip(vendor_ids, discounts):
+        order = Order(
+            order_id=Order.new_order_id(),
             customer=user,
-            vendor=vendor,
+            vendor_id=vendor_id,
+            selected_shipping_address=shipping_address,
             delivery_type=delivery_type,
             promo_code=promo_code,
-            discount_amount=_to_decimal(discount),
+            discount_amount=discount_share,
             delivery_instructions=delivery_instruction or "",
             estimated_delivery=estimated_delivery,  # can be date/datetime per model
             delivery_date=delivery_date,
             payment_method=payment_method or "",
             notes=notes or "",
-            subtotal=Decimal("0.00"),
-            total_amount=Decimal("0.00"),
             order_status=OrderStatus.PENDING.value,
             payment_status=OrderStatus.PENDING.value,
         )
+        order.compute_totals((ci.product.effective_price, ci.quantity) for ci in by_vendor[vendor_id])
+        orders.append(order)
 
-        # Add items
-        for ci in cart_qs:
-            OrderItem.objects.create(
-                order=order,
-                product=ci.product,
-                quantity=ci.quantity,
-                price=ci.price_snapshot,
-            )
+    with transaction.atomic():
+        Order.objects.bulk_create(orders)
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order, product=ci.product, quantity=ci.quantity, price=ci.product.effective_price,
+            ).copy_product(ci.product)
+            for order, vendor_id in zip(orders, vendor_ids)
+            for ci in by_vendor[vendor_id]
+        ])
+        reserve_orders_stock([
+            (order, [(ci.product, ci.quantity) for ci in by_vendor[vendor_id]])
+            for order, vendor_id in zip(orders, vendor_ids)
+        ])
 
-        # Compute totals (your model should implement this)
-        order.update_totals()
+        rollups.schedule_refresh(rollups.cells_for((order.vendor_id, order.created_at) for order in orders))
 
         # Clear cart
-        cart_qs.delete()
+        CartItem.objects.filter(pk__in=[ci.pk for ci in cart_items]).delete()
 
-    logger.info(f"Order {order.order_id} created from cart for user {user.id}")
-    return order
+    logger.info(
+        f"Orders {', '.join(order.order_id for order in orders)} created from cart for user {user.id}"
+    )
+    return orders
 
 
 def create_order_for_single_product(
@@ -91,11 +134,12 @@ def create_order_for_single_product(
 ):
     """
     Create an order for a single product (no shipping created here).
+    Stock is reserved in the same transaction; raises InsufficientStock (a ValueError).
     """
     with transaction.atomic():
-        order = Order.objects.create(
+        order = Order(
             customer=user,
-            vendor=product.vendor,
+            vendor_id=product.vendor_id,
             delivery_type=delivery_type,
             promo_code=promo_code,
             discount_amount=_to_decimal(discount),
@@ -107,15 +151,17 @@ def create_order_for_single_product(
             order_status=OrderStatus.PENDING.value,
             payment_status=OrderStatus.PENDING.value,
         )
+        order.compute_totals([(product.effective_price, quantity)])
+        order.save()
 
-        OrderItem.objects.create(
+        OrderItem(
             order=order,
             product=product,
             quantity=quantity,
-            price=getattr(product, "price1", product.price),
-        )
+            price=product.effective_price,
+        ).copy_product(product).save()
 
-        order.update_totals()
+        reserve_stock(order, [(product, quantity)])
 
     logger.info(f"Order {order.order_id} created for single product {product.id} by user {user.id}")
     return order
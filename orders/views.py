@@ -1,6 +1,7 @@
 # orders/views.py
 import logging
 from django.utils import timezone
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, generics, permissions, status
 from rest_framework.decorators import action
@@ -9,6 +10,7 @@ from rest_framework.exceptions import PermissionDenied, NotFound
 from orders.models import Order, CartItem, OrderItem
 from orders.serializers import (
     OrderSerializer,
+    OrderReadSerializer,
     CartItemSerializer,
     OrderReceiptSerializer,
     ShippingAddressSerializer, 
@@ -21,6 +23,12 @@ from users.enums import UserRole
 from orders.models import ShippingAddress
 from rest_framework.permissions import IsAuthenticated
 from products.permissions import IsVendorOrAdmin
+from common.fieldsets import SparseFieldsetViewMixin, build_query_plan
+from django.db.models import Prefetch, prefetch_related_objects
+from products import sales
+from orders import reservations
+from dashboard import rollups
+from common.exports import ExportMixin, ensure_can_export, parse_export_params, stream_export
 
 
 logger = logging.getLogger(__name__)
@@ -46,7 +54,7 @@ class IsVendorOrAdminOrCustomer(permissions.BasePermission):
             return True
 
         if role == UserRole.VENDOR.value:
-            if view.action in ["list", "retrieve", "update", "partial_update", "destroy"]:
+            if view.action in ["list", "retrieve", "update", "partial_update", "destroy", "export", "export_items"]:
                 return True
 
         if role == UserRole.CUSTOMER.value:
@@ -64,7 +72,8 @@ class IsVendorOrAdminOrCustomer(permissions.BasePermission):
             return True
 
         if role == UserRole.VENDOR.value:
-            return obj.items.filter(product__vendor=request.user).exists()
+            # Orders are per vendor since checkout splits carts; older mixed orders need the items.
+            return obj.vendor_id == request.user.id or obj.items.filter(vendor=request.user).exists()
 
         if role == UserRole.CUSTOMER.value:
             return obj.customer == request.user
@@ -78,9 +87,47 @@ class IsVendorOrAdminOrCustomer(permissions.BasePermission):
 
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(SparseFieldsetViewMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = OrderSerializer
+    read_serializer_class = OrderReadSerializer
+    read_actions = ("list", "retrieve")
     permission_classes = [IsVendorOrAdminOrCustomer]
+    export_filename = "orders"
+    export_fields = {
+        "order_id": "order_id",
+        "order_date": "order_date",
+        "customer_id": "customer_id",
+        "customer_email": "customer__email",
+        "vendor_id": "vendor_id",
+        "order_status": "order_status",
+        "payment_status": "payment_status",
+        "payment_method": "payment_method",
+        "delivery_type": "delivery_type",
+        "item_count": "item_count",
+        "subtotal": "subtotal",
+        "discount_amount": "discount_amount",
+        "delivery_fee": "delivery_fee",
+        "tax_amount": "tax_amount",
+        "total_amount": "total_amount",
+        "delivery_date": "delivery_date",
+    }
+    export_item_fields = {
+        "order_id": "order__order_id",
+        "order_date": "order__order_date",
+        "item_id": "id",
+        "product_id": "product_id",
+        "product_name": "product__name",
+        "sku": "product__sku",
+        "vendor_id": "vendor_id",
+        "quantity": "quantity",
+        "price": "price",
+        "status": "status",
+    }
+
+    def get_serializer_class(self):
+        if self.action in self.read_actions:
+            return self.read_serializer_class
+        return self.serializer_class
 
     def get_queryset(self):
         user = self.request.user
@@ -89,7 +136,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         if role == UserRole.ADMIN.value or getattr(user, 'is_staff', False):
             queryset = Order.objects.all()
         elif role == UserRole.VENDOR.value:
-            queryset = Order.objects.filter(items__product__vendor=user).distinct()
+            queryset = Order.for_vendor(user)
         elif role == UserRole.CUSTOMER.value:
             queryset = Order.objects.filter(customer=user)
         else:
@@ -114,6 +161,24 @@ class OrderViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("Only vendors can manually create orders.")
         serializer.save(vendor=self.request.user, order_status=OrderStatus.PENDING.value)
 
+    @action(detail=False, methods=["get"], url_path="export-items")
+    def export_items(self, request):
+        """One row per order item for the orders the list endpoint would return."""
+        ensure_can_export(request.user)
+        file_format, compress = parse_export_params(request)
+
+        items = OrderItem.objects.filter(order__in=self.get_export_queryset().values("pk"))
+        if getattr(request.user, "role", None) == UserRole.VENDOR.value:
+            items = items.filter(vendor=request.user)
+        return stream_export(
+            items.order_by("-order__order_date", "pk"),
+            self.export_item_fields,
+            "order-items",
+            file_format=file_format,
+            compress=compress,
+            chunk_size=self.export_chunk_size,
+        )
+
 
     # ---------- Cart Order ----------
     @action(detail=False, methods=["post"], url_path="create-from-cart")
@@ -123,6 +188,11 @@ class OrderViewSet(viewsets.ModelViewSet):
             return Response({"error": "Invalid delivery type"}, status=status.HTTP_400_BAD_REQUEST)
         print("check user role:", getattr(request.user, "role", None))
 
+        address = None
+        addr_id = request.data.get("selected_shipping_address_id")
+        if addr_id:
+            address = get_object_or_404(ShippingAddress, id=addr_id, user=request.user)
+
         try:
             orders = create_order_from_cart(
                 user=request.user,
@@ -134,23 +204,18 @@ class OrderViewSet(viewsets.ModelViewSet):
                 delivery_date=request.data.get("delivery_date"),
                 payment_method=request.data.get("payment_method"),
                 notes=request.data.get("notes"),
+                shipping_address=address,
             )
-            if not isinstance(orders, list):
-                orders = [orders]
-
-            addr_id = request.data.get("selected_shipping_address_id")
-            if addr_id:
-                address = get_object_or_404(ShippingAddress, id=addr_id, user=request.user)
-                for order in orders:
-                    order.selected_shipping_address = address
-                    order.save(update_fields=["selected_shipping_address"])
 
+            # Load every order's items for the response in one go rather than per order.
+            serializer = OrderSerializer(orders, many=True, context={"request": request})
+            select, prefetch = build_query_plan(serializer.child.fields["items"].child)
+            prefetch_related_objects(orders, "vendor", Prefetch(
+                "items", queryset=OrderItem.objects.select_related(*select).prefetch_related(*prefetch)
+            ))
 
 
-            return Response(
-                OrderSerializer(orders, many=True, context={"request": request}).data,
-                status=status.HTTP_201_CREATED
-            )
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -188,7 +253,7 @@ class OrderViewSet(viewsets.ModelViewSet):
             return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
 
         # Assign price explicitly
-        product_price = product.price1  # <-- Use price1 here
+        product_price = product.effective_price  # promotion already applied
 
         # Create order
         try:
@@ -255,14 +320,14 @@ class ShippingAddressViewSet(viewsets.ModelViewSet):
 
 
 # -------- Cart ViewSet --------
-class CartViewSet(viewsets.ModelViewSet):
+class CartViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = CartItemSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False) or not self.request.user.is_authenticated:
             return CartItem.objects.none()
-        return CartItem.objects.filter(user=self.request.user).select_related("product")
+        return CartItem.objects.filter(user=self.request.user)
 
     def create(self, request, *args, **kwargs):
         from products.models import Product
@@ -281,7 +346,7 @@ class CartViewSet(viewsets.ModelViewSet):
         cart_item, created = CartItem.objects.update_or_create(
             user=request.user,
             product_id=product_id,
-            defaults={"quantity": quantity, "price_snapshot": Product.objects.get(pk=product_id).price1},
+            defaults={"quantity": quantity, "price_snapshot": Product.objects.get(pk=product_id).effective_price},
         )
         return Response(self.get_serializer(cart_item).data,
                         status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
@@ -330,7 +395,7 @@ class OrderReceiptView(generics.RetrieveAPIView):
 
 
 
-class OrderItemViewSet(viewsets.ModelViewSet):
+class OrderItemViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = OrderItemSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -342,7 +407,7 @@ class OrderItemViewSet(viewsets.ModelViewSet):
         if getattr(user, "role", None) == UserRole.ADMIN.value:
             return queryset
         if getattr(user, "role", None) == UserRole.VENDOR.value:
-            return queryset.filter(product__vendor=user)
+            return queryset.filter(vendor=user)
         if getattr(user, "role", None) == UserRole.CUSTOMER.value:
             return queryset.filter(order__customer=user)
 
@@ -354,6 +419,20 @@ class OrderItemViewSet(viewsets.ModelViewSet):
 
 
 
+def _update_order_status(orders, new_status):
+    # QuerySet.update() skips the post_save hooks, so feed the sales counters,
+    # stock reservations and the dashboard rollup by hand.
+    with transaction.atomic():
+        previous = dict(orders.select_for_update().values_list("id", "order_status"))
+        updated_count = orders.update(order_status=new_status)
+        sales.orders_status_changed(previous, new_status)
+        reservations.order_status_changed(
+            [pk for pk, old_status in previous.items() if old_status != new_status], new_status
+        )
+        rollups.orders_changed(previous)
+    return updated_count
+
+
 class BulkOrdersStatusUpdateViewSet(viewsets.ViewSet):
     permission_classes = [IsVendorOrAdmin]
     http_method_names = ["get", "post"]
@@ -380,10 +459,8 @@ class BulkOrdersStatusUpdateViewSet(viewsets.ViewSet):
 
         orders = Order.objects.filter(id__in=order_ids)
 
-        field_name = "order_status" 
-
         if getattr(user, "role", None) == UserRole.ADMIN.value:
-            updated_count = orders.update(**{field_name: new_status})
+            updated_count = _update_order_status(orders, new_status)
             return Response(
                 {"detail": f"Admin updated status of {updated_count} orders to '{new_status}'."},
                 status=status.HTTP_200_OK,
@@ -391,7 +468,7 @@ class BulkOrdersStatusUpdateViewSet(viewsets.ViewSet):
 
         elif getattr(user, "role", None) == UserRole.VENDOR.value:
             vendor_orders = orders.filter(vendor=user)
-            updated_count = vendor_orders.update(**{field_name: new_status})
+            updated_count = _update_order_status(vendor_orders, new_status)
             return Response(
                 {"detail": f"Vendor updated status of {updated_count} orders to '{new_status}'."},
                 status=status.HTTP_200_OK,
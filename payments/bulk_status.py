@@ -0,0 +1,156 @@
+# payments/bulk_status.py
+"""
+Bulk payment status updates for ``POST /api/payments/bulk-status/``.
+
+``apply_updates`` validates every entry against PaymentStatusEnum, then works
+in chunks of CHUNK_SIZE payments: one query loads the ids that exist and one
+UPDATE per target status writes them. A 10k-entry reconciliation is a few
+dozen queries instead of 20k. Results come back in request order, in the
+endpoint's ``{"payment_id", "status"[, "reason"]}`` shape; when an id is
+listed twice the last entry wins. The days the payments were created on are
+refreshed in the dashboard rollup (dashboard.rollups) once they commit.
+
+A synchronous request runs in one transaction. ``"async": true`` stores the
+batch as a PaymentStatusJob and returns at once; ``run_job`` (Celery,
+payments.tasks) commits chunk by chunk and records progress on the job,
+which ``GET /api/payments/bulk-status/jobs/<id>/`` reports.
+"""
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from dashboard import rollups
+from payments.enums import PaymentJobStatus, PaymentStatusEnum
+from payments.models import Payment, PaymentStatusJob
+
+logger = logging.getLogger(__name__)
+
+VALID_STATUSES = {tag.value for tag in PaymentStatusEnum}
+# Keeps each IN (...) under SQLite's bound-parameter limit.
+CHUNK_SIZE = 500
+# Bigger batches must use the async mode.
+MAX_SYNC_UPDATES = 20000
+
+
+def _failed(payment_id, reason):
+    return {"payment_id": payment_id, "status": "failed", "reason": reason}
+
+
+def validate_updates(updates, results):
+    """
+    Fill ``results`` for entries that can't be applied; return the rest as
+    (index, payment_id as given, pk, new status).
+    """
+    valid = []
+    for i, update in enumerate(updates):
+        payment_id = update.get("payment_id") if isinstance(update, dict) else None
+        new_status = update.get("status") if isinstance(update, dict) else None
+        if not payment_id or not new_status:
+            results[i] = _failed(payment_id, "Missing fields")
+        elif new_status not in VALID_STATUSES:
+            results[i] = _failed(payment_id, "Invalid status")
+        else:
+            try:
+                valid.append((i, payment_id, int(payment_id), new_status))
+            except (TypeError, ValueError):
+                results[i] = _failed(payment_id, "Invalid payment_id")
+    return valid
+
+
+def _apply_chunk(chunk, results, now):
+    existing = {
+        pk: (vendor_id, created_at)
+        for pk, vendor_id, created_at in Payment.objects.filter(
+            pk__in={pk for _, _, pk, _ in chunk}
+        ).order_by().values_list("pk", "vendor_id", "created_at")
+    }
+    final = {}
+    for i, payment_id, pk, new_status in chunk:
+        if pk in existing:
+            final[pk] = new_status
+            results[i] = {"payment_id": payment_id, "status": "success"}
+        else:
+            results[i] = _failed(payment_id, "Payment not found")
+
+    by_status = defaultdict(list)
+    for pk, new_status in final.items():
+        by_status[new_status].append(pk)
+    for new_status, pks in by_status.items():
+        Payment.objects.filter(pk__in=pks).update(status=new_status, updated_at=now)
+    rollups.payments_changed(existing[pk] for pk in final)
+
+
+def apply_updates(updates, chunk_size=CHUNK_SIZE, on_progress=None):
+    """
+    Apply ``updates`` ([{"payment_id", "status"}, ...]) and return the
+    per-entry results. Each chunk is atomic; wrap the call in a transaction
+    to make the whole batch atomic. ``on_progress(done, results)`` runs after
+    every chunk.
+    """
+    results = [None] * len(updates)
+    valid = validate_updates(updates, results)
+    now = timezone.now()
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        # No savepoint when the caller already holds a transaction for the whole batch.
+        with transaction.atomic(savepoint=False):
+            _apply_chunk(chunk, results, now)
+        if on_progress:
+            on_progress(len(updates) - len(valid) + start + len(chunk), results)
+    return results
+
+
+def summarize(results):
+    succeeded = sum(1 for result in results if result and result["status"] == "success")
+    return succeeded, sum(1 for result in results if result) - succeeded
+
+
+# ---------------------------
+# Async jobs
+# ---------------------------
+def start_job(updates, user):
+    """Store the batch and queue it once committed."""
+    job = PaymentStatusJob.objects.create(requested_by=user, updates=updates, total=len(updates))
+    transaction.on_commit(lambda: _enqueue_job(job.pk))
+    return job
+
+
+def _enqueue_job(job_id):
+    from payments.tasks import run_payment_status_job
+
+    try:
+        # retry=False: an unreachable broker must not hold up the request.
+        run_payment_status_job.apply_async((job_id,), retry=False)
+    except Exception:
+        logger.warning("Could not queue payment status job %s; running inline", job_id, exc_info=True)
+        run_job(job_id)
+
+
+def run_job(job_id):
+    job = PaymentStatusJob.objects.get(pk=job_id)
+    if job.status != PaymentJobStatus.PENDING.value:
+        return job
+    job.status = PaymentJobStatus.RUNNING.value
+    job.save(update_fields=["status", "updated_at"])
+
+    def progress(done, results):
+        job.processed = done
+        job.succeeded, job.failed = summarize(results)
+        job.save(update_fields=["processed", "succeeded", "failed", "updated_at"])
+
+    try:
+        results = apply_updates(job.updates, on_progress=progress)
+    except Exception as e:
+        logger.error("Payment status job %s failed: %s", job_id, e, exc_info=True)
+        job.status = PaymentJobStatus.FAILED.value
+        job.error = str(e)
+    else:
+        job.status = PaymentJobStatus.COMPLETED.value
+        job.processed = job.total
+        job.succeeded, job.failed = summarize(results)
+        job.results = results
+    job.finished_at = timezone.now()
+    job.save()
+    return job
@@ -12,3 +12,17 @@ class PaymentMethodEnum(str, Enum):
     STRIPE = "stripe"
     CARD = "card"
 
+
+
+class WebhookEventStatus(str, Enum):
+    RECEIVED = "received"
+    PROCESSED = "processed"
+    FAILED = "failed"
+    IGNORED = "ignored"
+
+
+class PaymentJobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
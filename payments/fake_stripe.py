@@ -0,0 +1,111 @@
+# payments/fake_stripe.py
+"""
+A local stand-in for the part of the Stripe API checkout uses, so the
+checkout path can be exercised and load-tested without the network.
+
+    python manage.py fake_stripe_server --port 12111
+    STRIPE_API_BASE=http://127.0.0.1:12111 python manage.py runserver
+
+``POST /v1/checkout/sessions`` answers with a checkout.session built from
+the form-encoded request (metadata, customer email, amount total); anything
+else is a Stripe-shaped 404. ``--latency-ms`` adds a fixed delay to stand in
+for Stripe's own response time. The server speaks HTTP/1.1 keep-alive, so a
+pooled client (payments.stripe_utils) reuses its connections as it would
+against api.stripe.com.
+"""
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+CHECKOUT_SESSIONS_PATH = "/v1/checkout/sessions"
+
+
+def _first(params, key, default=""):
+    return params.get(key, [default])[0]
+
+
+def checkout_session(params):
+    """The checkout.session Stripe would return for these (decoded form) params."""
+    session_id = f"cs_test_{uuid.uuid4().hex}"
+    metadata = {
+        key[len("metadata["):-1]: values[0] for key, values in params.items() if key.startswith("metadata[")
+    }
+    amount_total, i = 0, 0
+    while f"line_items[{i}][quantity]" in params:
+        unit_amount = int(_first(params, f"line_items[{i}][price_data][unit_amount]", "0"))
+        amount_total += unit_amount * int(_first(params, f"line_items[{i}][quantity]", "1"))
+        i += 1
+    return {
+        "id": session_id,
+        "object": "checkout.session",
+        "livemode": False,
+        "mode": _first(params, "mode", "payment"),
+        "status": "open",
+        "payment_status": "unpaid",
+        "currency": _first(params, "line_items[0][price_data][currency]", "usd"),
+        "amount_total": amount_total,
+        "customer_email": _first(params, "customer_email") or None,
+        "success_url": _first(params, "success_url"),
+        "cancel_url": _first(params, "cancel_url"),
+        "metadata": metadata,
+        "url": f"https://checkout.stripe.test/c/pay/{session_id}",
+        "created": int(time.time()),
+    }
+
+
+class FakeStripeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, keep-alive replies stall ~40 ms.
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.path.split("?", 1)[0].rstrip("/") == CHECKOUT_SESSIONS_PATH:
+            self.reply(200, checkout_session(parse_qs(body)))
+        else:
+            self.reply(404, {"error": {
+                "type": "invalid_request_error",
+                "message": f"Unrecognized request URL (POST: {self.path}).",
+            }})
+
+    def do_GET(self):
+        self.reply(404, {"error": {"type": "invalid_request_error", "message": "Not implemented by the fake."}})
+
+    def reply(self, status, data):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Request-Id", f"req_fake_{uuid.uuid4().hex[:14]}")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeStripeServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for a load test's worth of connections opening at once.
+    request_queue_size = 1024
+
+    def __init__(self, address, latency=0.0):
+        super().__init__(address, FakeStripeHandler)
+        self.latency = latency
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_fake_stripe(host="127.0.0.1", port=0, latency=0.0):
+    """Serve from a daemon thread; port 0 picks a free one (see ``server.base_url``)."""
+    server = FakeStripeServer((host, port), latency=latency)
+    threading.Thread(target=server.serve_forever, name="fake-stripe", daemon=True).start()
+    return server
@@ -0,0 +1,79 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from orders.models import Order
+from payments import stripe_utils
+from payments.fake_stripe import start_fake_stripe
+from payments.views import CheckoutViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test POST /api/checkout/checkout/ in-process against the fake Stripe server: "
+        "requests are started at --rps (open loop) and latency is measured from the scheduled start."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument("--rps", type=float, default=500.0)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--orders", type=int, default=100, help="Cycle over this many most recent orders.")
+        parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated Stripe response time.")
+        parser.add_argument("--api-base", help="Use this Stripe API base instead of starting the fake server.")
+
+    def handle(self, *args, **options):
+        orders = list(Order.objects.select_related("customer").order_by("-pk")[:options["orders"]])
+        if not orders:
+            raise CommandError("No orders to check out.")
+
+        server = None
+        api_base = options["api_base"]
+        if not api_base:
+            server = start_fake_stripe(latency=options["latency_ms"] / 1000)
+            api_base = server.base_url
+        stripe_utils.use_stripe_api_base(api_base)
+
+        view = CheckoutViewSet.as_view({"post": "checkout"})
+        factory = APIRequestFactory()
+        interval = 1 / options["rps"]
+        started = time.perf_counter()
+
+        def run(i):
+            order = orders[i % len(orders)]
+            scheduled = started + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            request = factory.post("/api/checkout/checkout/", {"order_id": order.order_id}, format="json")
+            force_authenticate(request, user=order.customer)
+            try:
+                response = view(request)
+                return response.status_code, time.perf_counter() - scheduled
+            finally:
+                close_old_connections()
+
+        try:
+            with ThreadPoolExecutor(max_workers=options["concurrency"], initializer=close_old_connections) as pool:
+                results = list(pool.map(run, range(options["requests"])))
+        finally:
+            connections.close_all()
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+        elapsed = time.perf_counter() - started
+        latencies = sorted(latency * 1000 for _, latency in results)
+        statuses = {}
+        for code, _ in results:
+            statuses[code] = statuses.get(code, 0) + 1
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results)} checkouts in {elapsed:.2f}s ({len(results) / elapsed:.0f}/s, target {options['rps']:.0f}/s); "
+            f"p50 {quantiles[49]:.1f} ms, p95 {quantiles[94]:.1f} ms, p99 {quantiles[98]:.1f} ms; "
+            f"status codes: {statuses}"
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from payments.fake_stripe import FakeStripeServer
+
+
+class Command(BaseCommand):
+    help = "Serve the fake Stripe API (payments.fake_stripe); point STRIPE_API_BASE at it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=12111)
+        parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response.")
+
+    def handle(self, *args, **options):
+        server = FakeStripeServer((options["host"], options["port"]), latency=options["latency_ms"] / 1000)
+        self.stdout.write(self.style.SUCCESS(f"Fake Stripe listening on {server.base_url}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
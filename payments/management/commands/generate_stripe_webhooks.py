@@ -0,0 +1,89 @@
+import json
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from orders.models import Order
+from payments import webhooks
+
+EVENT_TYPES = list(webhooks.HANDLERS)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate Stripe webhook deliveries signed with STRIPE_WEBHOOK_SECRET, for benchmarking offline. "
+        "Writes NDJSON lines {\"signature\", \"payload\"}, or with --post sends them to the webhook view "
+        "in-process and reports the throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000)
+        parser.add_argument("--type", choices=EVENT_TYPES, default="checkout.session.completed")
+        parser.add_argument("--orders", type=int, default=100,
+                            help="Spread the events over this many most recent orders.")
+        parser.add_argument("--duplicates", type=float, default=0.0,
+                            help="Fraction of deliveries that repeat an earlier event id.")
+        parser.add_argument("--output", help="NDJSON file (default: stdout).")
+        parser.add_argument("--post", action="store_true", help="POST to the webhook view instead of writing.")
+        parser.add_argument("--path", default="/api/stripe/webhook/")
+
+    def handle(self, *args, **options):
+        secret = getattr(settings, "STRIPE_WEBHOOK_SECRET", "")
+        if not secret:
+            raise CommandError("STRIPE_WEBHOOK_SECRET is not set.")
+        orders = list(
+            Order.objects.order_by("-pk").values("order_id", "customer_id", "vendor_id", "total_amount")[:options["orders"]]
+        )
+        if not orders:
+            raise CommandError("No orders to build events for.")
+
+        deliveries = list(self.deliveries(options, orders, secret))
+        if options["post"]:
+            self.post(deliveries, options["path"])
+            return
+
+        out = open(options["output"], "w") if options["output"] else sys.stdout
+        try:
+            for signature, payload in deliveries:
+                out.write(json.dumps({"signature": signature, "payload": payload}) + "\n")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+    def deliveries(self, options, orders, secret):
+        every = round(1 / options["duplicates"]) if options["duplicates"] > 0 else 0
+        previous = None
+        for i in range(options["count"]):
+            if every and previous and i % every == 0:
+                yield previous
+                continue
+            order = orders[i % len(orders)]
+            payload = webhooks.build_event(options["type"], {
+                "id": f"cs_local_{i}",
+                "object": "checkout.session",
+                "amount_total": int(order["total_amount"] * 100),
+                "metadata": {
+                    "order_id": order["order_id"],
+                    "customer_id": str(order["customer_id"]),
+                    "vendor_id": str(order["vendor_id"]),
+                },
+            })
+            previous = (webhooks.sign_payload(payload, secret), payload)
+            yield previous
+
+    def post(self, deliveries, path):
+        client = Client()
+        statuses = {}
+        started = time.perf_counter()
+        for signature, payload in deliveries:
+            response = client.post(path, payload, content_type="application/json", HTTP_STRIPE_SIGNATURE=signature)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        elapsed = time.perf_counter() - started
+        rate = len(deliveries) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(deliveries)} deliveries in {elapsed:.2f}s ({rate:.0f}/s, "
+            f"{1000 * elapsed / max(len(deliveries), 1):.2f} ms each); status codes: {statuses}"
+        ))
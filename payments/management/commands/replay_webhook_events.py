@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from payments import webhooks
+from payments.models import WebhookEvent
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-run stored Stripe events that were never processed (queue lost, retries exhausted). "
+        "Processed events are skipped unless named with --event-id and --force."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event-id", action="append", default=[], help="Replay these events only (repeatable).")
+        parser.add_argument("--status", action="append", choices=[webhooks.RECEIVED, webhooks.FAILED],
+                            help="Statuses to replay (default: received and failed).")
+        parser.add_argument("--older-than", type=int, default=0, metavar="MINUTES",
+                            help="Leave events younger than this to the queue.")
+        parser.add_argument("--force", action="store_true",
+                            help="Also re-apply processed/ignored events; requires --event-id.")
+        parser.add_argument("--queue", action="store_true", help="Queue the events instead of processing them here.")
+
+    def handle(self, *args, **options):
+        if options["force"] and not options["event_id"]:
+            # Re-applying every stored event would repeat every payment update and notification.
+            raise CommandError("--force only re-applies the events named with --event-id.")
+        events = WebhookEvent.objects.order_by("created_at")
+        if options["event_id"]:
+            events = events.filter(event_id__in=options["event_id"])
+        if not options["force"]:
+            events = events.filter(status__in=options["status"] or [webhooks.RECEIVED, webhooks.FAILED])
+        if options["older_than"]:
+            events = events.filter(created_at__lt=timezone.now() - timedelta(minutes=options["older_than"]))
+
+        event_ids = list(events.values_list("event_id", flat=True))
+        if options["force"]:
+            WebhookEvent.objects.filter(event_id__in=event_ids).update(status=webhooks.RECEIVED)
+
+        outcomes = {}
+        for event_id in event_ids:
+            if options["queue"]:
+                webhooks.enqueue_event(event_id)
+                outcome = "queued"
+            else:
+                try:
+                    outcome = webhooks.process_event(event_id)
+                except Exception:
+                    outcome = webhooks.FAILED
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+        summary = ", ".join(f"{n} {outcome}" for outcome, n in sorted(outcomes.items())) or "nothing to do"
+        self.stdout.write(self.style.SUCCESS(f"Replayed {len(event_ids)} Stripe events: {summary}."))
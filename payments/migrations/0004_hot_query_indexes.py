@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_hot_query_indexes'),
+        ('payments', '0003_alter_payment_product'),
+        ('products', '0021_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['vendor', 'status', 'created_at'], name='payments_pa_vendor__ad5e17_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'created_at'], name='payments_pa_status_343680_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['customer', '-created_at'], name='payments_pa_custome_a935a8_idx'),
+        ),
+    ]
@@ -2,7 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.db.models import Sum
 from django.utils.timezone import now
-from payments.enums import PaymentStatusEnum, PaymentMethodEnum
+from payments.enums import PaymentStatusEnum, PaymentMethodEnum, WebhookEventStatus, PaymentJobStatus
 from users.models import BaseModel
 
 
@@ -56,6 +56,11 @@ class Payment(BaseModel):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["vendor", "status", "created_at"]),
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["customer", "-created_at"]),
+        ]
 
     def __str__(self):
         return f"Payment #{self.id} - {self.product.name} - {self.status}"
@@ -121,3 +126,63 @@ class Payment(BaseModel):
 
         result = qs.aggregate(total=Sum('amount'))
         return result['total'] or 0
+
+
+
+class WebhookEvent(BaseModel):
+    """
+    Inbox of Stripe webhook deliveries, one row per Stripe event id.
+    Written by the webhook view, worked off by payments.webhooks.
+    """
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(
+        max_length=20,
+        choices=[(tag.value, tag.value) for tag in WebhookEventStatus],
+        default=WebhookEventStatus.RECEIVED.value
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            # Replay: unprocessed events, oldest first.
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.event_id} ({self.status})"
+
+
+
+class PaymentStatusJob(BaseModel):
+    """A bulk payment status update run in the background (payments.bulk_status)."""
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="payment_status_jobs"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=[(tag.value, tag.value) for tag in PaymentJobStatus],
+        default=PaymentJobStatus.PENDING.value
+    )
+    updates = models.JSONField(default=list)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    succeeded = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    results = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True, default="")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Payment status job #{self.id} ({self.status}, {self.processed}/{self.total})"
@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from payments.models import Payment
+from django.urls import reverse
+from payments.enums import PaymentJobStatus
+from payments.models import Payment, PaymentStatusJob
 from orders.models import Order
 
 
@@ -64,3 +66,32 @@ class PaymentSerializer(serializers.ModelSerializer):
 
 
 
+
+
+
+class PaymentStatusJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+    status_url = serializers.SerializerMethodField()
+    results = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PaymentStatusJob
+        fields = [
+            "id", "status", "total", "processed", "succeeded", "failed", "progress",
+            "error", "results", "status_url", "created_at", "finished_at",
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        return round(100 * obj.processed / obj.total, 1) if obj.total else 100.0
+
+    def get_status_url(self, obj):
+        url = reverse("payment-status-job", kwargs={"pk": obj.pk})
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    def get_results(self, obj):
+        # Only once finished; until then the counters tell the story.
+        if obj.status != PaymentJobStatus.COMPLETED.value:
+            return None
+        return obj.results
@@ -1,15 +1,77 @@
+# payments/stripe_utils.py
+"""
+Stripe API access.
+
+``get_stripe_client`` returns one StripeClient per process, built on a
+pooled ``requests.Session``: connections (and their TLS sessions) are
+reused across requests instead of being set up per checkout, and every call
+is bounded by STRIPE_CONNECT_TIMEOUT / STRIPE_READ_TIMEOUT. STRIPE_API_BASE
+redirects it, e.g. to payments.fake_stripe for load tests.
+"""
+import threading
+
+import requests
 import stripe
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
+DEFAULT_CONNECT_TIMEOUT = 3
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_POOL_SIZE = 32
+DEFAULT_MAX_NETWORK_RETRIES = 1
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def build_stripe_client(api_base=None):
+    pool_size = getattr(settings, "STRIPE_POOL_SIZE", DEFAULT_POOL_SIZE)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    http_client = stripe.RequestsClient(
+        timeout=(
+            getattr(settings, "STRIPE_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT),
+            getattr(settings, "STRIPE_READ_TIMEOUT", DEFAULT_READ_TIMEOUT),
+        ),
+        session=session,
+    )
+    api_base = api_base or getattr(settings, "STRIPE_API_BASE", "")
+    return stripe.StripeClient(
+        settings.STRIPE_SECRET_KEY,
+        http_client=http_client,
+        base_addresses={"api": api_base} if api_base else {},
+        # Retried POSTs carry an idempotency key, so a retry can't create a second session.
+        max_network_retries=getattr(settings, "STRIPE_MAX_NETWORK_RETRIES", DEFAULT_MAX_NETWORK_RETRIES),
+    )
+
+
+def get_stripe_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = build_stripe_client()
+    return _client
+
+
+def use_stripe_api_base(api_base):
+    """Point this process's client at ``api_base`` (benchmarks against the fake server)."""
+    global _client
+    with _client_lock:
+        _client = build_stripe_client(api_base)
+    return _client
+
 
 def create_checkout_session(product, customer, success_url, cancel_url):
-    price_to_use = product.price1
+    price_to_use = product.effective_price
 
-    session = stripe.checkout.Session.create(
-        payment_method_types=["card"],
-        line_items=[{
+    session = get_stripe_client().checkout.sessions.create(params={
+        "payment_method_types": ["card"],
+        "line_items": [{
             "price_data": {
                 "currency": "usd",
                 "product_data": {"name": product.name},
@@ -17,15 +79,15 @@ def create_checkout_session(product, customer, success_url, cancel_url):
             },
             "quantity": 1,
         }],
-        mode="payment",
-        customer_email=customer.email,
-        success_url=success_url,
-        cancel_url=cancel_url,
-        metadata={
+        "mode": "payment",
+        "customer_email": customer.email,
+        "success_url": success_url,
+        "cancel_url": cancel_url,
+        "metadata": {
             "product_id": str(product.id),
             "customer_id": str(customer.id),
-            "vendor_id": str(product.vendor.id),
+            "vendor_id": str(product.vendor_id),
             "payment": "true",
         },
-    )
+    })
     return session
@@ -0,0 +1,22 @@
+# payments/tasks.py
+from celery import shared_task
+
+from payments import bulk_status, webhooks
+
+
+@shared_task(
+    ignore_result=True,
+    autoretry_for=(Exception,),
+    max_retries=webhooks.WEBHOOK_MAX_RETRIES,
+    retry_backoff=True,
+    retry_backoff_max=webhooks.WEBHOOK_RETRY_BACKOFF_MAX,
+)
+def process_webhook_event(event_id):
+    """Apply a stored Stripe event; see ``webhooks.process_event``."""
+    webhooks.process_event(event_id)
+
+
+@shared_task(ignore_result=True)
+def run_payment_status_job(job_id):
+    """Background half of the async mode of the bulk payment status endpoint."""
+    bulk_status.run_job(job_id)
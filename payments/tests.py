@@ -1,3 +1,236 @@
-from django.test import TestCase
+"""
+Stripe webhook inbox: the view only stores verified events, and
+``process_webhook_event`` (run eagerly with ``apply``) applies each one once.
+Bulk status updates: set-based writes, same per-entry results, async jobs.
+Checkout: the session comes from Stripe (payments.fake_stripe here) and the
+order is read in the same number of queries whatever its size.
+"""
+import time
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from orders.enums import OrderStatus
+from orders.models import Order, OrderItem
+from payments import stripe_utils, webhooks
+from payments.enums import PaymentJobStatus, PaymentStatusEnum, WebhookEventStatus
+from payments.fake_stripe import start_fake_stripe
+from payments.models import Payment, WebhookEvent
+from payments.tasks import process_webhook_event, run_payment_status_job
+from products.models import Product
+from users.models import User
+
+SECRET = "whsec_test"
+WEBHOOK_URL = "/api/stripe/webhook/"
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET=SECRET)
+class StripeWebhookInboxTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create(email="vendor@example.com", role="vendor")
+        cls.customer = User.objects.create(email="customer@example.com", role="customer")
+        cls.order = Order.objects.create(
+            order_id="ORD-WEBHOOK-1", customer=cls.customer, vendor=cls.vendor, total_amount=Decimal("12.34")
+        )
+
+    def completed_event(self, event_id="evt_1", order_id=None):
+        return webhooks.build_event("checkout.session.completed", {
+            "id": "cs_test_1",
+            "amount_total": 1234,
+            "metadata": {
+                "order_id": order_id or self.order.order_id,
+                "customer_id": str(self.customer.id),
+                "vendor_id": str(self.vendor.id),
+            },
+        }, event_id=event_id)
+
+    def deliver(self, payload, signature=None):
+        return self.client.post(
+            WEBHOOK_URL, payload, content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=signature or webhooks.sign_payload(payload, SECRET),
+        )
+
+    def test_view_stores_event_without_processing_it(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.deliver(self.completed_event())
+        self.assertEqual(response.json(), {"status": "event_queued"})
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEventStatus.RECEIVED.value)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_redelivery_is_not_stored_twice(self):
+        payload = self.completed_event()
+        self.deliver(payload)
+        response = self.deliver(payload)
+        self.assertEqual(response.json(), {"status": "duplicate_event"})
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_bad_signature_is_rejected(self):
+        response = self.deliver(self.completed_event(), signature="t=1,v1=bad")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_stale_signature_is_rejected(self):
+        payload = self.completed_event()
+        # Correctly signed, but long past Stripe's replay tolerance.
+        signature = webhooks.sign_payload(payload, SECRET, timestamp=time.time() - 3600)
+        response = self.deliver(payload, signature=signature)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_force_replay_needs_event_ids(self):
+        self.deliver(self.completed_event())
+        process_webhook_event.apply(("evt_1",))
+        with self.assertRaises(CommandError):
+            call_command("replay_webhook_events", "--force", stdout=StringIO())
+
+        call_command("replay_webhook_events", "--force", "--event-id", "evt_1", stdout=StringIO())
+        event = WebhookEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), (WebhookEventStatus.PROCESSED.value, 2))
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_event_is_applied_once(self):
+        self.deliver(self.completed_event())
+        process_webhook_event.apply(("evt_1",))
+        process_webhook_event.apply(("evt_1",))
+
+        payment = Payment.objects.get()
+        self.assertEqual(payment.amount, Decimal("12.34"))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, OrderStatus.PAID.value)
+        event = WebhookEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), (WebhookEventStatus.PROCESSED.value, 1))
+
+    def test_unknown_order_fails_without_retrying(self):
+        self.deliver(self.completed_event(order_id="ORD-MISSING"))
+        result = process_webhook_event.apply(("evt_1",))
+        self.assertTrue(result.successful())
+        event = WebhookEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), (WebhookEventStatus.FAILED.value, 1))
+        self.assertIn("ORD-MISSING", event.last_error)
+
+
+class BulkPaymentStatusUpdateTests(TestCase):
+    url = "/api/payments/bulk-status/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(email="admin@example.com", role="admin", is_staff=True)
+        vendor = User.objects.create(email="vendor@example.com", role="vendor")
+        customer = User.objects.create(email="customer@example.com", role="customer")
+        cls.payments = Payment.objects.bulk_create(
+            [Payment(vendor=vendor, customer=customer, amount=Decimal("5.00")) for _ in range(4)]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_updates_are_set_based_and_results_keep_request_order(self):
+        p1, p2, p3, p4 = (payment.pk for payment in self.payments)
+        updates = [
+            {"payment_id": p1, "status": "completed"},
+            {"payment_id": p2, "status": "refunded"},
+            {"payment_id": p3, "status": "bogus"},
+            {"payment_id": 999999, "status": "completed"},
+            {"status": "failed"},
+            {"payment_id": p4, "status": "completed"},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {"updates": updates}, format="json")
+        # SELECT existing ids + one UPDATE per target status, whatever the batch size.
+        statements = [q["sql"].split()[0] for q in queries.captured_queries]
+        self.assertEqual([s for s in statements if s in ("SELECT", "UPDATE")], ["SELECT", "UPDATE", "UPDATE"])
+
+        self.assertEqual([r["status"] for r in response.json()["results"]],
+                         ["success", "success", "failed", "failed", "failed", "success"])
+        self.assertEqual([r.get("reason") for r in response.json()["results"][2:5]],
+                         ["Invalid status", "Payment not found", "Missing fields"])
+        statuses = dict(Payment.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[p1], PaymentStatusEnum.COMPLETED.value)
+        self.assertEqual(statuses[p2], PaymentStatusEnum.REFUNDED.value)
+        self.assertEqual(statuses[p3], PaymentStatusEnum.PENDING.value)
+
+    def test_async_job_reports_progress_and_results(self):
+        updates = [{"payment_id": payment.pk, "status": "failed"} for payment in self.payments]
+        with self.captureOnCommitCallbacks():
+            response = self.client.post(self.url, {"updates": updates, "async": True}, format="json")
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["id"]
+
+        run_payment_status_job.apply((job_id,))
+
+        job = self.client.get(response.json()["status_url"]).json()
+        self.assertEqual(job["status"], PaymentJobStatus.COMPLETED.value)
+        self.assertEqual((job["processed"], job["succeeded"], job["progress"]), (4, 4, 100.0))
+        self.assertEqual(len(job["results"]), 4)
+        self.assertFalse(Payment.objects.exclude(status=PaymentStatusEnum.FAILED.value).exists())
+
+
+class CheckoutTests(TestCase):
+    url = "/api/checkout/checkout/"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stripe = start_fake_stripe()
+        stripe_utils.use_stripe_api_base(cls.stripe.base_url)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stripe.shutdown()
+        cls.stripe.server_close()
+        stripe_utils._client = None
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = User.objects.create(email="vendor@example.com", role="vendor")
+        cls.customer = User.objects.create(email="customer@example.com", role="customer")
+        cls.products = [
+            Product.objects.create(vendor=cls.vendor, name=f"Product {i}", slug=f"product-{i}", price1=Decimal("10.00"))
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def checkout(self, order_id):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {"order_id": order_id}, format="json")
+        return response, len(queries)
+
+    def order(self, order_id, size):
+        order = Order.objects.create(order_id=order_id, customer=self.customer, vendor=self.vendor)
+        for product in self.products[:size]:
+            OrderItem.objects.create(order=order, product=product, quantity=2, price=product.price1)
+        return order
+
+    def test_session_comes_from_stripe_in_a_fixed_number_of_queries(self):
+        self.order("ORD-CHECKOUT-1", 1)
+        self.order("ORD-CHECKOUT-5", 5)
+
+        small, small_queries = self.checkout("ORD-CHECKOUT-1")
+        large, large_queries = self.checkout("ORD-CHECKOUT-5")
+
+        self.assertEqual((small.status_code, large.status_code), (200, 200))
+        self.assertTrue(large.data["checkout_url"].startswith("https://checkout.stripe.test/c/pay/cs_test_"))
+        self.assertEqual(large.data["item_count"], 5)
+        self.assertEqual([item["product"]["name"] for item in large.data["items"]], [p.name for p in self.products])
+        self.assertEqual(small_queries, large_queries)
+        self.assertLessEqual(large_queries, 2)
+
+    def test_other_customers_orders_are_not_found(self):
+        other = User.objects.create(email="other@example.com", role="customer")
+        Order.objects.create(order_id="ORD-CHECKOUT-OTHER", customer=other, vendor=self.vendor)
+
+        self.assertEqual(self.checkout("ORD-CHECKOUT-OTHER")[0].status_code, 404)
+        self.assertEqual(self.client.post(self.url, {}, format="json").status_code, 400)
@@ -1,6 +1,9 @@
+import json
 import logging
 from decimal import Decimal
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
@@ -8,14 +11,15 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 import stripe
 
-from orders.models import Order
-from users.models import User
-from orders.enums import OrderStatus
-from payments.models import Payment
-from notification.utils import notify_order_payment_completed, notify_order_payment_cancelled
+from orders.models import Order, OrderItem
+from payments.models import Payment, PaymentStatusJob
+from payments.serializers import PaymentStatusJobSerializer
+from payments import bulk_status, webhooks
+from payments.stripe_utils import get_stripe_client
+from users.enums import UserRole
+from common.exports import ensure_can_export, parse_export_params, stream_export
 
 logger = logging.getLogger(__name__)
-stripe.api_key = settings.STRIPE_SECRET_KEY
 
 
 # ------------------------
@@ -30,14 +34,22 @@ class CheckoutViewSet(viewsets.ViewSet):
         if not order_id:
             return Response({"error": "order_id is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        order = get_object_or_404(Order, order_id=order_id, customer=request.user)
+        # Everything the session and the response read, in two queries.
+        order = get_object_or_404(
+            Order.objects.select_related("vendor", "customer", "selected_shipping_address").prefetch_related(
+                Prefetch("items", queryset=OrderItem.objects.select_related("product"))
+            ),
+            order_id=order_id,
+            customer=request.user,
+        )
         return self.create_stripe_session(order, request.user)
 
     def create_stripe_session(self, order, user):
         line_items = []
         items_data = []
+        items = list(order.items.all())
 
-        for item in order.items.all():
+        for item in items:
             line_items.append({
                 "price_data": {
                     "currency": "usd",
@@ -84,25 +96,25 @@ class CheckoutViewSet(viewsets.ViewSet):
         frontend_success = f"{frontend_success_base}?order_id={order.order_id}"
 
         try:
-            session = stripe.checkout.Session.create(
-                payment_method_types=["card"],
-                line_items=line_items,
-                mode="payment",
-                customer_email=user.email,
-                success_url=frontend_success,
-                cancel_url=frontend_cancel,
-                metadata={
+            session = get_stripe_client().checkout.sessions.create(params={
+                "payment_method_types": ["card"],
+                "line_items": line_items,
+                "mode": "payment",
+                "customer_email": user.email,
+                "success_url": frontend_success,
+                "cancel_url": frontend_cancel,
+                "metadata": {
                     "order_id": order.order_id,
                     "customer_id": str(user.id),
                     "vendor_id": str(order.vendor.id),
                 },
-            )
+            })
 
             response_data = {
                 "checkout_url": session.url,
                 "order_id": order.order_id,
                 "total_amount": str(order.total_amount),
-                "item_count": order.items.count(),
+                "item_count": len(items),
                 "items": items_data,
                 "vendor": {
                     "id": order.vendor.id,
@@ -127,176 +139,127 @@ class CheckoutViewSet(viewsets.ViewSet):
 # STRIPE WEBHOOK
 # ------------------------
 class StripeWebhookView(APIView):
+    """Verify and store the event; payments.webhooks applies it in the background."""
     permission_classes = [permissions.AllowAny]
+    authentication_classes = []
 
     def post(self, request, *args, **kwargs):
-        logger.info("Stripe webhook received")
         payload = request.body
         sig_header = request.META.get("HTTP_STRIPE_SIGNATURE")
         endpoint_secret = getattr(settings, "STRIPE_WEBHOOK_SECRET", "")
 
-        logger.debug(f"Payload: {payload}")
-        logger.debug(f"Stripe Signature Header: {sig_header}")
-
         try:
-            event = stripe.Webhook.construct_event(payload, sig_header, endpoint_secret)
-            logger.info(f"Stripe event type: {event['type']}")
+            payload = payload.decode("utf-8")
+            # An explicit tolerance: verify_header skips the timestamp check without one.
+            stripe.WebhookSignature.verify_header(
+                payload, sig_header, endpoint_secret, tolerance=stripe.Webhook.DEFAULT_TOLERANCE
+            )
+            event = json.loads(payload)
         except stripe.error.SignatureVerificationError:
             logger.error("Invalid Stripe signature")
             return Response({"error": "Invalid signature"}, status=400)
-        except Exception as e:
-            logger.error(f"Stripe webhook error: {e}", exc_info=True)
-            return Response({"error": "Webhook error"}, status=500)
-
-        event_type = event["type"]
-        session = event["data"]["object"]
-
-        handlers = {
-            "checkout.session.completed": self.handle_checkout_completed,
-            "checkout.session.expired": self.handle_checkout_expired,
-            "payment_intent.payment_failed": self.handle_payment_failed,
-        }
-
-        handler = handlers.get(event_type)
-        if handler:
-            logger.info(f"Calling handler for event: {event_type}")
-            return handler(session)
-
-        logger.info(f"Unhandled Stripe event: {event_type}")
-        return Response({"status": "event_not_handled"}, status=200)
-
-
-    # ------------------------
-    # HANDLERS
-    # ------------------------
-    def handle_checkout_completed(self, session):
-        metadata = session.get("metadata", {})
-        order_id = metadata.get("order_id")
-        customer_id = metadata.get("customer_id")
-        vendor_id = metadata.get("vendor_id")
-
-        if not order_id:
-            return Response({"error": "No order_id in metadata"}, status=400)
-
-        try:
-            order = Order.objects.get(order_id=order_id)
-            customer = User.objects.get(id=customer_id)
-            vendor = User.objects.get(id=vendor_id)
-            amount = Decimal(session.get("amount_total", 0)) / 100
-
-            Payment.objects.update_or_create(
-                order=order,
-                defaults={
-                    "customer": customer,
-                    "vendor": vendor,
-                    "amount": amount,
-                    "payment_method": "stripe",
-                    "transaction_id": session.get("id"),
-                    "status": "completed",
-                }
-            )
-
-            order.payment_status = OrderStatus.PAID.value
-            order.order_status = OrderStatus.PROCESSING.value
-            order.save(update_fields=["payment_status", "order_status"])
-
-            notify_order_payment_completed(order, sender=customer)
+        except ValueError:
+            logger.error("Malformed Stripe webhook payload")
+            return Response({"error": "Invalid payload"}, status=400)
+        if not isinstance(event, dict) or not event.get("id") or not event.get("type"):
+            return Response({"error": "Invalid payload"}, status=400)
 
-            logger.info(f"Stripe payment completed for order {order_id}")
-            return Response({"status": "payment_processed"}, status=200)
+        if webhooks.record_event(event):
+            logger.info(f"Stripe event {event['id']} ({event['type']}) queued")
+            return Response({"status": "event_queued"}, status=200)
+        return Response({"status": "duplicate_event"}, status=200)
 
-        except Order.DoesNotExist:
-            logger.error(f"Order {order_id} not found")
-            return Response({"error": "Order not found"}, status=404)
-        except Exception as e:
-            logger.error(f"Payment processing failed: {e}", exc_info=True)
-            return Response({"error": "Processing error"}, status=500)
 
-    def handle_checkout_expired(self, session):
-        metadata = session.get("metadata", {})
-        order_id = metadata.get("order_id")
 
-        if not order_id:
-            return Response({"error": "No order_id in metadata"}, status=400)
 
-        try:
-            order = Order.objects.get(order_id=order_id)
-            order.payment_status = OrderStatus.CANCELLED.value
-            order.order_status = OrderStatus.CANCELLED.value
-            order.save(update_fields=["payment_status", "order_status"])
 
-            notify_order_payment_cancelled(order, sender=order.customer)
 
-            logger.info(f"Stripe checkout expired/cancelled for order {order_id}")
-            return Response({"status": "payment_cancelled"}, status=200)
 
-        except Order.DoesNotExist:
-            logger.error(f"Order {order_id} not found")
-            return Response({"error": "Order not found"}, status=404)
-        except Exception as e:
-            logger.error(f"Payment cancellation failed: {e}", exc_info=True)
-            return Response({"error": "Processing error"}, status=500)
 
-    def handle_payment_failed(self, session):
-        metadata = session.get("metadata", {})
-        order_id = metadata.get("order_id")
 
-        if not order_id:
-            return Response({"error": "No order_id in metadata"}, status=400)
-
-        try:
-            order = Order.objects.get(order_id=order_id)
-            order.payment_status = OrderStatus.FAILED.value
-            order.order_status = OrderStatus.CANCELLED.value
-            order.save(update_fields=["payment_status", "order_status"])
-
-            notify_order_payment_cancelled(order, sender=order.customer)
-
-            logger.info(f"Stripe payment failed for order {order_id}")
-            return Response({"status": "payment_failed"}, status=200)
-
-        except Order.DoesNotExist:
-            logger.error(f"Order {order_id} not found")
-            return Response({"error": "Order not found"}, status=404)
-        except Exception as e:
-            logger.error(f"Payment failed handler error: {e}", exc_info=True)
-            return Response({"error": "Processing error"}, status=500)
 
+class BulkPaymentStatusUpdateView(APIView):
+    """
+    POST {"updates": [{"payment_id", "status"}, ...]} -> per-entry results.
+    With "async": true the batch becomes a PaymentStatusJob (202) whose
+    progress is served by PaymentStatusJobView. See payments.bulk_status.
+    """
+    permission_classes = [permissions.IsAdminUser]
 
+    def post(self, request, *args, **kwargs):
 
+        updates = request.data.get("updates", [])
+        if not isinstance(updates, list) or not updates:
+            return Response({"error": "Invalid updates format"}, status=status.HTTP_400_BAD_REQUEST)
 
+        if request.data.get("async"):
+            job = bulk_status.start_job(updates, request.user)
+            return Response(
+                PaymentStatusJobSerializer(job, context={"request": request}).data,
+                status=status.HTTP_202_ACCEPTED,
+            )
 
+        if len(updates) > bulk_status.MAX_SYNC_UPDATES:
+            return Response(
+                {"error": f"More than {bulk_status.MAX_SYNC_UPDATES} updates; send them with \"async\": true."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
+        with transaction.atomic():
+            results = bulk_status.apply_updates(updates)
+        return Response({"results": results}, status=status.HTTP_200_OK)
 
 
+class PaymentStatusJobView(APIView):
+    permission_classes = [permissions.IsAdminUser]
 
+    def get(self, request, pk, *args, **kwargs):
+        job = get_object_or_404(PaymentStatusJob.objects.defer("updates"), pk=pk)
+        return Response(PaymentStatusJobSerializer(job, context={"request": request}).data)
 
-class BulkPaymentStatusUpdateView(APIView):
-    permission_classes = [permissions.IsAdminUser]
 
-    def post(self, request, *args, **kwargs):
 
-        updates = request.data.get("updates", [])
-        if not isinstance(updates, list) or not updates:
-            return Response({"error": "Invalid updates format"}, status=status.HTTP_400_BAD_REQUEST)
+# ------------------------
+# PAYMENT EXPORT
+# ------------------------
+class PaymentExportView(APIView):
+    """Stream payments as CSV/NDJSON. Admins get every payment, vendors their own."""
+    permission_classes = [permissions.IsAuthenticated]
 
-        results = []
-        for update in updates:
-            payment_id = update.get("payment_id")
-            new_status = update.get("status")
-            if not payment_id or not new_status:
-                results.append({"payment_id": payment_id, "status": "failed", "reason": "Missing fields"})
-                continue
-
-            try:
-                payment = Payment.objects.get(id=payment_id)
-                payment.status = new_status
-                payment.save(update_fields=["status"])
-                results.append({"payment_id": payment_id, "status": "success"})
-            except Payment.DoesNotExist:
-                results.append({"payment_id": payment_id, "status": "failed", "reason": "Payment not found"})
-            except Exception as e:
-                logger.error(f"Failed to update payment {payment_id}: {e}", exc_info=True)
-                results.append({"payment_id": payment_id, "status": "failed", "reason": "Update error"})
-
-        return Response({"results": results}, status=status.HTTP_200_OK)
\ No newline at end of file
+    export_fields = {
+        "id": "id",
+        "created_at": "created_at",
+        "order_id": "order__order_id",
+        "product_id": "product_id",
+        "product_name": "product__name",
+        "vendor_id": "vendor_id",
+        "customer_id": "customer_id",
+        "amount": "amount",
+        "payment_method": "payment_method",
+        "transaction_id": "transaction_id",
+        "status": "status",
+    }
+
+    def get(self, request, *args, **kwargs):
+        ensure_can_export(request.user)
+        file_format, compress = parse_export_params(request)
+
+        queryset = Payment.objects.all()
+        if not (request.user.is_staff or getattr(request.user, "role", None) == UserRole.ADMIN.value):
+            queryset = queryset.filter(vendor=request.user)
+
+        payment_status = request.query_params.get("status")
+        if payment_status:
+            queryset = queryset.filter(status=payment_status)
+        start_date = request.query_params.get("start_date")
+        end_date = request.query_params.get("end_date")
+        if start_date and end_date:
+            queryset = queryset.filter(created_at__date__range=[start_date, end_date])
+
+        return stream_export(
+            queryset.order_by("-created_at", "-id"),
+            self.export_fields,
+            "payments",
+            file_format=file_format,
+            compress=compress,
+        )
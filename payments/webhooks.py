@@ -0,0 +1,218 @@
+# payments/webhooks.py
+"""
+Stripe webhook inbox.
+
+``StripeWebhookView`` only verifies the signature and calls ``record_event``:
+one INSERT into WebhookEvent keyed by the Stripe event id (a redelivery is a
+no-op) and, once committed, a ``payments.tasks.process_webhook_event`` job.
+The request returns as soon as that row is written.
+
+``process_event`` locks the row, runs the handler for its type and marks it
+processed in the same transaction, so an event's effects are applied once
+however often it is delivered or queued. Notifications go out on commit.
+
+- a handler error rolls the transaction back and is re-raised; the task
+  retries with exponential backoff (WEBHOOK_MAX_RETRIES);
+- ``UnprocessableEvent`` (no order id, unknown order) will not get better by
+  retrying: the event is marked failed straight away;
+- event types without a handler are marked ignored.
+
+``manage.py replay_webhook_events`` re-queues events that never reached
+``processed``; ``manage.py generate_stripe_webhooks`` produces signed
+payloads for benchmarking the endpoint offline.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import time
+import uuid
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from orders.enums import OrderStatus
+from orders.models import Order
+from orders.reservations import release_order_stock
+from payments.enums import PaymentMethodEnum, PaymentStatusEnum, WebhookEventStatus
+from payments.models import Payment, WebhookEvent
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+RECEIVED = WebhookEventStatus.RECEIVED.value
+PROCESSED = WebhookEventStatus.PROCESSED.value
+FAILED = WebhookEventStatus.FAILED.value
+IGNORED = WebhookEventStatus.IGNORED.value
+
+WEBHOOK_MAX_RETRIES = 8
+# Seconds; doubles per attempt up to WEBHOOK_RETRY_BACKOFF_MAX.
+WEBHOOK_RETRY_BACKOFF_MAX = 600
+
+
+class UnprocessableEvent(Exception):
+    """The event can never be applied (bad metadata, unknown order); don't retry."""
+
+
+# ---------------------------
+# Inbox
+# ---------------------------
+def record_event(event):
+    """
+    Store a verified event (the decoded JSON body) and queue it once the row
+    is committed. Returns False for an event id we already have.
+    """
+    try:
+        with transaction.atomic():
+            WebhookEvent.objects.create(event_id=event["id"], event_type=event["type"], payload=event)
+    except IntegrityError:
+        return False
+    transaction.on_commit(lambda: enqueue_event(event["id"]))
+    return True
+
+
+def enqueue_event(event_id):
+    from payments.tasks import process_webhook_event
+
+    try:
+        # retry=False: an unreachable broker must not hold up the webhook response.
+        process_webhook_event.apply_async((event_id,), retry=False)
+    except Exception:
+        # The row stays "received"; replay_webhook_events picks it up.
+        logger.warning("Could not queue Stripe event %s", event_id, exc_info=True)
+
+
+def process_event(event_id):
+    """Apply one stored event exactly once. Returns its final status."""
+    try:
+        with transaction.atomic():
+            event = WebhookEvent.objects.select_for_update().get(event_id=event_id)
+            if event.status in (PROCESSED, IGNORED):
+                return event.status
+            handler = HANDLERS.get(event.event_type)
+            if handler is None:
+                logger.info("Unhandled Stripe event: %s", event.event_type)
+                event.status = IGNORED
+            else:
+                handler(event.payload["data"]["object"])
+                event.status = PROCESSED
+            event.attempts += 1
+            event.last_error = ""
+            event.processed_at = timezone.now()
+            event.save(update_fields=["status", "attempts", "last_error", "processed_at", "updated_at"])
+            return event.status
+    except UnprocessableEvent as e:
+        logger.error("Stripe event %s cannot be processed: %s", event_id, e)
+        _record_failure(event_id, e)
+        return FAILED
+    except Exception as e:
+        logger.error("Stripe event %s failed: %s", event_id, e, exc_info=True)
+        _record_failure(event_id, e)
+        raise
+
+
+def _record_failure(event_id, error):
+    event = WebhookEvent.objects.filter(event_id=event_id).first()
+    if event is None:
+        return
+    event.status = FAILED
+    event.attempts += 1
+    event.last_error = str(error)
+    event.save(update_fields=["status", "attempts", "last_error", "updated_at"])
+
+
+# ---------------------------
+# Handlers
+# ---------------------------
+def _order_for(session):
+    order_id = (session.get("metadata") or {}).get("order_id")
+    if not order_id:
+        raise UnprocessableEvent("No order_id in metadata")
+    order = Order.objects.select_for_update().filter(order_id=order_id).first()
+    if order is None:
+        raise UnprocessableEvent(f"Order {order_id} not found")
+    return order
+
+
+def handle_checkout_completed(session):
+    from notification.utils import notify_order_payment_completed
+
+    metadata = session.get("metadata") or {}
+    order = _order_for(session)
+    customer = User.objects.filter(id=metadata.get("customer_id")).first()
+    vendor = User.objects.filter(id=metadata.get("vendor_id")).first()
+    if customer is None or vendor is None:
+        raise UnprocessableEvent(f"Unknown customer/vendor for order {order.order_id}")
+    amount = Decimal(session.get("amount_total", 0)) / 100
+
+    Payment.objects.update_or_create(
+        order=order,
+        defaults={
+            "customer": customer,
+            "vendor": vendor,
+            "amount": amount,
+            "payment_method": PaymentMethodEnum.STRIPE.value,
+            "transaction_id": session.get("id"),
+            "status": PaymentStatusEnum.COMPLETED.value,
+        }
+    )
+
+    order.payment_status = OrderStatus.PAID.value
+    order.order_status = OrderStatus.PROCESSING.value
+    order.save(update_fields=["payment_status", "order_status"])
+
+    transaction.on_commit(lambda: notify_order_payment_completed(order, sender=customer))
+    logger.info("Stripe payment completed for order %s", order.order_id)
+
+
+def _cancel_order(session, reason):
+    from notification.utils import notify_order_payment_cancelled
+
+    order = _order_for(session)
+    # OrderStatus has no "failed" member; the order is cancelled either way.
+    order.payment_status = OrderStatus.CANCELLED.value
+    order.order_status = OrderStatus.CANCELLED.value
+    order.save(update_fields=["payment_status", "order_status"])
+    # No-op if the status change above already released it.
+    release_order_stock([order.pk])
+
+    transaction.on_commit(lambda: notify_order_payment_cancelled(order, sender=order.customer))
+    logger.info("Stripe %s for order %s", reason, order.order_id)
+
+
+def handle_checkout_expired(session):
+    _cancel_order(session, "checkout expired/cancelled")
+
+
+def handle_payment_failed(session):
+    _cancel_order(session, "payment failed")
+
+
+HANDLERS = {
+    "checkout.session.completed": handle_checkout_completed,
+    "checkout.session.expired": handle_checkout_expired,
+    "payment_intent.payment_failed": handle_payment_failed,
+}
+
+
+# ---------------------------
+# Local payloads
+# ---------------------------
+def sign_payload(payload, secret, timestamp=None):
+    """The ``Stripe-Signature`` header Stripe would send for ``payload`` (a str)."""
+    timestamp = int(timestamp or time.time())
+    signature = hmac.new(secret.encode("utf-8"), f"{timestamp}.{payload}".encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def build_event(event_type, data_object, event_id=None):
+    """A minimal Stripe event body around ``data_object``, as a JSON string."""
+    return json.dumps({
+        "id": event_id or f"evt_local_{uuid.uuid4().hex}",
+        "object": "event",
+        "type": event_type,
+        "created": int(time.time()),
+        "livemode": False,
+        "data": {"object": data_object},
+    })
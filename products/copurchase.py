@@ -0,0 +1,241 @@
+# products/copurchase.py
+"""
+"Frequently bought together" index.
+
+``update_co_purchase_index`` walks order items grouped by order, in
+(order_date, id) windows past the watermark stored in
+ProductCoPurchaseWatermark, and counts how often each pair of products
+shares an order:
+
+- with scipy available the window becomes a sparse order x product incidence
+  matrix ``X`` and the pair counts are ``X.T @ X`` minus the diagonal;
+- otherwise the pairs are accumulated in a plain dict.
+
+The counts are added to ProductCoPurchaseCount (the sparse matrix, one row
+per direction) and the top-K neighbours of every product that changed are
+rewritten into ProductCoPurchase, so a request reads a single row per product.
+
+Only orders older than SETTLE_WINDOW are folded in. ``order_date`` is set
+before the order's transaction commits, so a checkout committing after a
+newer one would otherwise fall behind a watermark that already passed it.
+
+Cancelled orders and baskets larger than MAX_BASKET_SIZE are skipped. Orders
+cancelled after they were counted stay counted until ``--rebuild``.
+Run daily by Celery beat and by ``manage.py build_co_purchase_index``.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from orders.enums import OrderStatus
+from products.models import ProductCoPurchase, ProductCoPurchaseCount, ProductCoPurchaseWatermark
+
+try:
+    import numpy
+    from scipy import sparse
+except ImportError:  # pragma: no cover
+    numpy = sparse = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 20
+ORDER_BATCH_SIZE = 5000
+WRITE_BATCH_SIZE = 1000
+# Bulk/wholesale baskets say little about what goes together and cost n^2 pairs.
+MAX_BASKET_SIZE = 50
+# Longer than any checkout transaction stays open.
+SETTLE_WINDOW = timedelta(minutes=15)
+
+
+def top_k():
+    return getattr(settings, "CO_PURCHASE_TOP_K", DEFAULT_TOP_K)
+
+
+# ---------------------------
+# Counting
+# ---------------------------
+def iter_baskets(order_ids):
+    """Distinct product ids per order for ``order_ids``."""
+    from orders.models import OrderItem
+
+    rows = (
+        OrderItem.objects.filter(order_id__in=order_ids, product__isnull=False)
+        .exclude(order__order_status=OrderStatus.CANCELLED.value)
+        .order_by("order_id")
+        .values_list("order_id", "product_id")
+        .iterator(chunk_size=WRITE_BATCH_SIZE)
+    )
+    for _, items in groupby(rows, key=lambda row: row[0]):
+        basket = {product_id for _, product_id in items}
+        if 1 < len(basket) <= MAX_BASKET_SIZE:
+            yield basket
+
+
+def count_pairs_dict(baskets):
+    counts = defaultdict(int)
+    for basket in baskets:
+        for a in basket:
+            for b in basket:
+                if a != b:
+                    counts[(a, b)] += 1
+    return counts
+
+
+def count_pairs_sparse(baskets):
+    baskets = list(baskets)
+    if not baskets:
+        return {}
+    product_ids = sorted(set().union(*baskets))
+    column = {product_id: i for i, product_id in enumerate(product_ids)}
+    rows = [r for r, basket in enumerate(baskets) for _ in basket]
+    cols = [column[product_id] for basket in baskets for product_id in basket]
+
+    incidence = sparse.csr_matrix(
+        (numpy.ones(len(rows), dtype=numpy.int32), (rows, cols)),
+        shape=(len(baskets), len(product_ids)),
+    )
+    pairs = (incidence.T @ incidence).tocoo()
+    off_diagonal = pairs.row != pairs.col
+    ids = numpy.asarray(product_ids)
+    return dict(zip(
+        zip(ids[pairs.row[off_diagonal]].tolist(), ids[pairs.col[off_diagonal]].tolist()),
+        pairs.data[off_diagonal].tolist(),
+    ))
+
+
+def count_pairs(baskets):
+    """``{(product_id, related_id): orders containing both}``, both directions."""
+    if sparse is not None:
+        return count_pairs_sparse(baskets)
+    return count_pairs_dict(baskets)
+
+
+def merge_counts(deltas):
+    """Add ``deltas`` to ProductCoPurchaseCount; returns the product ids touched."""
+    by_product = defaultdict(dict)
+    for (product_id, related_id), n in deltas.items():
+        by_product[product_id][related_id] = n
+
+    product_ids = sorted(by_product)
+    for start in range(0, len(product_ids), WRITE_BATCH_SIZE):
+        batch = product_ids[start:start + WRITE_BATCH_SIZE]
+        existing = {
+            (product_id, related_id): (pk, count)
+            for pk, product_id, related_id, count in ProductCoPurchaseCount.objects.filter(
+                product_id__in=batch
+            ).values_list("pk", "product_id", "related_id", "count")
+        }
+        to_update, to_create = [], []
+        for product_id in batch:
+            for related_id, n in by_product[product_id].items():
+                current = existing.get((product_id, related_id))
+                if current:
+                    to_update.append(ProductCoPurchaseCount(pk=current[0], count=current[1] + n))
+                else:
+                    to_create.append(ProductCoPurchaseCount(product_id=product_id, related_id=related_id, count=n))
+        ProductCoPurchaseCount.objects.bulk_update(to_update, ["count"], batch_size=WRITE_BATCH_SIZE)
+        ProductCoPurchaseCount.objects.bulk_create(to_create, batch_size=WRITE_BATCH_SIZE)
+    return set(product_ids)
+
+
+def refresh_top_neighbours(product_ids, k=None):
+    """Rewrite ProductCoPurchase for ``product_ids`` from the pair counts, one query per batch."""
+    k = k or top_k()
+    product_ids = sorted(product_ids)
+    for start in range(0, len(product_ids), WRITE_BATCH_SIZE):
+        batch = product_ids[start:start + WRITE_BATCH_SIZE]
+        ranked = (
+            ProductCoPurchaseCount.objects.filter(product_id__in=batch)
+            .annotate(rank=Window(
+                RowNumber(),
+                partition_by=[F("product_id")],
+                order_by=[F("count").desc(), F("related_id").asc()],
+            ))
+            .filter(rank__lte=k)
+            .order_by("product_id", "rank")
+            .values_list("product_id", "related_id", "count")
+        )
+        neighbours = defaultdict(list)
+        for product_id, related_id, count in ranked:
+            neighbours[product_id].append([related_id, count])
+        ProductCoPurchase.objects.bulk_create(
+            [ProductCoPurchase(product_id=product_id, neighbours=neighbours[product_id]) for product_id in batch],
+            update_conflicts=True,
+            unique_fields=["product"],
+            update_fields=["neighbours", "updated_at"],
+        )
+
+
+# ---------------------------
+# Job
+# ---------------------------
+def update_co_purchase_index(batch_size=ORDER_BATCH_SIZE, rebuild=False):
+    """
+    Fold orders placed since the watermark, and at least SETTLE_WINDOW ago,
+    into the index. Each window of ``batch_size`` orders commits together
+    with the top-K lists it changed and the watermark, so an interrupted run
+    resumes where it stopped.
+    Returns (orders scanned, products refreshed).
+    """
+    from orders.models import Order
+
+    if rebuild:
+        with transaction.atomic():
+            ProductCoPurchaseCount.objects.all().delete()
+            ProductCoPurchase.objects.all().delete()
+            ProductCoPurchaseWatermark.objects.update_or_create(
+                pk=1, defaults={"last_order_date": None, "last_order_id": 0}
+            )
+
+    settled = Order.objects.filter(order_date__lte=timezone.now() - SETTLE_WINDOW)
+    scanned, touched = 0, set()
+    while True:
+        with transaction.atomic():
+            watermark, _ = ProductCoPurchaseWatermark.objects.select_for_update().get_or_create(pk=1)
+            orders = settled
+            if watermark.last_order_date is not None:
+                # The id breaks ties between orders placed at the same instant.
+                orders = orders.filter(
+                    Q(order_date__gt=watermark.last_order_date)
+                    | Q(order_date=watermark.last_order_date, pk__gt=watermark.last_order_id)
+                )
+            window = list(orders.order_by("order_date", "pk").values_list("order_date", "pk")[:batch_size])
+            if not window:
+                break
+            changed = merge_counts(count_pairs(iter_baskets([pk for _, pk in window])))
+            # In the same transaction, so a run stopped after this window
+            # leaves no counts behind their top-K lists.
+            refresh_top_neighbours(changed)
+            touched |= changed
+            watermark.last_order_date, watermark.last_order_id = window[-1]
+            watermark.save(update_fields=["last_order_date", "last_order_id", "updated_at"])
+        scanned += len(window)
+
+    if scanned:
+        logger.info("Co-purchase index: %s orders scanned, %s products refreshed", scanned, len(touched))
+    return scanned, len(touched)
+
+
+# ---------------------------
+# Read side
+# ---------------------------
+def bought_together(product_ids):
+    """
+    Related product ids for ``product_ids`` (one product page or a whole
+    cart), best first: neighbour counts are summed across the inputs and the
+    inputs themselves are left out.
+    """
+    product_ids = set(product_ids)
+    scores = defaultdict(int)
+    for neighbours in ProductCoPurchase.objects.filter(product_id__in=product_ids).values_list("neighbours", flat=True):
+        for related_id, count in neighbours:
+            if related_id not in product_ids:
+                scores[related_id] += count
+    return sorted(scores, key=lambda related_id: (-scores[related_id], related_id))
@@ -0,0 +1,266 @@
+# products/facets.py
+"""
+Facet counts for catalogue browsing.
+
+``GET /api/products/facets/`` returns, for the public catalogue
+(``is_active=True``, ``status=approved``) narrowed by the same parameters as
+the product list, how many products fall under each category, tag, price
+band, delivery option and stock state. Selections are disjunctive: the
+counts of a dimension ignore that dimension's own selection, so ticking one
+category still shows the counts for its siblings.
+
+Each dimension is one grouped query; dimensions sharing the same base
+(price bands, delivery options, stock) are merged into a single conditional
+aggregate. Results are cached per normalized parameter set under a version
+number that ``bump_facet_version`` (product/category/tag signals, bulk
+writers) increments, with FACET_CACHE_TIMEOUT bounding staleness from
+stock moving on checkout.
+
+``ProductFacetFilter`` applies the facet selections to the list endpoint:
+
+    ?category=1,4  ?tag=7  ?price_band=50-100,100-250
+    ?home_delivery=true  ?pickup=true  ?partner_delivery=true  ?in_stock=true
+"""
+import hashlib
+import json
+import logging
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from products.enums import ProductStatus
+from products.models import Product
+
+logger = logging.getLogger(__name__)
+
+FACET_CACHE_TIMEOUT = 300
+VERSION_KEY = "products:facets:version"
+
+CATEGORY = "category"
+TAG = "tag"
+PRICE_BAND = "price_band"
+DELIVERY = "delivery"
+IN_STOCK = "in_stock"
+
+DELIVERY_OPTIONS = ("home_delivery", "pickup", "partner_delivery")
+
+# (key, lower bound inclusive, upper bound exclusive) on effective_price
+PRICE_BANDS = (
+    ("0-50", Decimal("0"), Decimal("50")),
+    ("50-100", Decimal("50"), Decimal("100")),
+    ("100-250", Decimal("100"), Decimal("250")),
+    ("250-500", Decimal("250"), Decimal("500")),
+    ("500-1000", Decimal("500"), Decimal("1000")),
+    ("1000+", Decimal("1000"), None),
+)
+_BANDS = {key: (low, high) for key, low, high in PRICE_BANDS}
+
+# Non-facet list parameters that narrow the result set and so belong in the cache key.
+PASSTHROUGH_PARAMS = (
+    "search",
+    "effective_price__gte", "effective_price__lte",
+    "rating_avg__gte", "rating_avg__lte", "rating_count__gte",
+)
+
+_TRUE = ("1", "true", "yes")
+_FALSE = ("0", "false", "no")
+
+
+def public_products():
+    return Product.objects.filter(is_active=True, status=ProductStatus.APPROVED.value)
+
+
+# ---------------------------
+# Selection parsing
+# ---------------------------
+def _ids(params, name):
+    raw = [part for value in params.getlist(name) for part in value.split(",") if part.strip()]
+    try:
+        return sorted({int(part) for part in raw})
+    except ValueError:
+        raise ValidationError({name: "Use comma-separated ids."})
+
+
+def _flag(params, name):
+    value = params.get(name)
+    if value is None or value == "":
+        return None
+    value = value.lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValidationError({name: "Use true or false."})
+
+
+def parse_selection(params):
+    """Normalized facet selections from query params (sorted, de-duplicated)."""
+    bands = sorted({part for value in params.getlist(PRICE_BAND) for part in value.split(",") if part})
+    unknown = [band for band in bands if band not in _BANDS]
+    if unknown:
+        raise ValidationError({PRICE_BAND: f"Unknown band(s): {', '.join(unknown)}."})
+    return {
+        CATEGORY: _ids(params, "category"),
+        TAG: _ids(params, "tag"),
+        PRICE_BAND: bands,
+        DELIVERY: {name: True for name in DELIVERY_OPTIONS if _flag(params, name)},
+        IN_STOCK: _flag(params, IN_STOCK),
+    }
+
+
+def in_stock_q():
+    # is_stock=False means the vendor doesn't track stock for the product.
+    return Q(is_stock=False) | Q(stock_quantity__gt=0)
+
+
+def _band_q(key):
+    low, high = _BANDS[key]
+    q = Q(effective_price__gte=low)
+    if high is not None:
+        q &= Q(effective_price__lt=high)
+    return q
+
+
+def apply_selection(queryset, selection, skip=None):
+    """Filter ``queryset`` by every selected dimension except ``skip``."""
+    if selection[CATEGORY] and skip != CATEGORY:
+        queryset = queryset.filter(pk__in=Product.categories.through.objects.filter(
+            category_id__in=selection[CATEGORY]
+        ).values("product_id"))
+    if selection[TAG] and skip != TAG:
+        queryset = queryset.filter(pk__in=Product.tags.through.objects.filter(
+            tag_id__in=selection[TAG]
+        ).values("product_id"))
+    if selection[PRICE_BAND] and skip != PRICE_BAND:
+        q = Q()
+        for band in selection[PRICE_BAND]:
+            q |= _band_q(band)
+        queryset = queryset.filter(q)
+    if selection[DELIVERY] and skip != DELIVERY:
+        # Products offering any of the ticked options.
+        q = Q()
+        for name in selection[DELIVERY]:
+            q |= Q(**{name: True})
+        queryset = queryset.filter(q)
+    if selection[IN_STOCK] is not None and skip != IN_STOCK:
+        queryset = queryset.filter(in_stock_q() if selection[IN_STOCK] else ~in_stock_q())
+    return queryset
+
+
+class ProductFacetFilter(BaseFilterBackend):
+    """Facet selections on the product list; see module docstring."""
+
+    def filter_queryset(self, request, queryset, view):
+        return apply_selection(queryset, parse_selection(request.query_params))
+
+
+# ---------------------------
+# Counting
+# ---------------------------
+def _m2m_counts(through, column, name_field, base):
+    rows = (
+        through.objects.filter(product_id__in=base.values("pk"))
+        .values(column, name_field)
+        .annotate(count=Count("product_id"))
+        .order_by("-count", name_field)
+    )
+    return [{"id": row[column], "name": row[name_field], "count": row["count"]} for row in rows]
+
+
+def _aggregates_for(dimension):
+    if dimension == PRICE_BAND:
+        return {f"band:{key}": Count("pk", filter=_band_q(key)) for key, _, _ in PRICE_BANDS}
+    if dimension == DELIVERY:
+        return {f"delivery:{name}": Count("pk", filter=Q(**{name: True})) for name in DELIVERY_OPTIONS}
+    return {"stock:in": Count("pk", filter=in_stock_q()), "stock:out": Count("pk", filter=~in_stock_q())}
+
+
+def compute_facets(queryset, selection):
+    """
+    ``queryset`` is the public catalogue already narrowed by the non-facet
+    parameters (search, price range, rating).
+    """
+    queryset = queryset.order_by()
+    result = {}
+
+    for dimension, through, column, name_field in (
+        (CATEGORY, Product.categories.through, "category_id", "category__name"),
+        (TAG, Product.tags.through, "tag_id", "tag__name"),
+    ):
+        result[dimension] = _m2m_counts(through, column, name_field, apply_selection(queryset, selection, skip=dimension))
+
+    # Dimensions without a selection of their own share the fully filtered base: one query for all of them.
+    groups = {}
+    for dimension in (PRICE_BAND, DELIVERY, IN_STOCK):
+        selected = selection[dimension] not in (None, [], {})
+        groups.setdefault(dimension if selected else None, []).append(dimension)
+
+    values = {}
+    for skip, dimensions in groups.items():
+        aggregates = {}
+        for dimension in dimensions:
+            aggregates.update(_aggregates_for(dimension))
+        if skip is None:
+            aggregates["total"] = Count("pk")
+        values.update(apply_selection(queryset, selection, skip=skip).aggregate(**aggregates))
+
+    if "total" not in values:
+        values["total"] = apply_selection(queryset, selection).count()
+
+    result[PRICE_BAND] = [
+        {"key": key, "min": low, "max": high, "count": values[f"band:{key}"]} for key, low, high in PRICE_BANDS
+    ]
+    result[DELIVERY] = [{"key": name, "count": values[f"delivery:{name}"]} for name in DELIVERY_OPTIONS]
+    result[IN_STOCK] = {"in_stock": values["stock:in"], "out_of_stock": values["stock:out"]}
+    result["total"] = values["total"]
+    return result
+
+
+# ---------------------------
+# Caching
+# ---------------------------
+def facet_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_facet_version():
+    """
+    Invalidate every cached facet result. Called from product, category and
+    tag writes, so a cache outage is logged rather than failing the write;
+    FACET_CACHE_TIMEOUT then bounds how long results stay stale.
+    """
+    try:
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, 2, None)
+    except Exception:
+        logger.warning("Could not bump the facet cache version", exc_info=True)
+
+
+def cache_key(params, selection):
+    normalized = {
+        name: params.get(name).strip().lower() if name == "search" else params.get(name)
+        for name in PASSTHROUGH_PARAMS if params.get(name)
+    }
+    normalized.update({key: value for key, value in selection.items() if value not in (None, [], {})})
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+    return f"products:facets:{facet_version()}:{digest}"
+
+
+def get_facets(params, narrowed_queryset):
+    """Cached ``compute_facets`` for a request's query params."""
+    selection = parse_selection(params)
+    key = cache_key(params, selection)
+    result = cache.get(key)
+    if result is None:
+        result = compute_facets(narrowed_queryset, selection)
+        cache.set(key, result, FACET_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,340 @@
+# products/importer.py
+"""
+Bulk product import from CSV or NDJSON.
+
+Rows are streamed from the file, validated in chunks with
+``ProductImportRowSerializer`` and written with ``bulk_create`` (products,
+specifications and the category/tag through rows), so an import costs a
+handful of queries per chunk instead of several per product.
+
+CSV columns are the serializer field names. ``categories`` and ``tags`` hold
+names separated by ``|`` and specification fields use ``specifications.<field>``
+columns. NDJSON rows are the same shape with ``specifications`` as an object.
+
+Used by ``POST /api/products/import/`` and ``python manage.py import_products``.
+"""
+import csv
+import io
+import json
+import os
+import uuid
+from dataclasses import dataclass, field
+
+from django.db import IntegrityError, models, transaction
+from django.utils.text import slugify
+from rest_framework import serializers
+
+from common.models import Category, Tag
+from dashboard import stock_alerts
+from notification.utils import NotificationType, notify_admins
+from products import facets, search
+from products.enums import ProductStatus
+from products.models import Product, ProductSpecifications
+from products.serializers import ProductImportRowSerializer
+from users.enums import UserRole
+
+CSV = "csv"
+NDJSON = "ndjson"
+FORMATS = (CSV, NDJSON)
+_EXTENSIONS = {".csv": CSV, ".ndjson": NDJSON, ".jsonl": NDJSON}
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+LIST_SEPARATOR = "|"
+SPEC_PREFIX = "specifications."
+# keeps the OR-ed startswith lookups well under SQLite's expression depth limit
+SLUG_LOOKUP_BATCH = 100
+SLUG_MAX_LENGTH = Product._meta.get_field("slug").max_length
+
+
+def detect_format(filename, default=None):
+    ext = os.path.splitext(filename or "")[1].lower()
+    return _EXTENSIONS.get(ext, default)
+
+
+def _split_names(value):
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(LIST_SEPARATOR) if part.strip()]
+    return value
+
+
+def _normalize_csv_row(row):
+    data, specs = {}, {}
+    for key, value in row.items():
+        if key is None or value is None or value.strip() == "":
+            continue
+        key = key.strip()
+        if key.startswith(SPEC_PREFIX):
+            specs[key[len(SPEC_PREFIX):]] = value
+        else:
+            data[key] = value
+    if specs:
+        data["specifications"] = specs
+    return data
+
+
+def iter_rows(stream, fmt):
+    """
+    Yield ``(row_number, data)`` pairs from a text stream. ``data`` is a dict,
+    or an error string when the line itself could not be parsed.
+
+    A file that is not UTF-8 stops the read: the rows before it are yielded
+    and the row reading stopped at gets the error.
+    """
+    last = 1 if fmt == CSV else 0
+    try:
+        for number, data in _parse_rows(stream, fmt):
+            last = number
+            yield number, data
+    except UnicodeDecodeError as exc:
+        yield last + 1, f"File is not valid UTF-8 ({exc.reason}); rows from here on were not read."
+
+
+def _parse_rows(stream, fmt):
+    if fmt == CSV:
+        # row 1 is the header
+        for number, row in enumerate(csv.DictReader(stream), start=2):
+            data = _normalize_csv_row(row)
+            if data:
+                yield number, data
+    elif fmt == NDJSON:
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as exc:
+                yield number, f"Invalid JSON: {exc}"
+                continue
+            if not isinstance(data, dict):
+                yield number, "Each line must be a JSON object."
+                continue
+            yield number, data
+    else:
+        raise ValueError(f"Unsupported import format: {fmt!r}")
+
+
+def open_upload(uploaded_file):
+    """Wrap a Django UploadedFile as a text stream without reading it into memory."""
+    return io.TextIOWrapper(uploaded_file.file, encoding="utf-8-sig", newline="")
+
+
+def default_status_for(user):
+    if user.is_staff or getattr(user, "role", None) == UserRole.ADMIN.value:
+        return ProductStatus.APPROVED.value
+    return ProductStatus.PENDING.value
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+class ProductImporter:
+    def __init__(self, vendor, *, status=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.vendor = vendor
+        self.status = status or default_status_for(vendor)
+        self.chunk_size = chunk_size
+        self.result = ImportResult()
+        # One serializer for every row: building its fields is the expensive part.
+        self._row_serializer = ProductImportRowSerializer()
+
+        # Both tables are small; resolve names in memory instead of per row.
+        self._categories = {name.lower(): pk for pk, name in Category.objects.values_list("pk", "name")}
+        self._tags = {name.lower(): pk for pk, name in Tag.objects.values_list("pk", "name")}
+
+        # Slugs known to be taken (in the DB or by this import) and the next
+        # free suffix per base, so repeated names don't rescan from -1.
+        self._taken_slugs = set()
+        self._checked_bases = set()
+        self._next_suffix = {}
+
+    # ---------------------------
+    # Entry points
+    # ---------------------------
+    def run(self, rows):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk)
+        return self.result
+
+    def import_stream(self, stream, fmt):
+        return self.run(iter_rows(stream, fmt))
+
+    # ---------------------------
+    # Chunk processing
+    # ---------------------------
+    def _resolve(self, names, lookup, label):
+        ids, missing = [], []
+        for name in names:
+            pk = lookup.get(name.lower())
+            if pk is None:
+                missing.append(name)
+            else:
+                ids.append(pk)
+        if missing:
+            return None, {label: [f"Unknown {label}: {', '.join(missing)}"]}
+        return list(dict.fromkeys(ids)), None
+
+    def _validate(self, number, data):
+        if isinstance(data, str):
+            self.result.add_error(number, {"non_field_errors": [data]})
+            return None
+
+        data = dict(data)
+        for key in ("categories", "tags"):
+            if key in data:
+                data[key] = _split_names(data[key])
+
+        try:
+            row = self._row_serializer.run_validation(data)
+        except serializers.ValidationError as exc:
+            self.result.add_error(number, exc.detail)
+            return None
+
+        category_ids, error = self._resolve(row.pop("categories", []), self._categories, "categories")
+        if error:
+            self.result.add_error(number, error)
+            return None
+        tag_ids, error = self._resolve(row.pop("tags", []), self._tags, "tags")
+        if error:
+            self.result.add_error(number, error)
+            return None
+        return number, row, category_ids, tag_ids
+
+    def _import_chunk(self, chunk):
+        valid = [row for row in (self._validate(number, data) for number, data in chunk) if row]
+        if not valid:
+            return
+
+        slugs = self.allocate_slugs([row["name"] for _, row, _, _ in valid])
+        products, specs = [], []
+        for (_, row, _, _), slug in zip(valid, slugs):
+            spec_data = row.pop("specifications", None)
+            product = Product(
+                vendor=self.vendor, status=self.status, slug=slug, effective_price=row["price1"], **row
+            )
+            products.append(product)
+            specs.append(spec_data)
+
+        try:
+            with transaction.atomic():
+                Product.objects.bulk_create(products, batch_size=self.chunk_size)
+                ProductSpecifications.objects.bulk_create(
+                    [
+                        ProductSpecifications(product=product, **spec_data)
+                        for product, spec_data in zip(products, specs) if spec_data
+                    ],
+                    batch_size=self.chunk_size,
+                )
+                self._link(Product.categories.through, "category_id", products, [r[2] for r in valid])
+                self._link(Product.tags.through, "tag_id", products, [r[3] for r in valid])
+                # bulk_create skips post_save, so the search index is fed explicitly.
+                search.reindex_product_ids([product.pk for product in products], batch_size=self.chunk_size)
+        except IntegrityError as exc:
+            # Most likely a slug taken concurrently by another writer; the whole chunk is rolled back.
+            for number, *_ in valid:
+                self.result.add_error(number, {"non_field_errors": [f"Could not save row: {exc}"]})
+            self._checked_bases.clear()
+            return
+
+        self.result.created += len(products)
+        facets.bump_facet_version()
+        # Imported at or below the threshold: open their alerts.
+        stock_alerts.sync_stock_alerts([product.pk for product in products if product.is_stock])
+
+    def _link(self, through, column, products, id_lists):
+        through.objects.bulk_create(
+            [
+                through(product_id=product.pk, **{column: pk})
+                for product, ids in zip(products, id_lists)
+                for pk in ids
+            ],
+            batch_size=self.chunk_size,
+        )
+
+    # ---------------------------
+    # Slugs
+    # ---------------------------
+    def allocate_slugs(self, names):
+        """
+        Unique slugs for ``names`` following Product.save's ``base``, ``base-1``,
+        ``base-2`` scheme, using a couple of queries per chunk instead of one per attempt.
+        """
+        bases = []
+        for name in names:
+            base = slugify(name)[:SLUG_MAX_LENGTH - 8].strip("-") or str(uuid.uuid4())[:8]
+            bases.append(base)
+
+        unchecked = set(bases) - self._checked_bases
+        if unchecked:
+            existing = set(
+                Product.objects.filter(slug__in=unchecked).values_list("slug", flat=True)
+            )
+            self._taken_slugs |= existing
+            # Only bases that already exist can have numbered siblings worth loading.
+            existing = sorted(existing)
+            for start in range(0, len(existing), SLUG_LOOKUP_BATCH):
+                query = models.Q()
+                for base in existing[start:start + SLUG_LOOKUP_BATCH]:
+                    query |= models.Q(slug__startswith=f"{base}-")
+                self._taken_slugs.update(
+                    Product.objects.filter(query).values_list("slug", flat=True)
+                )
+            self._checked_bases |= unchecked
+
+        slugs = []
+        for base in bases:
+            slug = base
+            if slug in self._taken_slugs:
+                i = self._next_suffix.get(base, 1)
+                while f"{base}-{i}" in self._taken_slugs:
+                    i += 1
+                slug = f"{base}-{i}"
+                self._next_suffix[base] = i + 1
+            self._taken_slugs.add(slug)
+            slugs.append(slug)
+        return slugs
+
+
+def notify_import_summary(user, result, source=""):
+    """
+    One notification per admin for a vendor import, instead of one per
+    product as ``ProductViewSet.perform_create`` does.
+    """
+    if getattr(user, "role", None) != UserRole.VENDOR.value or not result.created:
+        return
+    message = f"Vendor '{user.email}' imported {result.created} products"
+    if result.failed:
+        message += f" ({result.failed} rows rejected)"
+    notify_admins(
+        message + ".",
+        ntype=NotificationType.PRODUCT,
+        sender=user,
+        meta_data={
+            "action": "products_imported",
+            "created": result.created,
+            "failed": result.failed,
+            "source": source,
+        },
+    )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from products.copurchase import ORDER_BATCH_SIZE, update_co_purchase_index
+
+
+class Command(BaseCommand):
+    help = "Fold orders created since the last run into the \"frequently bought together\" index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true",
+                            help="Drop the index and rescan every order.")
+        parser.add_argument("--batch-size", type=int, default=ORDER_BATCH_SIZE,
+                            help="Orders per transaction.")
+
+    def handle(self, *args, **options):
+        scanned, refreshed = update_co_purchase_index(
+            batch_size=options["batch_size"], rebuild=options["rebuild"]
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} orders, refreshed neighbours for {refreshed} products."
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.enums import ProductStatus
+from products.importer import (
+    DEFAULT_CHUNK_SIZE, FORMATS, ProductImporter, detect_format, notify_import_summary,
+)
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Bulk import products for a vendor from a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--vendor", required=True, help="Email of the vendor that owns the products.")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--status", choices=ProductStatus.values,
+                            help="Defaults to approved for admins and pending for vendors.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--notify", action="store_true", help="Send the summary notification to admins.")
+
+    def handle(self, *args, **options):
+        try:
+            vendor = User.objects.get(email=options["vendor"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['vendor']!r}.")
+
+        fmt = options["format"] or detect_format(options["path"])
+        if fmt is None:
+            raise CommandError("Could not tell the format from the extension; pass --format.")
+
+        importer = ProductImporter(vendor, status=options["status"], chunk_size=options["chunk_size"])
+        with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+            result = importer.import_stream(stream, fmt)
+
+        for error in result.errors:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        if options["notify"]:
+            notify_import_summary(vendor, result, source="command")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} products, {result.failed} rows rejected."
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from products.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized rating aggregates on Product from review rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--product", type=int, action="append", dest="product_ids",
+                            help="Only rebuild the given product id (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        touched = rebuild_ratings(
+            product_ids=options["product_ids"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ratings for {touched} products."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.sales import rebuild_sales_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute ProductSalesStats and ProductSalesDaily from delivered order items."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        products = rebuild_sales_stats(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales counters for {products} products."))
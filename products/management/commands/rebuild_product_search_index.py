@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.models import Product
+from products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text product search index from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if backend is None:
+            self.stderr.write("No search index backend for this database; nothing to do.")
+            return
+
+        batch_size = options["batch_size"]
+        products = (
+            Product.objects.order_by("pk")
+            .prefetch_related("categories", "tags")
+            .iterator(chunk_size=batch_size)
+        )
+
+        total = 0
+        batch = []
+        with transaction.atomic():
+            backend.clear()
+            for product in products:
+                batch.append(product)
+                if len(batch) >= batch_size:
+                    backend.index(batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                backend.index(batch)
+                total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} products."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from products.pricing import refresh_effective_prices
+
+
+class Command(BaseCommand):
+    help = "Recompute Product.effective_price / active_promotion from the promotions running now."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--product", type=int, action="append", dest="product_ids",
+                            help="Only refresh the given product id (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        changed = refresh_effective_prices(
+            product_ids=options["product_ids"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Updated effective prices for {changed} products."))
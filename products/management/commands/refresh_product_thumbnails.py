@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from products.thumbnails import BATCH_SIZE, refresh_primary_images
+
+
+class Command(BaseCommand):
+    help = "Recompute Product.primary_image / thumbnail_url from the product images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--product", type=int, action="append", dest="product_ids",
+                            help="Only refresh the given product id (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        changed = refresh_primary_images(
+            product_ids=options["product_ids"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Updated primary images for {changed} products."))
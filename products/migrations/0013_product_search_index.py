@@ -0,0 +1,88 @@
+# Generated by Django 5.2.5 on 2026-10-17 09:00
+
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_product_search USING fts5(
+        name, sku, categories, tags,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    INSERT INTO products_product_search (rowid, name, sku, categories, tags)
+    SELECT
+        p.id,
+        p.name,
+        COALESCE(p.sku, ''),
+        COALESCE((SELECT group_concat(c.name, ' ')
+                  FROM products_product_categories pc
+                  JOIN common_category c ON c.id = pc.category_id
+                  WHERE pc.product_id = p.id), ''),
+        COALESCE((SELECT group_concat(t.name, ' ')
+                  FROM products_product_tags pt
+                  JOIN common_tag t ON t.id = pt.tag_id
+                  WHERE pt.product_id = p.id), '')
+    FROM products_product p
+    """,
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE TABLE IF NOT EXISTS products_product_search (
+        product_id bigint PRIMARY KEY REFERENCES products_product (id) ON DELETE CASCADE,
+        document tsvector NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS products_product_search_document_gin
+    ON products_product_search USING GIN (document)
+    """,
+    """
+    INSERT INTO products_product_search (product_id, document)
+    SELECT
+        p.id,
+        setweight(to_tsvector('simple', p.name), 'A')
+        || setweight(to_tsvector('simple', COALESCE(p.sku, '')), 'A')
+        || setweight(to_tsvector('simple', COALESCE((
+               SELECT string_agg(c.name, ' ')
+               FROM products_product_categories pc
+               JOIN common_category c ON c.id = pc.category_id
+               WHERE pc.product_id = p.id), '')), 'B')
+        || setweight(to_tsvector('simple', COALESCE((
+               SELECT string_agg(t.name, ' ')
+               FROM products_product_tags pt
+               JOIN common_tag t ON t.id = pt.tag_id
+               WHERE pt.product_id = p.id), '')), 'C')
+    FROM products_product p
+    ON CONFLICT (product_id) DO NOTHING
+    """,
+]
+
+
+def create_search_index(apps, schema_editor):
+    statements = {
+        "sqlite": SQLITE_FORWARD,
+        "postgresql": POSTGRES_FORWARD,
+    }.get(schema_editor.connection.vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        schema_editor.execute("DROP TABLE IF EXISTS products_product_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0011_remove_reviewimage_review_delete_review_and_more'),
+        ('products', '0012_returnproduct_description'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:04
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Review = apps.get_model('review', 'Review')
+
+    rows = Review.objects.values('product_id').annotate(
+        count=Count('id'),
+        total=Sum('rating'),
+        stars_1=Count('id', filter=Q(rating__lte=1)),
+        stars_2=Count('id', filter=Q(rating=2)),
+        stars_3=Count('id', filter=Q(rating=3)),
+        stars_4=Count('id', filter=Q(rating=4)),
+        stars_5=Count('id', filter=Q(rating__gte=5)),
+    )
+    for row in rows.iterator():
+        count, total = row['count'], row['total'] or 0
+        Product.objects.filter(pk=row['product_id']).update(
+            rating_count=count,
+            rating_sum=total,
+            rating_avg=(Decimal(total) / Decimal(count)).quantize(Decimal('0.01')),
+            rating_1_count=row['stars_1'],
+            rating_2_count=row['stars_2'],
+            rating_3_count=row['stars_3'],
+            rating_4_count=row['stars_4'],
+            rating_5_count=row['stars_5'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_product_search_index'),
+        ('review', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_avg',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['rating_avg'], name='products_pr_rating__0d63e9_idx'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:18
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0014_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesStats',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales_stats', serialize=False, to='products.product')),
+                ('units_sold', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-units_sold'], name='products_pr_units_s_dd90df_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units_sold', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_daily', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'product'], name='products_pr_day_f3c9d3_idx')],
+                'unique_together': {('product', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:20
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F
+
+
+def seed_effective_price(apps, schema_editor):
+    # Running promotions are applied by `manage.py refresh_effective_prices` / the nightly beat task.
+    Product = apps.get_model('products', 'Product')
+    Product.objects.update(effective_price=F('price1'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_product_sales_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='active_promotion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.promotion'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price'], name='products_pr_effecti_8ce082_idx'),
+        ),
+        migrations.RunPython(seed_effective_price, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0016_product_effective_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='image_bytes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
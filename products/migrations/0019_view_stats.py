@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0018_co_purchase'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTrendingEpoch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('epoch', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProductViewStats',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='view_stats', serialize=False, to='products.product')),
+                ('views', models.BigIntegerField(default=0)),
+                ('trending_score', models.FloatField(default=0)),
+                ('last_viewed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-trending_score'], name='products_pr_trendin_fedc92_idx')],
+            },
+        ),
+    ]
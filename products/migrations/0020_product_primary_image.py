@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_primary_images(apps, schema_editor):
+    # Points at the originals; `manage.py refresh_product_thumbnails` switches to derivatives where they exist.
+    Product = apps.get_model('products', 'Product')
+    ProductImage = apps.get_model('products', 'ProductImage')
+    chosen = {}
+    for image in ProductImage.objects.order_by('product_id', '-is_primary', '-created_at').only('id', 'product_id', 'image'):
+        chosen.setdefault(image.product_id, image)
+    Product.objects.bulk_update(
+        [
+            Product(pk=product_id, primary_image_id=image.pk, thumbnail_url=image.image.url if image.image else '')
+            for product_id, image in chosen.items()
+        ],
+        ['primary_image', 'thumbnail_url'],
+        batch_size=500,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0019_view_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.productimage'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='thumbnail_url',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.RunPython(seed_primary_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0012_image_variants'),
+        ('products', '0020_product_primary_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='products_pr_vendor__16bf37_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['sku'], name='products_pr_sku_ca0cdc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['vendor', '-created_at'], name='products_pr_vendor__a3dca5_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:44
+
+from django.db import migrations, models
+
+
+def seed_watermark_date(apps, schema_editor):
+    # Carry the id watermark over: continue after the last order it counted that still exists.
+    Watermark = apps.get_model('products', 'ProductCoPurchaseWatermark')
+    Order = apps.get_model('orders', 'Order')
+    for watermark in Watermark.objects.filter(last_order_id__gt=0):
+        last = Order.objects.filter(pk__lte=watermark.last_order_id).order_by('-pk').values_list('order_date', 'pk').first()
+        watermark.last_order_date, watermark.last_order_id = last or (None, 0)
+        watermark.save(update_fields=['last_order_date', 'last_order_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0014_orderitem_snapshot'),
+        ('products', '0021_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productcopurchasewatermark',
+            name='last_order_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(seed_watermark_date, migrations.RunPython.noop),
+    ]
@@ -7,8 +7,8 @@ from django.conf import settings
 from decimal import Decimal
 import uuid
 from users.models import BaseModel
+from common.models import ImageVariantsModel
 from products.enums import ProductStatus, DiscountType, ReturnStatus
-from django.db.models import Avg
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
@@ -85,14 +85,49 @@ class Product(BaseModel):
     is_active = models.BooleanField(default=True, help_text="General availability toggle")
     is_approve = models.BooleanField(default=False)
 
+    # price1 after the best running promotion, maintained by products.pricing
+    effective_price = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    active_promotion = models.ForeignKey(
+        "products.Promotion", on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    # Primary image (or newest image) and its thumbnail URL, maintained by products.thumbnails
+    primary_image = models.ForeignKey(
+        "products.ProductImage", on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    thumbnail_url = models.CharField(max_length=500, blank=True, default="")
+
+    # Denormalized review aggregates, maintained by products.ratings
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, default=Decimal("0.00"))
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
     class Meta:
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["slug"]),
-            models.Index(fields=["vendor"]),
+            models.Index(fields=["sku"]),
+            # Vendor product lists (newest first); also serves vendor-only filters.
+            models.Index(fields=["vendor", "-created_at"]),
             models.Index(fields=["status", "is_active"]),
+            models.Index(fields=["rating_avg"]),
+            models.Index(fields=["effective_price"]),
         ]
 
+    # Written in place by products.ratings and products.thumbnails. A save()
+    # without update_fields leaves them out, so an instance loaded before a
+    # review or an image upload can't put the old values back.
+    MAINTAINED_FIELDS = frozenset({
+        "rating_count", "rating_sum", "rating_avg",
+        "rating_1_count", "rating_2_count", "rating_3_count", "rating_4_count", "rating_5_count",
+        "primary_image", "thumbnail_url",
+    })
+
     def __str__(self):
         return self.name
 
@@ -115,6 +150,18 @@ class Product(BaseModel):
                 slug = f"{base}-{i}"
                 i += 1
             self.slug = slug
+        if self.active_promotion_id is None:
+            self.effective_price = self.price1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "price1" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "effective_price"}
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MAINTAINED_FIELDS
+                and field.attname not in deferred
+            ]
         super().save(*args, **kwargs)
 
     @property
@@ -126,8 +173,11 @@ class Product(BaseModel):
 
     @property
     def average_rating(self):
-        agg = self.reviews.aggregate(avg=Avg('rating'))
-        return agg['avg'] or 0
+        return self.rating_avg
+
+    @property
+    def rating_histogram(self):
+        return {str(star): getattr(self, f"rating_{star}_count") for star in range(1, 6)}
 
     @property
     def available_stock(self):
@@ -148,7 +198,7 @@ class Product(BaseModel):
             return f"/products/{self.slug}/"
 
 
-class ProductImage(BaseModel):
+class ProductImage(ImageVariantsModel, BaseModel):
     product = models.ForeignKey("products.Product", on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="products/%Y/%m/%d/")
     alt_text = models.CharField(max_length=255, blank=True)
@@ -163,7 +213,8 @@ class ProductImage(BaseModel):
 
     def save(self, *args, **kwargs):
         if self.is_primary:
-            ProductImage.objects.filter(product=self.product, is_primary=True).exclude(pk=self.pk).update(is_primary=False)
+            # Only a sibling that still holds the flag is written.
+            ProductImage.objects.filter(product=self.product_id, is_primary=True).exclude(pk=self.pk).update(is_primary=False)
         super().save(*args, **kwargs)
 
 
@@ -226,6 +277,105 @@ class Promotion(BaseModel):
             return "Active"
 
 
+class ProductSalesStats(models.Model):
+    """Lifetime units sold / revenue per product, maintained by products.sales."""
+    product = models.OneToOneField(
+        "products.Product", on_delete=models.CASCADE, primary_key=True, related_name="sales_stats"
+    )
+    units_sold = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["-units_sold"])]
+
+    def __str__(self):
+        return f"{self.units_sold} sold - product #{self.product_id}"
+
+
+class ProductSalesDaily(models.Model):
+    """Per-day bucket of ProductSalesStats (returns are booked on the day they are approved)."""
+    product = models.ForeignKey("products.Product", on_delete=models.CASCADE, related_name="sales_daily")
+    day = models.DateField()
+    units_sold = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        unique_together = ("product", "day")
+        indexes = [models.Index(fields=["day", "product"])]
+
+    def __str__(self):
+        return f"{self.day}: {self.units_sold} sold - product #{self.product_id}"
+
+
+class ProductViewStats(models.Model):
+    """
+    Detail-page views per product, written in batches by products.popularity.
+    ``trending_score`` is an exponentially decayed view count scaled to
+    ProductTrendingEpoch, so scores of different products compare directly.
+    """
+    product = models.OneToOneField(
+        "products.Product", on_delete=models.CASCADE, primary_key=True, related_name="view_stats"
+    )
+    views = models.BigIntegerField(default=0)
+    trending_score = models.FloatField(default=0)
+    last_viewed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["-trending_score"])]
+
+    def __str__(self):
+        return f"{self.views} views - product #{self.product_id}"
+
+
+class ProductTrendingEpoch(models.Model):
+    """Single row: the instant ProductViewStats.trending_score values are scaled to."""
+    epoch = models.DateTimeField()
+
+    def __str__(self):
+        return f"trending scores as of {self.epoch:%Y-%m-%d %H:%M}"
+
+
+class ProductCoPurchaseCount(models.Model):
+    """
+    How many orders contained both ``product`` and ``related`` (stored in
+    both directions). The sparse co-occurrence matrix behind
+    ProductCoPurchase, maintained by products.copurchase.
+    """
+    product = models.ForeignKey("products.Product", on_delete=models.CASCADE, related_name="+")
+    related = models.ForeignKey("products.Product", on_delete=models.CASCADE, related_name="+")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("product", "related")
+        indexes = [models.Index(fields=["product", "-count"])]
+
+    def __str__(self):
+        return f"#{self.product_id} + #{self.related_id}: {self.count}"
+
+
+class ProductCoPurchase(models.Model):
+    """Top-K "frequently bought together" neighbours: ``[[product_id, count], ...]``, best first."""
+    product = models.OneToOneField(
+        "products.Product", on_delete=models.CASCADE, primary_key=True, related_name="co_purchase"
+    )
+    neighbours = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{len(self.neighbours)} neighbours - product #{self.product_id}"
+
+
+class ProductCoPurchaseWatermark(models.Model):
+    """Single row: the last order (by order_date, then id) folded into ProductCoPurchaseCount."""
+    last_order_date = models.DateTimeField(null=True, blank=True)
+    last_order_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"co-purchase index up to order #{self.last_order_id} ({self.last_order_date})"
+
+
 class ProductSpecifications(models.Model):
     product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name="specifications")
 
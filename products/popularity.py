@@ -0,0 +1,227 @@
+# products/popularity.py
+"""
+Write-behind product view counters and trending scores.
+
+``record_view`` runs on ``GET /api/products/<id>/`` and only touches a
+buffer, never the database:
+
+- ``RedisViewBuffer`` (``PRODUCT_VIEW_BUFFER_URL`` set): ``HINCRBY`` on one
+  hash shared by every web process;
+- ``LocalViewBuffer`` (the default, for development): an in-process dict
+  flushed by a daemon thread every PRODUCT_VIEW_FLUSH_SECONDS.
+
+``flush_views`` drains the buffer and writes every product in one
+multi-row ``INSERT ... ON CONFLICT DO UPDATE`` per batch, adding to
+``ProductViewStats.views`` and ``trending_score``. Celery beat runs it for
+the Redis buffer.
+
+Trending scores decay with a half-life of TRENDING_HALF_LIFE_HOURS. Rather
+than decaying every row on every write, a view at time ``t`` adds
+``2 ** ((t - epoch) / half_life)``: all scores share the same scale, so
+ordering by the column is ordering by decayed popularity. The daily
+``rebase_trending_scores`` moves the epoch forward and rescales the column
+so the weights stay small.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from products.models import ProductTrendingEpoch, ProductViewStats
+
+try:
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "products:views:pending"
+FLUSHING_KEY = "products:views:flushing:{}"
+DEFAULT_FLUSH_SECONDS = 30
+DEFAULT_HALF_LIFE_HOURS = 24
+UPSERT_BATCH_SIZE = 500
+# Scores below this after a rebase are noise; they're reset to zero.
+MIN_SCORE = 1e-6
+
+
+def half_life_seconds():
+    return getattr(settings, "TRENDING_HALF_LIFE_HOURS", DEFAULT_HALF_LIFE_HOURS) * 3600
+
+
+# ---------------------------
+# Buffers
+# ---------------------------
+class LocalViewBuffer:
+    """Per-process buffer; only meant for development and single-process deployments."""
+
+    def __init__(self, flush_seconds):
+        self.flush_seconds = flush_seconds
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def add(self, product_id):
+        with self._lock:
+            self._counts[product_id] += 1
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name="product-view-flusher", daemon=True)
+                self._flusher.start()
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        return counts
+
+    def restore(self, counts):
+        with self._lock:
+            self._counts.update(counts)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                flush_views(self)
+            except Exception:
+                logger.exception("Flushing product views failed")
+            finally:
+                connection.close()
+
+
+class RedisViewBuffer:
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+
+    def add(self, product_id):
+        self.client.hincrby(PENDING_KEY, product_id, 1)
+
+    def drain(self):
+        # RENAME is atomic: views recorded while we flush land in a fresh hash.
+        key = FLUSHING_KEY.format(uuid.uuid4().hex)
+        try:
+            self.client.rename(PENDING_KEY, key)
+        except redis.ResponseError:
+            return Counter()  # nothing buffered
+        counts = Counter({int(field): int(value) for field, value in self.client.hgetall(key).items()})
+        self.client.delete(key)
+        return counts
+
+    def restore(self, counts):
+        pipe = self.client.pipeline()
+        for product_id, n in counts.items():
+            pipe.hincrby(PENDING_KEY, product_id, n)
+        pipe.execute()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_view_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                url = getattr(settings, "PRODUCT_VIEW_BUFFER_URL", "")
+                if url and redis is not None:
+                    _buffer = RedisViewBuffer(url)
+                else:
+                    _buffer = LocalViewBuffer(getattr(settings, "PRODUCT_VIEW_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS))
+    return _buffer
+
+
+def record_view(product_id):
+    """Count one detail view. Never raises: losing a view beats failing the page."""
+    try:
+        get_view_buffer().add(product_id)
+    except Exception:
+        logger.warning("Could not buffer a view for product %s", product_id, exc_info=True)
+
+
+# ---------------------------
+# Flush
+# ---------------------------
+def decayed_score(score, epoch, now=None):
+    """``trending_score`` expressed as decayed views at ``now``."""
+    now = now or timezone.now()
+    return score * 2 ** (-(now - epoch).total_seconds() / half_life_seconds())
+
+
+def current_epoch():
+    state = ProductTrendingEpoch.objects.filter(pk=1).first()
+    if state is None:
+        state, _ = ProductTrendingEpoch.objects.get_or_create(pk=1, defaults={"epoch": timezone.now()})
+    return state.epoch
+
+
+def _upsert(rows):
+    """rows: (product_id, views, score_increment, viewed_at)."""
+    table = connection.ops.quote_name(ProductViewStats._meta.db_table)
+    placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+    params = [value for row in rows for value in row]
+    sql = (
+        f"INSERT INTO {table} (product_id, views, trending_score, last_viewed_at) "
+        f"VALUES {placeholders} "
+        f"ON CONFLICT (product_id) DO UPDATE SET "
+        f"views = {table}.views + excluded.views, "
+        f"trending_score = {table}.trending_score + excluded.trending_score, "
+        f"last_viewed_at = excluded.last_viewed_at"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def write_views(counts, now=None):
+    """Add ``counts`` ({product_id: views}) to ProductViewStats."""
+    from products.models import Product
+
+    if not counts:
+        return 0
+    now = now or timezone.now()
+    with transaction.atomic():
+        # Rebase and flush must not interleave, or the increments would use the wrong scale.
+        epoch = ProductTrendingEpoch.objects.select_for_update().filter(pk=1).values_list("epoch", flat=True).first()
+        if epoch is None:
+            epoch = current_epoch()
+        weight = 2 ** ((now - epoch).total_seconds() / half_life_seconds())
+        # Products deleted since they were viewed would violate the foreign key.
+        existing = set(Product.objects.filter(pk__in=list(counts)).values_list("pk", flat=True))
+        rows = [(pk, n, n * weight, now) for pk, n in sorted(counts.items()) if pk in existing]
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            _upsert(rows[start:start + UPSERT_BATCH_SIZE])
+    return len(rows)
+
+
+def flush_views(buffer=None):
+    """Move buffered views into the database; returns the number of products written."""
+    buffer = buffer or get_view_buffer()
+    counts = buffer.drain()
+    if not counts:
+        return 0
+    try:
+        return write_views(counts)
+    except Exception:
+        buffer.restore(counts)
+        raise
+
+
+def rebase_trending_scores(now=None):
+    """Move the epoch to ``now`` and rescale every score to it."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        state = ProductTrendingEpoch.objects.select_for_update().filter(pk=1).first()
+        if state is None:
+            ProductTrendingEpoch.objects.create(pk=1, epoch=now)
+            return
+        factor = 2 ** (-(now - state.epoch).total_seconds() / half_life_seconds())
+        scored = ProductViewStats.objects.filter(trending_score__gt=0)
+        scored.filter(trending_score__lt=MIN_SCORE / factor).update(trending_score=0)
+        scored.update(trending_score=F("trending_score") * factor)
+        state.epoch = now
+        state.save(update_fields=["epoch"])
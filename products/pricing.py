@@ -0,0 +1,118 @@
+# products/pricing.py
+"""
+Materialized promotion prices.
+
+``Product.effective_price`` is ``price1`` after the best promotion running
+right now and ``Product.active_promotion`` is that promotion (or null).
+They are recomputed:
+
+- when a promotion is saved, deleted or its product set changes (products.signals);
+- when a product under a promotion changes price (products.signals);
+- at promotion window boundaries, by the ``refresh_promotion_boundaries``
+  Celery beat task (see CELERY_BEAT_SCHEDULE), with a nightly full refresh
+  as a safety net.
+
+Readers (listing filters/sorting, checkout) use the columns as-is.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Q
+from django.utils import timezone
+
+from products import facets
+from products.models import Product, Promotion
+
+# How far back the boundary task looks; overlapping runs are harmless.
+BOUNDARY_LOOKBACK = timedelta(minutes=5)
+
+
+def best_price(base_price, promotions):
+    """Lowest price any of ``promotions`` gives for ``base_price`` -> (price, promotion or None)."""
+    price, chosen = base_price, None
+    for promotion in promotions:
+        candidate = promotion.calculate_discounted_price(base_price)
+        if candidate < price:
+            price, chosen = candidate, promotion
+    return price.quantize(Decimal("0.01")), chosen
+
+
+def running_promotions(now=None):
+    now = now or timezone.now()
+    return Promotion.objects.filter(is_active=True, start_datetime__lte=now, end_datetime__gt=now)
+
+
+def refresh_effective_prices(product_ids=None, now=None, batch_size=500):
+    """Recompute effective_price/active_promotion; returns the number of products that changed."""
+    now = now or timezone.now()
+    products = Product.objects.only("pk", "price1", "effective_price", "active_promotion_id").order_by("pk")
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return 0
+        products = products.filter(pk__in=product_ids)
+
+    through = Promotion.products.through
+    changed_total = 0
+    batch = []
+
+    def flush(batch):
+        promotions_by_product = defaultdict(list)
+        links = through.objects.filter(
+            product_id__in=[p.pk for p in batch],
+            promotion__in=running_promotions(now),
+        ).select_related("promotion")
+        for link in links:
+            promotions_by_product[link.product_id].append(link.promotion)
+
+        changed = []
+        for product in batch:
+            price, promotion = best_price(product.price1, promotions_by_product.get(product.pk, ()))
+            promotion_id = promotion.pk if promotion else None
+            if product.effective_price != price or product.active_promotion_id != promotion_id:
+                product.effective_price = price
+                product.active_promotion_id = promotion_id
+                changed.append(product)
+        if changed:
+            Product.objects.bulk_update(changed, ["effective_price", "active_promotion"])
+        return len(changed)
+
+    for product in products.iterator(chunk_size=batch_size):
+        batch.append(product)
+        if len(batch) >= batch_size:
+            changed_total += flush(batch)
+            batch = []
+    if batch:
+        changed_total += flush(batch)
+    if changed_total:
+        # bulk_update skips post_save; price bands moved.
+        facets.bump_facet_version()
+    return changed_total
+
+
+def refresh_promotion_products(promotion_ids, now=None):
+    product_ids = set(
+        Promotion.products.through.objects.filter(promotion_id__in=promotion_ids)
+        .values_list("product_id", flat=True)
+    )
+    # Products still pointing at the promotion even though the link is gone.
+    product_ids |= set(
+        Product.objects.filter(active_promotion_id__in=promotion_ids).values_list("pk", flat=True)
+    )
+    return refresh_effective_prices(product_ids, now=now)
+
+
+def refresh_promotion_boundaries(now=None, lookback=BOUNDARY_LOOKBACK):
+    """Refresh products of promotions that started or ended within ``lookback``."""
+    now = now or timezone.now()
+    since = now - lookback
+    promotion_ids = list(
+        Promotion.objects.filter(
+            Q(start_datetime__gt=since, start_datetime__lte=now)
+            | Q(end_datetime__gt=since, end_datetime__lte=now)
+        ).values_list("pk", flat=True)
+    )
+    if not promotion_ids:
+        return 0
+    return refresh_promotion_products(promotion_ids, now=now)
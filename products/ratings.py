@@ -0,0 +1,100 @@
+# products/ratings.py
+"""
+Incremental maintenance of the denormalized rating columns on Product
+(rating_count, rating_sum, rating_avg and the 1-5 star histogram).
+
+Review writes call ``apply_rating_change`` with a +1/-1 delta so every update
+is a single atomic ``UPDATE ... SET col = col + n`` without reading the row.
+``rebuild_ratings`` recomputes everything from the review table.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+from products.models import Product
+
+RATING_MIN = 1
+RATING_MAX = 5
+
+
+def _bucket(rating):
+    return min(max(int(rating), RATING_MIN), RATING_MAX)
+
+
+def apply_rating_change(product_id, rating, delta):
+    """Add (delta=1) or remove (delta=-1) one review with ``rating`` from a product's aggregates."""
+    if not product_id or rating is None:
+        return
+    rating = int(rating)
+    new_count = F("rating_count") + delta
+    new_sum = F("rating_sum") + rating * delta
+
+    Product.objects.filter(pk=product_id).update(
+        rating_count=new_count,
+        rating_sum=new_sum,
+        # The right-hand side sees the pre-update row, so derive the average from old + delta.
+        rating_avg=Coalesce(
+            Round(Cast(new_sum, FloatField()) / NullIf(new_count, 0), 2),
+            Value(0.0),
+        ),
+        **{f"rating_{_bucket(rating)}_count": F(f"rating_{_bucket(rating)}_count") + delta},
+    )
+
+
+def rebuild_ratings(product_ids=None, batch_size=1000):
+    """Recompute rating aggregates from reviews. Returns the number of products touched."""
+    from review.models import Review
+
+    products = Product.objects.all()
+    reviews = Review.objects.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+        reviews = reviews.filter(product_id__in=product_ids)
+
+    aggregates = {
+        row["product_id"]: row
+        for row in reviews.values("product_id").annotate(
+            count=Count("id"),
+            total=Sum("rating"),
+            **{
+                f"stars_{star}": Count(
+                    "id",
+                    filter=(
+                        Q(rating__lte=RATING_MIN) if star == RATING_MIN
+                        else Q(rating__gte=RATING_MAX) if star == RATING_MAX
+                        else Q(rating=star)
+                    ),
+                )
+                for star in range(RATING_MIN, RATING_MAX + 1)
+            },
+        )
+    }
+
+    fields = ["rating_count", "rating_sum", "rating_avg"] + [
+        f"rating_{star}_count" for star in range(RATING_MIN, RATING_MAX + 1)
+    ]
+    touched = 0
+    batch = []
+    with transaction.atomic():
+        for product in products.only("pk").iterator(chunk_size=batch_size):
+            row = aggregates.get(product.pk)
+            count = row["count"] if row else 0
+            total = (row["total"] or 0) if row else 0
+            product.rating_count = count
+            product.rating_sum = total
+            product.rating_avg = (
+                (Decimal(total) / Decimal(count)).quantize(Decimal("0.01")) if count else Decimal("0.00")
+            )
+            for star in range(RATING_MIN, RATING_MAX + 1):
+                setattr(product, f"rating_{star}_count", row[f"stars_{star}"] if row else 0)
+            batch.append(product)
+            if len(batch) >= batch_size:
+                Product.objects.bulk_update(batch, fields)
+                touched += len(batch)
+                batch = []
+        if batch:
+            Product.objects.bulk_update(batch, fields)
+            touched += len(batch)
+    return touched
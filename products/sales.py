@@ -0,0 +1,162 @@
+# products/sales.py
+"""
+Incremental maintenance of ProductSalesStats / ProductSalesDaily.
+
+An order item counts as sold once the item itself or its order is
+``delivered``, and stops counting when a return for it is approved. Status
+transitions call into this module with the previous and new status; each
+affected product then gets an ``UPDATE ... SET units_sold = units_sold + n``
+(or an insert for its first sale of the day). ``rebuild_sales_stats``
+recomputes both tables from order items.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from orders.enums import OrderStatus
+from products.enums import ReturnStatus
+from products.models import ProductSalesDaily, ProductSalesStats
+
+DELIVERED = OrderStatus.DELIVERED.value
+
+
+def _bump(model, keys, units, revenue):
+    changes = {"units_sold": F("units_sold") + units, "revenue": F("revenue") + revenue}
+    if model.objects.filter(**keys).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, units_sold=units, revenue=revenue)
+    except IntegrityError:
+        # Created concurrently between our UPDATE and INSERT.
+        model.objects.filter(**keys).update(**changes)
+
+
+def apply_sales(items, sign, day=None):
+    """
+    Add (sign=1) or remove (sign=-1) ``items`` — an iterable of
+    ``(product_id, quantity, price)`` — from the sales counters.
+    """
+    totals = defaultdict(lambda: [0, Decimal("0.00")])
+    for product_id, quantity, price in items:
+        if not product_id or not quantity:
+            continue
+        totals[product_id][0] += quantity
+        totals[product_id][1] += (price or Decimal("0.00")) * quantity
+    if not totals:
+        return
+
+    day = day or timezone.localdate()
+    with transaction.atomic():
+        for product_id, (units, revenue) in totals.items():
+            units, revenue = units * sign, revenue * sign
+            _bump(ProductSalesStats, {"product_id": product_id}, units, revenue)
+            _bump(ProductSalesDaily, {"product_id": product_id, "day": day}, units, revenue)
+
+
+def _not_returned(items):
+    return items.exclude(return_requests__status=ReturnStatus.APPROVED)
+
+
+# ---------------------------
+# Transitions
+# ---------------------------
+def order_status_changed(order_id, old_status, new_status):
+    """Items not delivered on their own follow their order in and out of ``delivered``."""
+    from orders.models import OrderItem
+
+    was, now = old_status == DELIVERED, new_status == DELIVERED
+    if was == now:
+        return
+    items = _not_returned(OrderItem.objects.filter(order_id=order_id).exclude(status=DELIVERED))
+    apply_sales(items.values_list("product_id", "quantity", "price"), 1 if now else -1)
+
+
+def orders_status_changed(previous_statuses, new_status):
+    """Bulk variant for ``QuerySet.update``: ``previous_statuses`` maps order id -> old status."""
+    for order_id, old_status in previous_statuses.items():
+        order_status_changed(order_id, old_status, new_status)
+
+
+def order_item_status_changed(item, old_status, new_status):
+    from orders.models import Order
+
+    was, now = old_status == DELIVERED, new_status == DELIVERED
+    if was == now:
+        return
+    # Already counted (or not) through its order.
+    if Order.objects.filter(pk=item.order_id, order_status=DELIVERED).exists():
+        return
+    if item.return_requests.filter(status=ReturnStatus.APPROVED).exists():
+        return
+    apply_sales([(item.product_id, item.quantity, item.price)], 1 if now else -1)
+
+
+def return_status_changed(return_request, old_status, new_status):
+    was, now = old_status == ReturnStatus.APPROVED, new_status == ReturnStatus.APPROVED
+    if was == now:
+        return
+    item = return_request.order_item
+    if item.status != DELIVERED and item.order.order_status != DELIVERED:
+        return
+    # Another approved return for the same item already took it off the counters.
+    others = item.return_requests.filter(status=ReturnStatus.APPROVED).exclude(pk=return_request.pk)
+    if others.exists():
+        return
+    apply_sales([(item.product_id, item.quantity, item.price)], -1 if now else 1)
+
+
+# ---------------------------
+# Rebuild
+# ---------------------------
+def rebuild_sales_stats(batch_size=1000):
+    """
+    Recompute both tables from order items. Returned items are left out of
+    their delivery day rather than booked against the return day.
+    Returns the number of products with sales.
+    """
+    from orders.models import OrderItem
+
+    sold = _not_returned(
+        OrderItem.objects.filter(
+            Q(status=DELIVERED) | Q(order__order_status=DELIVERED), product__isnull=False
+        )
+    )
+    line_total = ExpressionWrapper(F("price") * F("quantity"), output_field=DecimalField(max_digits=14, decimal_places=2))
+    daily_rows = (
+        sold.annotate(day=TruncDate(Coalesce("order__delivery_date", "order__updated_at")))
+        .values("product_id", "day")
+        .annotate(units=Sum("quantity"), revenue=Sum(line_total))
+        .order_by()
+    )
+
+    totals = defaultdict(lambda: [0, Decimal("0.00")])
+    with transaction.atomic():
+        ProductSalesDaily.objects.all().delete()
+        ProductSalesStats.objects.all().delete()
+
+        batch = []
+        for row in daily_rows.iterator(chunk_size=batch_size):
+            revenue = row["revenue"] or Decimal("0.00")
+            totals[row["product_id"]][0] += row["units"]
+            totals[row["product_id"]][1] += revenue
+            batch.append(ProductSalesDaily(
+                product_id=row["product_id"], day=row["day"], units_sold=row["units"], revenue=revenue,
+            ))
+            if len(batch) >= batch_size:
+                ProductSalesDaily.objects.bulk_create(batch)
+                batch = []
+        ProductSalesDaily.objects.bulk_create(batch)
+
+        ProductSalesStats.objects.bulk_create(
+            [
+                ProductSalesStats(product_id=product_id, units_sold=units, revenue=revenue)
+                for product_id, (units, revenue) in totals.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(totals)
@@ -0,0 +1,203 @@
+# products/search.py
+"""
+Full-text search index for products.
+
+The index lives in its own table (``products_product_search``):
+- SQLite: an FTS5 virtual table keyed by the product rowid, ranked with bm25.
+- PostgreSQL: a ``tsvector`` column with a GIN index, ranked with ts_rank.
+
+Rows are kept in sync by ``products.signals`` and can be rebuilt with
+``python manage.py rebuild_product_search_index``.
+
+``search`` joins the index table to the product query (``extra(tables=...)``)
+so the matches and their rank come out of one pass over the index. A
+correlated rank subquery would re-run the match, and on SQLite rebuild the
+bm25 statistics, once per result row.
+"""
+import logging
+import re
+
+from django.db import connection
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = "products_product_search"
+MAX_SEARCH_TERMS = 10
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(query):
+    """Split a user query into lowercase word tokens (safe to embed in MATCH / tsquery)."""
+    return _TOKEN_RE.findall((query or "").lower())[:MAX_SEARCH_TERMS]
+
+
+def build_document(product):
+    """Flatten the searchable fields of a product into plain text columns."""
+    return (
+        product.name or "",
+        product.sku or "",
+        " ".join(c.name for c in product.categories.all()),
+        " ".join(t.name for t in product.tags.all()),
+    )
+
+
+# ---------------------------
+# Backends
+# ---------------------------
+class SQLiteSearchBackend:
+    vendor = "sqlite"
+    # bm25 column weights: name, sku, categories, tags
+    weights = (10.0, 5.0, 2.0, 1.0)
+
+    def index(self, products):
+        rows = [(p.pk, *build_document(p)) for p in products]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(row[0],) for row in rows]
+            )
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, name, sku, categories, tags) "
+                f"VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(pk,) for pk in product_ids]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    def search(self, queryset, terms):
+        # Every term must match; the trailing * gives prefix matching for search-as-you-type.
+        match = " ".join(f'"{term}"*' for term in terms)
+        index, table = connection.ops.quote_name(SEARCH_TABLE), connection.ops.quote_name(queryset.model._meta.db_table)
+        weights = ", ".join(str(w) for w in self.weights)
+        return queryset.extra(
+            tables=[SEARCH_TABLE],
+            where=[f"{index}.rowid = {table}.id", f"{index} MATCH %s"],
+            params=[match],
+            # bm25() is "lower is better", negate it so that higher rank = better match.
+            select={"search_rank": f"-bm25({index}, {weights})"},
+        )
+
+
+class PostgresSearchBackend:
+    vendor = "postgresql"
+    config = "simple"
+
+    def index(self, products):
+        rows = [(p.pk, *build_document(p)) for p in products]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"""
+                INSERT INTO {SEARCH_TABLE} (product_id, document)
+                VALUES (
+                    %s,
+                    setweight(to_tsvector('{self.config}', %s), 'A')
+                    || setweight(to_tsvector('{self.config}', %s), 'A')
+                    || setweight(to_tsvector('{self.config}', %s), 'B')
+                    || setweight(to_tsvector('{self.config}', %s), 'C')
+                )
+                ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document
+                """,
+                rows,
+            )
+
+    def remove(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE product_id = ANY(%s)", [list(product_ids)]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {SEARCH_TABLE}")
+
+    def search(self, queryset, terms):
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        index, table = connection.ops.quote_name(SEARCH_TABLE), connection.ops.quote_name(queryset.model._meta.db_table)
+        query = f"to_tsquery('{self.config}', %s)"
+        return queryset.extra(
+            tables=[SEARCH_TABLE],
+            where=[f"{index}.product_id = {table}.id", f"{index}.document @@ {query}"],
+            params=[tsquery],
+            select={"search_rank": f"ts_rank({index}.document, {query})"},
+            select_params=[tsquery],
+        )
+
+
+_BACKENDS = {
+    SQLiteSearchBackend.vendor: SQLiteSearchBackend,
+    PostgresSearchBackend.vendor: PostgresSearchBackend,
+}
+
+
+def get_search_backend():
+    """Return the index backend for the active database, or None if unsupported."""
+    backend_class = _BACKENDS.get(connection.vendor)
+    return backend_class() if backend_class else None
+
+
+# ---------------------------
+# Index maintenance
+# ---------------------------
+def index_products(products):
+    backend = get_search_backend()
+    if backend is not None:
+        backend.index(products)
+
+
+def reindex_product_ids(product_ids, batch_size=500):
+    from products.models import Product
+
+    backend = get_search_backend()
+    if backend is None:
+        return
+    product_ids = list(product_ids)
+    for start in range(0, len(product_ids), batch_size):
+        chunk = product_ids[start:start + batch_size]
+        products = Product.objects.filter(pk__in=chunk).prefetch_related("categories", "tags")
+        backend.index(products)
+
+
+def remove_products(product_ids):
+    backend = get_search_backend()
+    if backend is not None:
+        backend.remove(product_ids)
+
+
+# ---------------------------
+# DRF filter
+# ---------------------------
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for ``SearchFilter`` that answers ``?search=`` from the
+    full-text index. Results are ordered by relevance unless the client asks
+    for an explicit ``?ordering=``. Falls back to the regular ``search_fields``
+    lookup on databases without an index backend.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        backend = get_search_backend()
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+
+        terms = tokenize(request.query_params.get(self.search_param, ""))
+        if not terms:
+            return queryset
+
+        queryset = backend.search(queryset, terms)
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by("-search_rank", "-created_at")
+        return queryset
@@ -3,10 +3,13 @@ from products.models import Product, ProductImage, Promotion, ReturnProduct, Pro
 from common.models import Category, Tag, SEO, ImageUpload
 from products.enums import DiscountType
 from django.db.models import Q
+from decimal import Decimal
 from users.enums import UserRole
 from orders.models import OrderItem
 from orders.enums import OrderStatus
 from review.models import Review
+from common.fieldsets import SparseFieldsetMixin
+from common.images import SrcsetField, ThumbnailField, build_srcset
 
 
 
@@ -41,9 +44,15 @@ class PromotionSerializer(serializers.ModelSerializer):
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    width = serializers.IntegerField(source="image_width", read_only=True)
+    height = serializers.IntegerField(source="image_height", read_only=True)
+    srcset = SrcsetField()
+    thumbnail = ThumbnailField()
+    thumbnail_jpeg = ThumbnailField(fmt="jpeg")
+
     class Meta:
         model = ProductImage
-        fields = ["id", "image", "created_at"]
+        fields = ["id", "image", "width", "height", "srcset", "thumbnail", "thumbnail_jpeg", "created_at"]
 
 
 
@@ -99,10 +108,10 @@ class ProductReviewInlineSerializer(serializers.ModelSerializer):
 
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     prod_id = serializers.CharField(read_only=True)
     vendor = serializers.HiddenField(default=serializers.CurrentUserDefault())
-    vendor_id = serializers.IntegerField(source="vendor.id", read_only=True)
+    vendor_id = serializers.IntegerField(read_only=True)
     vendor_details = serializers.SerializerMethodField()
     categories = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Category.objects.all(), required=False
@@ -121,7 +130,8 @@ class ProductSerializer(serializers.ModelSerializer):
     )
     reviews = ProductReviewInlineSerializer(many=True, read_only=True)
     
-    average_rating = serializers.SerializerMethodField()
+    average_rating = serializers.FloatField(source="rating_avg", read_only=True)
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
 
     specifications = serializers.SerializerMethodField()
 
@@ -137,23 +147,25 @@ class ProductSerializer(serializers.ModelSerializer):
             "is_stock", "stock_quantity",
             "home_delivery", "pickup", "partner_delivery", "estimated_delivery_days",
             "status", "featured", "is_active",
-            "images", "uploaded_images",
+            "images", "uploaded_images", "primary_image", "thumbnail_url",
             "created_at", "updated_at", "is_approve",
-            "specifications", "average_rating", "reviews", 
+            "specifications", "average_rating", "rating_count", "rating_histogram", "reviews", 
+            "effective_price", "active_promotion",
         ]
         read_only_fields = [
-            "id", "average_rating", "vendor", "vendor_id", "slug", "status", "featured",
+            "id", "average_rating", "rating_count", "vendor", "vendor_id", "slug", "status", "featured",
+            "effective_price", "active_promotion", "primary_image", "thumbnail_url",
             "created_at", "updated_at", "is_active", "is_approve",
         ]
         ref_name = "ProductsProductSerializer"
-
-
-    def get_average_rating(self, obj):
-        reviews = obj.reviews.all()
-        if not reviews.exists():
-            return 0
-        total = sum([r.rating for r in reviews])
-        return round(total / reviews.count(), 2)  
+        related_fields = {
+            "vendor_details": ("select", "vendor"),
+            "specifications": ("select", "specifications"),
+            "categories": ("prefetch", "categories"),
+            "tags": ("prefetch", "tags"),
+            "images": ("prefetch", "images"),
+            "reviews": ("prefetch", "reviews__user"),
+        }
 
 
     def get_vendor_details(self, obj):
@@ -162,10 +174,10 @@ class ProductSerializer(serializers.ModelSerializer):
 
     def get_specifications(self, obj):
         try:
-            specs = ProductSpecifications.objects.get(product=obj)
-            return ProductSpecificationsSerializer(specs).data
+            specs = obj.specifications
         except ProductSpecifications.DoesNotExist:
             return None
+        return ProductSpecificationsSerializer(specs).data
         
     def create(self, validated_data):
         categories = validated_data.pop("categories", [])
@@ -209,7 +221,11 @@ class ProductSerializer(serializers.ModelSerializer):
         uploaded_images = validated_data.pop("uploaded_images", [])
         specs_data = validated_data.pop("specifications", None)
 
-        product = super().update(instance, validated_data)
+        # Only the submitted columns: stock may have been reserved since the instance was loaded.
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, "updated_at"])
+        product = instance
 
         if categories is not None:
             product.categories.set(categories)
@@ -244,9 +260,58 @@ class ProductSerializer(serializers.ModelSerializer):
 
 
 
-class VendorProductSerializer(serializers.ModelSerializer):
+class ProductImportRowSerializer(serializers.Serializer):
+    """
+    One row of a bulk product import (see products.importer). Categories and
+    tags arrive as names and are resolved to ids by the importer.
+    """
+    name = serializers.CharField(max_length=255)
+    sku = serializers.CharField(max_length=64, required=False, allow_blank=True, allow_null=True)
+    short_description = serializers.CharField(max_length=500, required=False, allow_blank=True)
+    full_description = serializers.CharField(required=False, allow_blank=True)
+
+    price1 = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal("0.00"))
+    price2 = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal("0.00"), required=False, allow_null=True)
+    price3 = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal("0.00"), required=False, allow_null=True)
+
+    option1 = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    option2 = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    option3 = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    option4 = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+    is_stock = serializers.BooleanField(required=False, default=True)
+    stock_quantity = serializers.IntegerField(min_value=0, required=False, default=0)
+
+    home_delivery = serializers.BooleanField(required=False, default=False)
+    pickup = serializers.BooleanField(required=False, default=False)
+    partner_delivery = serializers.BooleanField(required=False, default=False)
+    estimated_delivery_days = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+
+    categories = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    tags = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    specifications = ProductSpecificationsSerializer(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        # Same rules as Product.clean(), which bulk_create does not run.
+        delivers = attrs.get("home_delivery") or attrs.get("partner_delivery") or attrs.get("pickup")
+        if delivers and attrs.get("estimated_delivery_days") is None:
+            raise serializers.ValidationError(
+                {"estimated_delivery_days": "Set estimated_delivery_days when product supports delivery/pickup."}
+            )
+        return attrs
+
+
+
+
+
+
+
+
+class VendorProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     prod_id = serializers.CharField(read_only=True)
     image = serializers.SerializerMethodField()
+    image_thumbnail = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     categories = serializers.StringRelatedField(many=True, read_only=True)
     price = serializers.DecimalField(source='active_price', max_digits=12, decimal_places=2, read_only=True)
 
@@ -256,19 +321,33 @@ class VendorProductSerializer(serializers.ModelSerializer):
             'prod_id',
             'name',
             'image',
+            'image_thumbnail',
+            'image_srcset',
             'categories',
             'price',
             'stock_quantity',
             'status',
         ]
-        read_only_fields = ['prod_id', 'name', 'image', 'categories', 'price', 'stock_quantity', 'status']
+        read_only_fields = ['prod_id', 'name', 'image', 'image_thumbnail', 'image_srcset', 'categories', 'price', 'stock_quantity', 'status']
+        related_fields = {
+            "categories": ("prefetch", "categories"),
+            "image": ("select", "primary_image"),
+            "image_srcset": ("select", "primary_image"),
+        }
 
     def get_image(self, obj):
-        primary_img = obj.images.filter(is_primary=True).first()
+        primary_img = obj.primary_image
         if primary_img:
             return primary_img.image.url
         return None
 
+    def get_image_thumbnail(self, obj):
+        return obj.thumbnail_url or None
+
+    def get_image_srcset(self, obj):
+        primary_img = obj.primary_image
+        return build_srcset(primary_img) if primary_img else ""
+
 
 
 
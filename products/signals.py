@@ -0,0 +1,185 @@
+# products/signals.py
+from django.db.models.signals import post_save, post_delete, m2m_changed, pre_delete, pre_save
+from django.db import transaction
+from django.dispatch import receiver
+
+from common.models import Category, Tag
+from common.images import derivatives_generated
+from products import facets, pricing, sales, search, thumbnails
+from products.models import Product, ProductImage, Promotion, ReturnProduct
+
+
+# ---------------------------
+# Search index sync
+# ---------------------------
+@receiver(post_save, sender=Product)
+def index_product_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_products([instance])
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_index(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+def _reindex_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # instance is a Category/Tag; pk_set holds product ids
+        if action == "pre_clear":
+            instance._search_reindex_ids = list(instance.products.values_list("pk", flat=True))
+        elif action == "post_clear":
+            search.reindex_product_ids(getattr(instance, "_search_reindex_ids", []))
+        elif action in ("post_add", "post_remove") and pk_set:
+            search.reindex_product_ids(pk_set)
+        return
+
+    if action in ("post_add", "post_remove", "post_clear"):
+        search.reindex_product_ids([instance.pk])
+
+
+m2m_changed.connect(
+    _reindex_on_m2m_change, sender=Product.categories.through, dispatch_uid="product_search_categories"
+)
+m2m_changed.connect(
+    _reindex_on_m2m_change, sender=Product.tags.through, dispatch_uid="product_search_tags"
+)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+def reindex_products_on_label_rename(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    search.reindex_product_ids(instance.products.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Tag)
+def remember_products_before_label_delete(sender, instance, **kwargs):
+    instance._search_reindex_ids = list(instance.products.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+def reindex_products_after_label_delete(sender, instance, **kwargs):
+    search.reindex_product_ids(getattr(instance, "_search_reindex_ids", []))
+
+
+# ---------------------------
+# Primary image / thumbnail
+# ---------------------------
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def refresh_product_primary_image(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    thumbnails.refresh_primary_images([instance.product_id])
+
+
+@receiver(derivatives_generated, sender=ProductImage)
+def refresh_product_thumbnail(sender, instance, **kwargs):
+    thumbnails.refresh_primary_images([instance.product_id])
+
+
+# ---------------------------
+# Facet cache
+# ---------------------------
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_facets(sender, raw=False, **kwargs):
+    if not raw:
+        facets.bump_facet_version()
+
+
+def _invalidate_facets_on_m2m_change(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        facets.bump_facet_version()
+
+
+m2m_changed.connect(
+    _invalidate_facets_on_m2m_change, sender=Product.categories.through, dispatch_uid="product_facets_categories"
+)
+m2m_changed.connect(
+    _invalidate_facets_on_m2m_change, sender=Product.tags.through, dispatch_uid="product_facets_tags"
+)
+
+
+# ---------------------------
+# Product sales counters
+# ---------------------------
+@receiver(pre_save, sender=ReturnProduct)
+def remember_previous_return_status(sender, instance, raw=False, **kwargs):
+    instance._previous_status = None
+    if not raw and instance.pk:
+        instance._previous_status = (
+            ReturnProduct.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=ReturnProduct)
+def update_sales_on_return_status(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sales.return_status_changed(instance, getattr(instance, "_previous_status", None), instance.status)
+
+
+# ---------------------------
+# Effective prices
+# ---------------------------
+PRICE_FIELDS = {"price1", "effective_price", "active_promotion"}
+
+
+@receiver(post_save, sender=Product)
+def refresh_promoted_price_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Product.save() copies price1 when it believes no promotion runs; the
+    # instance may be stale, so let the promotion links have the last word.
+    if raw or created or (update_fields is not None and not PRICE_FIELDS & set(update_fields)):
+        return
+    pricing.refresh_effective_prices([instance.pk])
+
+
+@receiver(post_save, sender=Promotion)
+def refresh_prices_on_promotion_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: pricing.refresh_promotion_products([instance.pk]))
+
+
+@receiver(pre_delete, sender=Promotion)
+def remember_promoted_products(sender, instance, **kwargs):
+    instance._promoted_product_ids = list(
+        Product.objects.filter(active_promotion=instance).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Promotion)
+def refresh_prices_on_promotion_delete(sender, instance, **kwargs):
+    product_ids = getattr(instance, "_promoted_product_ids", [])
+    transaction.on_commit(lambda: pricing.refresh_effective_prices(product_ids))
+
+
+def _refresh_prices_on_promotion_products_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # instance is a Product
+        if action in ("post_add", "post_remove", "post_clear"):
+            pricing.refresh_effective_prices([instance.pk])
+        return
+    if action == "pre_clear":
+        instance._promoted_product_ids = list(instance.products.values_list("pk", flat=True))
+    elif action == "post_clear":
+        pricing.refresh_effective_prices(getattr(instance, "_promoted_product_ids", []))
+    elif action in ("post_add", "post_remove") and pk_set:
+        pricing.refresh_effective_prices(pk_set)
+
+
+m2m_changed.connect(
+    _refresh_prices_on_promotion_products_change,
+    sender=Promotion.products.through,
+    dispatch_uid="product_effective_price_promotions",
+)
@@ -0,0 +1,34 @@
+# products/tasks.py
+from celery import shared_task
+
+from products import copurchase, popularity, pricing
+
+
+@shared_task
+def refresh_promotion_boundaries():
+    """Beat: apply promotions that started or ended since the last few runs."""
+    return pricing.refresh_promotion_boundaries()
+
+
+@shared_task
+def refresh_all_effective_prices():
+    """Beat (nightly): full recompute in case a boundary run was missed."""
+    return pricing.refresh_effective_prices()
+
+
+@shared_task
+def update_co_purchase_index():
+    """Beat (daily): fold the day's orders into the "frequently bought together" index."""
+    return copurchase.update_co_purchase_index()
+
+
+@shared_task(ignore_result=True)
+def flush_product_views():
+    """Beat: write buffered detail-page views to ProductViewStats."""
+    return popularity.flush_views()
+
+
+@shared_task
+def rebase_trending_scores():
+    """Beat (daily): keep trending score weights small; see products.popularity."""
+    return popularity.rebase_trending_scores()
@@ -0,0 +1,59 @@
+# products/thumbnails.py
+"""
+Denormalized ``Product.primary_image`` / ``Product.thumbnail_url``.
+
+The primary image is the one flagged ``is_primary``, else the newest image
+(``ProductImage.Meta.ordering``). ``thumbnail_url`` is that image's
+thumbnail derivative (common.images), or the original until the derivatives
+exist. List serializers read both columns instead of walking each
+product's images.
+
+Kept up to date by products.signals when images are added, removed,
+re-flagged or get their derivatives; ``manage.py refresh_product_thumbnails``
+(and the migration adding the columns) backfill them. The writes go through
+``bulk_update`` on these two columns only, and ``Product.save()`` leaves
+them out unless named in ``update_fields`` (Product.MAINTAINED_FIELDS).
+"""
+from common.images import thumbnail_url
+from products.models import Product, ProductImage
+
+BATCH_SIZE = 500
+
+
+def _thumbnail(image):
+    if image is None or not image.image:
+        return ""
+    return thumbnail_url(image) or ""
+
+
+def refresh_primary_images(product_ids=None, batch_size=BATCH_SIZE):
+    """
+    Recompute the columns for ``product_ids`` (all products when None), two
+    queries plus the writes per batch. Returns the number of products changed.
+    """
+    if product_ids is None:
+        ids = iter(list(Product.objects.order_by("pk").values_list("pk", flat=True)))
+    else:
+        ids = iter(sorted(set(product_ids)))
+
+    changed_total = 0
+    while True:
+        batch = [pk for _, pk in zip(range(batch_size), ids)]
+        if not batch:
+            break
+        chosen = {}
+        for image in ProductImage.objects.filter(product_id__in=batch).order_by(
+            "product_id", *ProductImage._meta.ordering
+        ):
+            chosen.setdefault(image.product_id, image)
+
+        changed = []
+        for product in Product.objects.filter(pk__in=batch).only("pk", "primary_image", "thumbnail_url"):
+            image = chosen.get(product.pk)
+            image_id, url = (image.pk if image else None), _thumbnail(image)
+            if product.primary_image_id != image_id or product.thumbnail_url != url:
+                product.primary_image_id, product.thumbnail_url = image_id, url
+                changed.append(product)
+        Product.objects.bulk_update(changed, ["primary_image", "thumbnail_url"])
+        changed_total += len(changed)
+    return changed_total
@@ -18,6 +18,7 @@ from django.db.models import Case, When, IntegerField
 from rest_framework.permissions import BasePermission
 from rest_framework import filters
 from rest_framework.pagination import PageNumberPagination
+from common.pagination import SelectablePaginationMixin
 from django.db.models import Sum, Case, When, DecimalField
 from users.enums import UserRole
 from orders.models import OrderItem, OrderStatus, Order
@@ -26,6 +27,8 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Sum
 from django.db import models
 from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from datetime import timedelta
 from products.models import Promotion, Product
 from products.serializers import PromotionSerializer,VendorProductSerializer
 from products.models import ReturnProduct
@@ -33,9 +36,20 @@ from products.serializers import ReturnProductSerializer
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from products.enums import ReturnStatus
-from notification.utils import send_notification_to_user, NotificationType
+from notification.utils import notify_admins, send_notification_to_user, NotificationType
 from users.models import User
 from orders.serializers import OrderItemSerializer
+from products.search import ProductSearchFilter
+from products.facets import ProductFacetFilter, bump_facet_version, get_facets, public_products
+from products.copurchase import bought_together
+from products import popularity
+from products.models import ProductTrendingEpoch
+from common.fieldsets import build_query_plan
+from common.fieldsets import SparseFieldsetViewMixin
+from common.exports import ExportMixin
+from products.importer import (
+    FORMATS as IMPORT_FORMATS, ProductImporter, detect_format, notify_import_summary, open_upload,
+)
 
 
 
@@ -72,15 +86,45 @@ class IsVendorOrAdmin(BasePermission):
 
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ExportMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [IsVendorOrAdmin]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, ProductFacetFilter, filters.OrderingFilter]
+    search_fields = ['name', 'sku', 'categories__name', 'tags__name']
+    filterset_fields = {
+        'rating_avg': ['gte', 'lte'],
+        'rating_count': ['gte'],
+        'effective_price': ['gte', 'lte'],
+    }
+    ordering_fields = ['created_at', 'price1', 'effective_price', 'rating_avg', 'rating_count']
+    export_filename = "products"
+    export_fields = {
+        "id": "id",
+        "name": "name",
+        "slug": "slug",
+        "sku": "sku",
+        "vendor_id": "vendor_id",
+        "vendor_email": "vendor__email",
+        "price1": "price1",
+        "price2": "price2",
+        "price3": "price3",
+        "effective_price": "effective_price",
+        "active_promotion_id": "active_promotion_id",
+        "is_stock": "is_stock",
+        "stock_quantity": "stock_quantity",
+        "status": "status",
+        "is_active": "is_active",
+        "featured": "featured",
+        "rating_avg": "rating_avg",
+        "rating_count": "rating_count",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    }
 
     def get_queryset(self):
-        qs = Product.objects.select_related("seo", "vendor").prefetch_related(
-            "categories", "tags", "images"
-        )
+        # select_related/prefetch_related come from the requested fieldset (see filter_queryset)
+        qs = Product.objects.all()
         user = self.request.user
 
         if user.is_authenticated:
@@ -130,17 +174,12 @@ class ProductViewSet(viewsets.ModelViewSet):
 
         # --- admin notify ---
         if getattr(user, "role", None) == UserRole.VENDOR.value:
-            admins = User.objects.filter(is_active=True).filter(
-                models.Q(role=UserRole.ADMIN.value) | models.Q(is_staff=True)
+            notify_admins(
+                f"Vendor '{user.email}' added a new product '{product.name}'.",
+                ntype=NotificationType.PRODUCT,
+                sender=user,
+                meta_data={"action": "product_added", "product_id": product.id},
             )
-            for admin in admins:
-                send_notification_to_user(
-                    admin,
-                    f"Vendor '{user.email}' added a new product '{product.name}'.",
-                    ntype=NotificationType.PRODUCT,
-                    sender=user,
-                    meta_data={"action": "product_added", "product_id": product.id},
-                )
 
     # --- new destroy override ---
     def perform_destroy(self, instance):
@@ -148,6 +187,98 @@ class ProductViewSet(viewsets.ModelViewSet):
             raise ValidationError("This product has been ordered and cannot be deleted.")
         instance.delete()
 
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        # Buffered; written to ProductViewStats by popularity.flush_views.
+        popularity.record_view(int(kwargs[self.lookup_url_kwarg or self.lookup_field]))
+        return response
+
+    # --- trending products (time-decayed views) ---
+    @action(detail=False, methods=["get"], url_path="trending")
+    def trending(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        except ValueError:
+            raise ValidationError({"limit": "Must be a number."})
+
+        serializer = self.get_serializer()
+        select, prefetch = build_query_plan(serializer)
+        products = list(
+            public_products()
+            .filter(view_stats__trending_score__gt=0)
+            .select_related("view_stats", *select)
+            .prefetch_related(*prefetch)
+            .order_by("-view_stats__trending_score", "pk")[:limit]
+        )
+        epoch = ProductTrendingEpoch.objects.values_list("epoch", flat=True).first()
+        data = self.get_serializer(products, many=True).data
+        for item, product in zip(data, products):
+            item["views"] = product.view_stats.views
+            item["trending_score"] = round(popularity.decayed_score(product.view_stats.trending_score, epoch), 3)
+        return Response(data)
+
+    # --- facet counts for catalogue browsing ---
+    @action(detail=False, methods=["get"], url_path="facets")
+    def facets(self, request):
+        """
+        Counts per category, tag, price band, delivery option and stock state
+        for the public catalogue, narrowed by the list's own query params.
+        """
+        queryset = public_products()
+        # Facet selections are applied per dimension inside get_facets.
+        for backend in self.filter_backends:
+            if backend not in (ProductFacetFilter, filters.OrderingFilter):
+                queryset = backend().filter_queryset(request, queryset, self)
+        return Response(get_facets(request.query_params, queryset))
+
+    # --- "frequently bought together" ---
+    @action(detail=False, methods=["get"], url_path="bought-together")
+    def bought_together(self, request):
+        """
+        ``?product=<id>[,<id>...]``: products most often ordered with the given
+        one(s), e.g. a product page or the whole cart. ``?limit=`` (default 10).
+        """
+        raw = [part for value in request.query_params.getlist("product") for part in value.split(",") if part.strip()]
+        try:
+            product_ids = {int(part) for part in raw}
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except ValueError:
+            raise ValidationError({"product": "Use comma-separated product ids; limit must be a number."})
+        if not product_ids:
+            raise ValidationError({"product": "At least one product id is required."})
+
+        ranked = bought_together(product_ids)
+        if not ranked:
+            return Response([])
+        serializer = self.get_serializer()
+        select, prefetch = build_query_plan(serializer)
+        products = public_products().filter(pk__in=ranked).select_related(*select).prefetch_related(*prefetch)
+        by_id = {product.pk: product for product in products}
+        ordered = [by_id[pk] for pk in ranked if pk in by_id][:limit]
+        return Response(self.get_serializer(ordered, many=True).data)
+
+    # --- bulk import (CSV / NDJSON) ---
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser])
+    def import_products(self, request):
+        user = request.user
+        if not (user.is_staff or getattr(user, "role", None) in [UserRole.ADMIN.value, UserRole.VENDOR.value]):
+            raise PermissionDenied("Only vendors or admins can import products.")
+
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "Upload a CSV or NDJSON file."})
+        fmt = request.data.get("format") or detect_format(upload.name)
+        if fmt not in IMPORT_FORMATS:
+            raise ValidationError({"format": f"Use one of: {', '.join(IMPORT_FORMATS)}."})
+
+        result = ProductImporter(user).import_stream(open_upload(upload), fmt)
+        notify_import_summary(user, result, source=upload.name)
+
+        return Response(
+            result.as_dict(),
+            status=status.HTTP_201_CREATED if result.created else status.HTTP_400_BAD_REQUEST,
+        )
+
 
 
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
@@ -158,7 +289,7 @@ class ProductViewSet(viewsets.ModelViewSet):
 
         product.status = ProductStatus.APPROVED.value
         product.is_active = True
-        product.save()
+        product.save(update_fields=["status", "is_active", "updated_at"])
 
         # Notify vendor when product is accepted
         send_notification_to_user(
@@ -182,7 +313,7 @@ class ProductViewSet(viewsets.ModelViewSet):
 
         product.status = ProductStatus.REJECTED.value
         product.is_active = False
-        product.save()
+        product.save(update_fields=["status", "is_active", "updated_at"])
 
         # Notify vendor when product is rejected
         send_notification_to_user(
@@ -266,7 +397,7 @@ class IsVendorOrAdmin(BasePermission):
         )
 
 
-class StandardResultsSetPagination(PageNumberPagination):
+class StandardResultsSetPagination(SelectablePaginationMixin, PageNumberPagination):
     page_size = 10  
     page_size_query_param = 'page_size'
     max_page_size = 100
@@ -282,14 +413,14 @@ class StandardResultsSetPagination(PageNumberPagination):
 class TopSellProductViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [IsVendorOrAdmin]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'is_active', 'vendor']
     search_fields = ['name', 'sku', 'categories__name', 'tags__name']
     ordering_fields = [
         'price1', 'price2', 'price3',
-        'total_quantity_sold', 'total_discount', 'created_at'
+        'total_quantity_sold', 'total_revenue', 'created_at'
     ]
-    ordering = ['-total_quantity_sold']
+    ordering = ['-total_quantity_sold', '-pk']
     pagination_class = StandardResultsSetPagination
 
     def get_queryset(self):
@@ -297,37 +428,28 @@ class TopSellProductViewSet(viewsets.ReadOnlyModelViewSet):
             return Product.objects.none()
         user = self.request.user
 
-        delivered_items = OrderItem.objects.filter(
-            order__order_status=OrderStatus.DELIVERED.value
-        )
+        # Counters come from ProductSalesStats / ProductSalesDaily (see products.sales).
+        days = self.request.query_params.get('days')
+        if days and days.isdigit():
+            since = timezone.localdate() - timedelta(days=int(days))
+            products = Product.objects.filter(
+                sales_daily__day__gte=since
+            ).annotate(
+                total_quantity_sold=Sum('sales_daily__units_sold'),
+                total_revenue=Sum('sales_daily__revenue'),
+            ).filter(total_quantity_sold__gt=0)
+        else:
+            products = Product.objects.filter(
+                sales_stats__units_sold__gt=0
+            ).annotate(
+                total_quantity_sold=F('sales_stats__units_sold'),
+                total_revenue=F('sales_stats__revenue'),
+            )
 
         if user.role == UserRole.VENDOR.value:
-            delivered_items = delivered_items.filter(product__vendor=user)
-
-        top_products = delivered_items.values('product').annotate(
-            total_quantity_sold=Sum('quantity')
-        ).order_by('-total_quantity_sold')
-
-        product_ids = [item['product'] for item in top_products]
-
-        products_qs = Product.objects.filter(id__in=product_ids)
-
-        preserved_order = Case(
-            *[When(pk=pk, then=pos) for pos, pk in enumerate(product_ids)]
-        )
-
-        subquery = OrderItem.objects.filter(
-            order__order_status=OrderStatus.DELIVERED.value,
-            product=OuterRef('pk')
-        ).values('product').annotate(
-            total_qty=Sum('quantity')
-        ).values('total_qty')
-
-        products = products_qs.annotate(
-            total_quantity_sold=Subquery(subquery, output_field=IntegerField())
-        ).order_by(preserved_order)
+            products = products.filter(vendor=user)
 
-        return products
+        return products.order_by('-total_quantity_sold', '-pk')
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
@@ -406,7 +528,7 @@ class PromotionViewSet(viewsets.ModelViewSet):
 
 
 
-class VendorProductList(viewsets.ModelViewSet):
+class VendorProductList(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = VendorProductSerializer
     permission_classes = [permissions.IsAuthenticated, IsVendorOrAdmin]
     pagination_class = StandardResultsSetPagination
@@ -419,7 +541,7 @@ class VendorProductList(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False) or not self.request.user.is_authenticated:
             return Product.objects.none()
         user = self.request.user
-        base_qs = Product.objects.select_related("seo").prefetch_related("categories", "tags", "images")
+        base_qs = Product.objects.all()
 
         if user.role == UserRole.VENDOR.value:
             return base_qs.filter(vendor=user)
@@ -548,7 +670,7 @@ class ReturnProductViewSet(viewsets.ModelViewSet):
 
 
 
-class DeliveredOrderItemViewSet(viewsets.ReadOnlyModelViewSet):
+class DeliveredOrderItemViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = OrderItemSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -601,6 +723,8 @@ class BulkProductsStatusUpdateViewSet(viewsets.ViewSet):
 
         products = Product.objects.filter(id__in=product_ids)
         updated_count = products.update(status=new_status)
+        # QuerySet.update skips the signals; the status decides what public_products() shows.
+        bump_facet_version()
 
         return Response(
             {"detail": f"Updated status of {updated_count} products to '{new_status}'."},
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-17 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('review', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reviewimage',
+            name='image_bytes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reviewimage',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reviewimage',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='reviewimage',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
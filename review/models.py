@@ -1,5 +1,6 @@
 from django.db import models
 from users.models import BaseModel
+from common.models import ImageVariantsModel
 
 
 class Review(BaseModel):
@@ -17,7 +18,7 @@ class Review(BaseModel):
         return f"Review by {self.user} for {self.product}"
 
 
-class ReviewImage(BaseModel):
+class ReviewImage(ImageVariantsModel, BaseModel):
     review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="reviews/")
 
@@ -4,12 +4,19 @@ from django.utils import timezone
 from .models import Review, ReviewImage
 from users.serializers import UserSerializer
 from products.models import Product
+from common.images import SrcsetField, ThumbnailField
 
 
 class ReviewImageSerializer(serializers.ModelSerializer):
+    width = serializers.IntegerField(source="image_width", read_only=True)
+    height = serializers.IntegerField(source="image_height", read_only=True)
+    srcset = SrcsetField()
+    thumbnail = ThumbnailField()
+    thumbnail_jpeg = ThumbnailField(fmt="jpeg")
+
     class Meta:
         model = ReviewImage
-        fields = ["id", "image"]
+        fields = ["id", "image", "width", "height", "srcset", "thumbnail", "thumbnail_jpeg"]
 
 
 class ReviewSerializer(serializers.ModelSerializer):
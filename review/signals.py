@@ -0,0 +1,36 @@
+# review/signals.py
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from products.ratings import apply_rating_change
+from review.models import Review
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, raw=False, **kwargs):
+    instance._previous_rating = None
+    if raw or not instance.pk:
+        return
+    instance._previous_rating = (
+        Review.objects.filter(pk=instance.pk).values_list("product_id", "rating").first()
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_product_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_rating", None)
+    current = (instance.product_id, instance.rating)
+    if not created and previous == current:
+        return
+    with transaction.atomic():
+        if previous:
+            apply_rating_change(previous[0], previous[1], -1)
+        apply_rating_change(instance.product_id, instance.rating, 1)
+
+
+@receiver(post_delete, sender=Review)
+def update_product_rating_on_delete(sender, instance, **kwargs):
+    apply_rating_change(instance.product_id, instance.rating, -1)
@@ -327,9 +327,10 @@ class VendorListSerializer(serializers.ModelSerializer):
         return Order.objects.filter(vendor=obj).count()
 
     def get_ratings(self, obj):
-        products = Product.objects.filter(vendor=obj)
-        avg_rating = Review.objects.filter(product__in=products).aggregate(avg=Avg("rating"))["avg"]
-        return round(avg_rating, 2) if avg_rating else 0
+        agg = Product.objects.filter(vendor=obj).aggregate(
+            total=Sum("rating_sum"), count=Sum("rating_count")
+        )
+        return round(agg["total"] / agg["count"], 2) if agg["count"] else 0
 
     def get_actions(self, obj):
         return {